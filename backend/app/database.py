@@ -1,8 +1,19 @@
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from anyio import CancelScope, CapacityLimiter, to_thread
+from anyio.lowlevel import RunVar
+from fastapi import Request
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
+from dataclasses import asdict, dataclass
 from threading import Lock
 
+from .metricas.consultas import instrumentar_consultas
+from .metricas.pool import QueuePoolInstrumentado, instrumentar_engine
+from .replicas import EnrutadorLecturas, Replica
+
 DB_USER = os.getenv("DB_USER", "dao_user")
 DB_PASS = os.getenv("DB_PASS", "dao_pass")
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -13,6 +24,70 @@ SQLALCHEMY_DATABASE_URL = (
     f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
+# Modo asíncrono (opcional): los endpoints más usados pasan a `async def` con
+# sesiones aiomysql. DB_ASYNC_URL permite otro driver (p. ej. sqlite+aiosqlite).
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+SQLALCHEMY_ASYNC_DATABASE_URL = os.getenv(
+    "DB_ASYNC_URL",
+    f"mysql+aiomysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+)
+
+
+def _bool_env(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return defecto
+    return valor.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True)
+class ConfiguracionPool:
+    """Parámetros del pool de conexiones (variables DB_POOL_*)."""
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+    pool_recycle: int = -1
+    pool_pre_ping: bool = True
+
+    @classmethod
+    def desde_entorno(cls) -> "ConfiguracionPool":
+        pre_ping = _bool_env("DB_POOL_PRE_PING", True)
+        recycle = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+        if not pre_ping and recycle <= 0:
+            # Sin pre-ping, la vigencia de las conexiones se controla reciclándolas
+            # antes de que el servidor las cierre por inactividad
+            recycle = 1800
+        return cls(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=recycle,
+            pool_pre_ping=pre_ping,
+        )
+
+    def como_kwargs(self) -> dict:
+        return asdict(self)
+
+
+def crear_engine(url: str, config: ConfiguracionPool, nombre: str = "primario"):
+    """Engine con pool configurable e instrumentado (ver app/metricas/pool.py y consultas.py)."""
+    engine = create_engine(
+        url,
+        poolclass=QueuePoolInstrumentado,
+        pool_logging_name=nombre,
+        **config.como_kwargs(),
+    )
+    instrumentar_engine(engine, nombre)
+    instrumentar_consultas(engine)
+    return engine
+
+
+# Réplicas de lectura (opcional), separadas por coma. Ver app/replicas.py
+DB_REPLICA_URLS = [u.strip() for u in os.getenv("DB_REPLICA_URLS", "").split(",") if u.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+DB_LECTURA_PROPIA_SEGUNDOS = float(os.getenv("DB_LECTURA_PROPIA_SEGUNDOS", "5"))
+
+
 class _DatabaseSingleton:
     _instance = None
     _lock: Lock = Lock()
@@ -26,19 +101,105 @@ class _DatabaseSingleton:
         return cls._instance
 
     def _initialize(self):
-        self.engine = create_engine(
-            SQLALCHEMY_DATABASE_URL,
-            pool_pre_ping=True,
-        )
+        self.config_pool = ConfiguracionPool.desde_entorno()
+        self.engine = crear_engine(SQLALCHEMY_DATABASE_URL, self.config_pool)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
 
+        replicas = [
+            Replica(f"replica{i}", crear_engine(url, self.config_pool, f"replica{i}"), DB_REPLICA_MAX_LAG)
+            for i, url in enumerate(DB_REPLICA_URLS, start=1)
+        ]
+        # Se pasa una función para respetar un SessionLocal reasignado luego
+        self.lecturas = EnrutadorLecturas(lambda: self.SessionLocal(), replicas, DB_LECTURA_PROPIA_SEGUNDOS)
+
+        self.async_habilitado = DB_ASYNC
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        if self.async_habilitado:
+            # Import diferido: el modo sync no requiere los drivers async
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            self.async_engine = create_async_engine(
+                SQLALCHEMY_ASYNC_DATABASE_URL,
+                **self.config_pool.como_kwargs(),
+            )
+            instrumentar_consultas(self.async_engine.sync_engine)
+            self.AsyncSessionLocal = async_sessionmaker(autoflush=False, bind=self.async_engine)
+
 Database = _DatabaseSingleton()
 
 Base = declarative_base()
 
-def get_db():
-    db = Database.SessionLocal()
+# Límite de sesiones de requests por engine, igual a las conexiones de su pool.
+# Los endpoints sync usan la conexión en el threadpool (el endpoint y también la
+# serialización de la respuesta). Si hay más requests que conexiones, los hilos
+# pueden quedar todos esperando una conexión que tiene tomada un request que a
+# su vez espera un hilo para terminar, y nada avanza hasta que vence
+# DB_POOL_TIMEOUT. El permiso se pide en el event loop, antes de ocupar un hilo,
+# y se libera después de cerrar la sesión. Lo piden las dependencias get_db /
+# get_read_db y las exportaciones en streaming, que usan una sola sesión cada
+# una. Quedan afuera los jobs del scheduler y el startup, que corren en sus
+# propios hilos: no esperan hilos del threadpool, así que un request con permiso
+# puede tener que esperar a que uno de ellos termine y devuelva su conexión,
+# pero no queda trabado. Es por event loop (RunVar) porque los limitadores de
+# anyio no se comparten entre loops.
+_limitadores_sesion: RunVar[Dict[int, CapacityLimiter]] = RunVar("limitadores_sesion")
+
+
+def _limitador_sesion(db) -> CapacityLimiter:
     try:
+        limitadores = _limitadores_sesion.get()
+    except LookupError:
+        limitadores = {}
+        _limitadores_sesion.set(limitadores)
+    engine = db.get_bind()
+    limitador = limitadores.get(id(engine))
+    if limitador is None:
+        config = Database.config_pool
+        limitador = limitadores[id(engine)] = CapacityLimiter(config.pool_size + config.max_overflow)
+    return limitador
+
+
+# Context manager y no generador: si el endpoint falla, la excepción entra por el
+# `async with` y el permiso se libera en la misma tarea que lo tomó (un
+# generador anidado quedaría abierto y lo cerraría el recolector en otra tarea).
+@asynccontextmanager
+async def sesion_limitada(db):
+    """`db` con el permiso de su engine (ver arriba) hasta cerrarla."""
+    async with _limitador_sesion(db):
+        try:
+            yield db
+        finally:
+            # close() puede hacer rollback: no bloquear el event loop con esa ida y vuelta.
+            # Protegido de la cancelación (cliente que corta un stream): la conexión vuelve al pool
+            with CancelScope(shield=True):
+                await to_thread.run_sync(db.close)
+
+
+async def sesion_lectura(forzar_primario: bool = False):
+    """Sesión de lectura de `Database.lecturas` (réplica sana o primario).
+
+    Con réplicas, elegirla puede medir su atraso (una conexión y SHOW REPLICA
+    STATUS cada INTERVALO_CHEQUEO): se hace en un hilo para que una réplica lenta
+    o caída no frene el event loop hasta el timeout de conexión.
+    """
+    if not Database.lecturas.replicas:
+        return Database.lecturas.sesion(forzar_primario)
+    return await to_thread.run_sync(Database.lecturas.sesion, forzar_primario)
+
+
+async def get_db():
+    async with sesion_limitada(Database.SessionLocal()) as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Sesión para endpoints de solo lectura: réplica si hay una sana y el cliente no escribió recién."""
+    db = await sesion_lectura(forzar_primario=Database.lecturas.escribio_recientemente(request))
+    async with sesion_limitada(db) as db:
+        yield db
+
+
+async def get_async_db():
+    async with Database.AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,15 +1,39 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from app.services.mantenimientos import actualizar_vehiculos_disponibles_por_mantenimientos
 from app.services.alquileres import actualizar_estados_alquileres
+from app.services.catalogos import catalogo_vehiculos
+from app.services.indice_clientes import indice_clientes
+from app.services.busqueda_texto import crear_indices_texto
+from app.services import ocupacion
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.exc import OperationalError
+import logging
+import os
 import time
 
 from .database import Base, Database
+from .metricas.consultas import finalizar_request, iniciar_request
+from .metricas.registro import (
+    duracion_jobs,
+    duracion_requests,
+    errores_jobs,
+    filas_jobs,
+    registro,
+    requests_en_curso,
+    requests_totales,
+    ultima_ejecucion_jobs,
+)
 from app import models
-from .routers import clientes, empleados, vehiculos, categorias_vehiculo, estados_vehiculo, alquileres, multas_danios, mantenimientos, seed, reports
+from .routers import clientes, empleados, vehiculos, categorias_vehiculo, estados_vehiculo, alquileres, multas_danios, mantenimientos, seed, reports, asincronos, metricas, debug
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="DAO - Sistema de Alquiler de Vehículos")
 
@@ -27,9 +51,78 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
 
+@app.middleware("http")
+async def lectura_de_escrituras_propias(request: Request, call_next):
+    """Tras una escritura exitosa, las lecturas del mismo cliente van al primario por un rato."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        Database.lecturas.marcar_escritura(request, response)
+    return response
+
+
+@app.middleware("http")
+async def contar_consultas(request: Request, call_next):
+    """Consultas y tiempo de DB por request: header Server-Timing y /debug/requests."""
+    registro = iniciar_request(request.method, request.url.path)
+    response = await call_next(request)
+    response.headers["Server-Timing"] = registro.server_timing()
+    finalizar_request(registro, response.status_code)
+    return response
+
+
+@app.middleware("http")
+async def medir_requests(request: Request, call_next):
+    """Latencia por ruta y requests en curso para /metrics."""
+    requests_en_curso.inc()
+    inicio = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        requests_en_curso.dec()
+        # Se etiqueta con la plantilla de la ruta (no con la URL) para acotar las series
+        ruta = request.scope.get("route")
+        ruta = ruta.path if ruta is not None else "sin_ruta"
+        duracion_requests.observar(time.perf_counter() - inicio, metodo=request.method, ruta=ruta)
+        requests_totales.inc(metodo=request.method, ruta=ruta, status=status_code)
+
+
+def crear_indices_faltantes():
+    """create_all no agrega índices nuevos a tablas que ya existen: crearlos acá."""
+    for tabla in Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            indice.create(bind=Database.engine, checkfirst=True)
+    crear_indices_texto(Database.engine)
+
+
+def inicializar_ocupacion():
+    """Construye el calendario de ocupación la primera vez que arranca con esa tabla (o con la mensual)."""
+    db = Database.SessionLocal()
+    try:
+        filas = ocupacion.inicializar(db)
+        if filas is not None:
+            logger.info("[startup] Calendario de ocupación construido: %s filas", filas)
+    finally:
+        db.close()
+
+
+def cargar_datos_en_memoria():
+    """Catálogos de vehículos e índice de clientes para /clientes/suggest."""
+    db = Database.SessionLocal()
+    try:
+        catalogo_vehiculos.cargar(db)
+        cantidad = indice_clientes.cargar(db)
+        logger.info("[startup] Índice de clientes cargado: %s clientes", cantidad)
+    finally:
+        db.close()
+
+
 @app.on_event("startup")
 def on_startup():
     """Intentar conectarse a la DB y crear las tablas con reintentos."""
@@ -38,17 +131,28 @@ def on_startup():
 
     for intento in range(1, max_tries + 1):
         try:
-            print(f"[startup] Intento {intento} de conectar a la DB y crear tablas...")
+            logger.info("[startup] Intento %s de conectar a la DB y crear tablas...", intento)
             Base.metadata.create_all(bind=Database.engine)
-            print("[startup] Tablas creadas / verificadas OK.")
+            crear_indices_faltantes()
+            inicializar_ocupacion()
+            cargar_datos_en_memoria()
+            logger.info("[startup] Tablas creadas / verificadas OK.")
             break
         except OperationalError as e:
-            print(f"[startup] No se pudo conectar a la DB: {e}")
+            logger.warning("[startup] No se pudo conectar a la DB: %s", e)
             if intento == max_tries:
-                print("[startup] Máximo de intentos alcanzado. Abortando.")
+                logger.error("[startup] Máximo de intentos alcanzado. Abortando.")
                 raise
             time.sleep(wait_seconds)
 
+    # Las transiciones de estado de alquileres se aplican al iniciar y luego
+    # una vez por día desde el scheduler (no en cada listado).
+    job_actualizar_alquileres()
+
+
+# Con DB_ASYNC las versiones async se registran primero y atienden esas rutas
+if Database.async_habilitado:
+    app.include_router(asincronos.router)
 
 app.include_router(clientes.router)
 app.include_router(empleados.router)
@@ -60,29 +164,64 @@ app.include_router(multas_danios.router)
 app.include_router(mantenimientos.router)
 app.include_router(seed.router)
 app.include_router(reports.router)
+app.include_router(metricas.router)
+app.include_router(debug.router)
 
 @app.get("/")
 def root():
     return {"message": "API de Alquiler de Vehículos - OK"}
 
-def job_actualizar_vehiculos():
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    return PlainTextResponse(registro.exponer(), media_type="text/plain; version=0.0.4")
+
+
+def _ejecutar_job(nombre: str, tarea, mensaje: str):
+    """Corre `tarea(db)` registrando duración, filas actualizadas y errores."""
+    inicio = time.perf_counter()
     db = Database.SessionLocal()
     try:
-        cantidad = actualizar_vehiculos_disponibles_por_mantenimientos(db)
-        print(f"Vehículos actualizados a 'Disponible': {cantidad}")
+        resultado = tarea(db)
+    except Exception:
+        errores_jobs.inc(job=nombre)
+        logger.exception("Falló el job %s", nombre)
+        raise
     finally:
         db.close()
+        duracion_jobs.observar(time.perf_counter() - inicio, job=nombre)
+    # Los jobs retornan la cantidad de filas o un dict de estadísticas con "actualizados"
+    cantidad = resultado["actualizados"] if isinstance(resultado, dict) else resultado
+    filas_jobs.inc(cantidad, job=nombre)
+    ultima_ejecucion_jobs.set(time.time(), job=nombre)
+    logger.info(mensaje, resultado)
+
+
+def job_actualizar_vehiculos():
+    _ejecutar_job(
+        "actualizar_vehiculos",
+        actualizar_vehiculos_disponibles_por_mantenimientos,
+        "Vehículos actualizados a 'Disponible': %s",
+    )
 
 
 def job_actualizar_alquileres():
-    db = SessionLocal()
-    try:
-        cantidad = actualizar_estados_alquileres(db)
-        print(f"Alquileres actualizados según la fecha: {cantidad}")
-    finally:
-        db.close()
+    _ejecutar_job(
+        "actualizar_alquileres",
+        actualizar_estados_alquileres,
+        "Alquileres actualizados según la fecha: %s",
+    )
+
+
+def job_extender_ocupacion():
+    _ejecutar_job(
+        "extender_ocupacion",
+        ocupacion.extender_horizonte,
+        "Días de mantenimientos abiertos agregados al calendario de ocupación: %s",
+    )
 
 scheduler = BackgroundScheduler()
 scheduler.add_job(job_actualizar_vehiculos, 'cron', hour=0, minute=0)
 scheduler.add_job(job_actualizar_alquileres, 'cron', hour=0, minute=0)
+scheduler.add_job(job_extender_ocupacion, 'cron', hour=0, minute=5)
 scheduler.start()
@@ -0,0 +1 @@
+# metricas package
@@ -0,0 +1,147 @@
+"""Conteo de consultas SQL por request y detección de N+1.
+
+Los eventos `before/after_cursor_execute` de cada engine acumulan, en el
+`RegistroConsultas` del request en curso (un ContextVar que abre el middleware
+de main.py), la cantidad de consultas, el tiempo total en la DB y cuántas
+veces se repitió cada sentencia. La sentencia se normaliza a una huella
+(espacios colapsados, listas IN y literales reemplazados por `?`), así un loop
+que consulta fila por fila aparece como una huella repetida.
+
+Cada request terminado se resume en un buffer circular (/debug/requests) y en
+el header `Server-Timing`. Un endpoint puede declarar su presupuesto de
+consultas con `Depends(presupuesto_consultas(n))`: si lo excede se registra
+un warning y, con CONSULTAS_ESTRICTO=1 (modo de prueba), la consulta que lo
+excede falla con `PresupuestoConsultasExcedido`.
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from threading import Lock
+from typing import List, Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+UMBRAL_REPETICION = int(os.getenv("CONSULTAS_UMBRAL_REPETICION", "5"))
+ESTRICTO = os.getenv("CONSULTAS_ESTRICTO", "0").lower() in ("1", "true", "si", "yes")
+MAX_REQUESTS_DEBUG = int(os.getenv("DEBUG_REQUESTS_MAX", "200"))
+
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACIOS = re.compile(r"\s+")
+
+
+class PresupuestoConsultasExcedido(RuntimeError):
+    pass
+
+
+def huella(sentencia: str) -> str:
+    sentencia = _ESPACIOS.sub(" ", sentencia).strip()
+    sentencia = _LITERALES.sub("?", sentencia)
+    return _LISTA_PARAMETROS.sub("(?)", sentencia)
+
+
+class RegistroConsultas:
+    def __init__(self, metodo: str, ruta: str):
+        self.metodo = metodo
+        self.ruta = ruta
+        self.inicio = time.perf_counter()
+        self.cantidad = 0
+        self.tiempo_db = 0.0
+        self.huellas: Counter = Counter()
+        self.presupuesto: Optional[int] = None
+
+    def registrar(self, sentencia: str, segundos: float) -> None:
+        self.cantidad += 1
+        self.tiempo_db += segundos
+        self.huellas[huella(sentencia)] += 1
+        if ESTRICTO and self.presupuesto is not None and self.cantidad > self.presupuesto:
+            raise PresupuestoConsultasExcedido(
+                f"{self.metodo} {self.ruta}: {self.cantidad} consultas, presupuesto {self.presupuesto}"
+            )
+
+    def repetidas(self) -> List[dict]:
+        return [
+            {"huella": h, "veces": n}
+            for h, n in self.huellas.most_common()
+            if n >= UMBRAL_REPETICION
+        ]
+
+    def resumen(self, status_code: int) -> dict:
+        return {
+            "metodo": self.metodo,
+            "ruta": self.ruta,
+            "status": status_code,
+            "duracion_ms": round((time.perf_counter() - self.inicio) * 1000, 3),
+            "consultas": self.cantidad,
+            "tiempo_db_ms": round(self.tiempo_db * 1000, 3),
+            "presupuesto": self.presupuesto,
+            "repetidas": self.repetidas(),
+        }
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.inicio) * 1000
+        return (
+            f'db;dur={self.tiempo_db * 1000:.3f};desc="{self.cantidad} consultas", '
+            f"total;dur={total_ms:.3f}"
+        )
+
+
+_registro_actual: ContextVar[Optional[RegistroConsultas]] = ContextVar("registro_consultas", default=None)
+_requests = deque(maxlen=MAX_REQUESTS_DEBUG)
+_requests_lock = Lock()
+
+
+def iniciar_request(metodo: str, ruta: str) -> RegistroConsultas:
+    """Abre el registro del request actual (lo llama el middleware)."""
+    registro = RegistroConsultas(metodo, ruta)
+    _registro_actual.set(registro)
+    return registro
+
+
+def finalizar_request(registro: RegistroConsultas, status_code: int) -> dict:
+    resumen = registro.resumen(status_code)
+    if registro.presupuesto is not None and registro.cantidad > registro.presupuesto:
+        logger.warning("%s %s excedió su presupuesto de consultas (%s/%s)",
+                       registro.metodo, registro.ruta, registro.cantidad, registro.presupuesto)
+    if resumen["repetidas"]:
+        logger.warning("%s %s: posible N+1 %s", registro.metodo, registro.ruta, resumen["repetidas"][0])
+    with _requests_lock:
+        _requests.append(resumen)
+    return resumen
+
+
+def requests_recientes(limite: int = 50, solo_repetidas: bool = False) -> List[dict]:
+    with _requests_lock:
+        recientes = list(_requests)
+    if solo_repetidas:
+        recientes = [r for r in recientes if r["repetidas"]]
+    return recientes[::-1][:limite]
+
+
+def presupuesto_consultas(maximo: int):
+    """Dependencia que declara cuántas consultas puede hacer el endpoint."""
+    def _declarar():
+        registro = _registro_actual.get()
+        if registro is not None:
+            registro.presupuesto = maximo
+    return _declarar
+
+
+def instrumentar_consultas(engine) -> None:
+    """Registra los eventos de cursor del engine (sync) en el registro del request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["inicio_consulta"].pop()
+        registro = _registro_actual.get()
+        if registro is not None:
+            registro.registrar(statement, time.perf_counter() - inicio)
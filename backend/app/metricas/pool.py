@@ -0,0 +1,168 @@
+"""Métricas del pool de conexiones.
+
+`QueuePoolInstrumentado` mide cuánto espera cada checkout para obtener una
+conexión (la espera que hoy no se ve cuando el pool se agota) y los eventos
+del pool cuentan conexiones creadas, checkouts, checkins, tiempo de uso de
+cada conexión e invalidaciones. Las métricas se agrupan por nombre de pool
+(`pool_logging_name` del engine), que se conserva si el pool se recrea.
+"""
+import time
+from threading import Lock
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from .registro import registro
+
+
+class MetricasPool:
+    def __init__(self):
+        self._lock = Lock()
+        self.conexiones_creadas = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidaciones = 0
+        self.esperas = 0  # checkouts que no encontraron una conexión libre
+        self.tiempo_espera_total = 0.0
+        self.tiempo_espera_max = 0.0
+        self.tiempo_uso_total = 0.0
+        self.tiempo_uso_max = 0.0
+        self.overflow_max = 0
+
+    def registrar_espera(self, segundos: float, sin_conexion_libre: bool, overflow: int) -> None:
+        with self._lock:
+            if sin_conexion_libre:
+                self.esperas += 1
+            self.tiempo_espera_total += segundos
+            self.tiempo_espera_max = max(self.tiempo_espera_max, segundos)
+            self.overflow_max = max(self.overflow_max, overflow)
+
+    def registrar_uso(self, segundos: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.tiempo_uso_total += segundos
+            self.tiempo_uso_max = max(self.tiempo_uso_max, segundos)
+
+    def sumar(self, campo: str) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def como_dict(self) -> dict:
+        with self._lock:
+            return {
+                "conexiones_creadas": self.conexiones_creadas,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidaciones": self.invalidaciones,
+                "esperas": self.esperas,
+                "tiempo_espera_total_s": round(self.tiempo_espera_total, 6),
+                "tiempo_espera_max_s": round(self.tiempo_espera_max, 6),
+                "tiempo_uso_total_s": round(self.tiempo_uso_total, 6),
+                "tiempo_uso_max_s": round(self.tiempo_uso_max, 6),
+                "overflow_max": self.overflow_max,
+            }
+
+
+_registro: Dict[str, MetricasPool] = {}
+_registro_lock = Lock()
+_engines: Dict[str, object] = {}
+
+
+def metricas_de(nombre: str) -> MetricasPool:
+    with _registro_lock:
+        if nombre not in _registro:
+            _registro[nombre] = MetricasPool()
+        return _registro[nombre]
+
+
+class QueuePoolInstrumentado(QueuePool):
+    """QueuePool que registra el tiempo de espera de cada checkout."""
+
+    def _do_get(self):
+        metricas = metricas_de(self._orig_logging_name or "default")
+        sin_conexion_libre = self.checkedin() == 0
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            # overflow() es negativo mientras no se hayan abierto pool_size conexiones
+            metricas.registrar_espera(time.perf_counter() - inicio, sin_conexion_libre, max(self.overflow(), 0))
+
+
+def instrumentar_engine(engine, nombre: str) -> None:
+    """Escucha los eventos del pool del engine y lo registra para `estado_pools`."""
+    metricas = metricas_de(nombre)
+    _engines[nombre] = engine
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        metricas.sumar("conexiones_creadas")
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        metricas.sumar("checkouts")
+        connection_record.info["checkout_en"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        inicio = connection_record.info.pop("checkout_en", None)
+        if inicio is not None:
+            metricas.registrar_uso(time.perf_counter() - inicio)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        metricas.sumar("invalidaciones")
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _soft_invalidate(dbapi_connection, connection_record, exception):
+        metricas.sumar("invalidaciones")
+
+
+def estado_pools() -> Dict[str, dict]:
+    """Contadores acumulados más el estado actual de cada pool instrumentado."""
+    resultado = {}
+    for nombre, engine in list(_engines.items()):
+        pool = engine.pool
+        estado = metricas_de(nombre).como_dict()
+        if isinstance(pool, QueuePool):
+            estado.update(
+                tamanio=pool.size(),
+                en_uso=pool.checkedout(),
+                libres=pool.checkedin(),
+                overflow_actual=max(pool.overflow(), 0),
+                timeout_s=pool.timeout(),
+            )
+        resultado[nombre] = estado
+    return resultado
+
+
+_CONTADORES_POOL = {
+    "conexiones_creadas": ("db_pool_conexiones_creadas_total", "Conexiones abiertas por el pool"),
+    "checkouts": ("db_pool_checkouts_total", "Conexiones entregadas por el pool"),
+    "invalidaciones": ("db_pool_invalidaciones_total", "Conexiones invalidadas"),
+    "esperas": ("db_pool_esperas_total", "Checkouts que no encontraron una conexión libre"),
+    "tiempo_espera_total_s": ("db_pool_espera_segundos_total", "Tiempo total esperando una conexión"),
+    "tiempo_uso_total_s": ("db_pool_uso_segundos_total", "Tiempo total de uso de las conexiones"),
+}
+_GAUGES_POOL = {
+    "tamanio": ("db_pool_tamanio", "Tamaño configurado del pool"),
+    "en_uso": ("db_pool_conexiones_en_uso", "Conexiones entregadas en este momento"),
+    "libres": ("db_pool_conexiones_libres", "Conexiones libres en el pool"),
+    "overflow_actual": ("db_pool_overflow", "Conexiones abiertas por encima de pool_size"),
+}
+
+
+@registro.recolector
+def _muestras_pool():
+    estados = estado_pools()
+    familias = []
+    for tipo, campos in (("counter", _CONTADORES_POOL), ("gauge", _GAUGES_POOL)):
+        for campo, (nombre, ayuda) in campos.items():
+            muestras = [
+                (nombre, {"pool": pool}, estado[campo])
+                for pool, estado in estados.items()
+                if campo in estado
+            ]
+            familias.append((nombre, tipo, ayuda, muestras))
+    return familias
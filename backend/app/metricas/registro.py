@@ -0,0 +1,200 @@
+"""Registro de métricas en proceso, expuesto en formato de texto de Prometheus (/metrics).
+
+Contadores, gauges e histogramas con etiquetas. Registrar una observación es
+tomar un lock y sumar en un dict (los buckets del histograma se ubican con
+bisect), así que se puede dejar activo en producción. Los valores que ya se
+llevan en otro lado (p. ej. el pool de conexiones) se exponen con
+recolectores que se ejecutan recién al generar /metrics.
+"""
+import math
+import time
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Tuple
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Muestra = Tuple[str, Dict[str, str], float]
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _numero(valor: float) -> str:
+    # repr y no :g, que redondea a 6 cifras (p. ej. un timestamp)
+    if isinstance(valor, float) and math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+def _formatear(nombre: str, etiquetas: Dict[str, str], valor: float) -> str:
+    if etiquetas:
+        pares = ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas.items())
+        return f"{nombre}{{{pares}}} {_numero(valor)}"
+    return f"{nombre} {_numero(valor)}"
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._lock = Lock()
+        self._valores: Dict[Tuple[str, ...], object] = {}
+
+    def _clave(self, valores_etiquetas: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(valores_etiquetas[e]) for e in self.etiquetas)
+
+    def muestras(self) -> List[Muestra]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, cantidad: float = 1, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def muestras(self) -> List[Muestra]:
+        with self._lock:
+            items = list(self._valores.items())
+        return [(self.nombre, dict(zip(self.etiquetas, clave)), valor) for clave, valor in items]
+
+
+class Gauge(Contador):
+    tipo = "gauge"
+
+    def dec(self, cantidad: float = 1, **etiquetas) -> None:
+        self.inc(-cantidad, **etiquetas)
+
+    def set(self, valor: float, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (), buckets=BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor: float, **etiquetas) -> None:
+        clave = self._clave(etiquetas)
+        posicion = bisect_left(self.buckets, valor)
+        with self._lock:
+            estado = self._valores.get(clave)
+            if estado is None:
+                # [conteos por bucket (+Inf al final), suma, cantidad]
+                estado = self._valores[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            estado[0][posicion] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def muestras(self) -> List[Muestra]:
+        with self._lock:
+            items = [(clave, (list(e[0]), e[1], e[2])) for clave, e in self._valores.items()]
+        resultado = []
+        for clave, (conteos, suma, cantidad) in items:
+            etiquetas = dict(zip(self.etiquetas, clave))
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                resultado.append((f"{self.nombre}_bucket", {**etiquetas, "le": le}, acumulado))
+            resultado.append((f"{self.nombre}_sum", etiquetas, suma))
+            resultado.append((f"{self.nombre}_count", etiquetas, cantidad))
+        return resultado
+
+
+class Registro:
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+        self._recolectores: List[Callable[[], Iterable[Tuple[str, str, str, List[Muestra]]]]] = []
+        self._lock = Lock()
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        with self._lock:
+            existente = self._metricas.get(metrica.nombre)
+            if existente is not None:
+                return existente
+            self._metricas[metrica.nombre] = metrica
+            return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def gauge(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> Gauge:
+        return self._registrar(Gauge(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (), buckets=BUCKETS_SEGUNDOS) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def recolector(self, funcion):
+        """Registra `funcion() -> [(nombre, tipo, ayuda, muestras)]`, evaluada al exponer."""
+        self._recolectores.append(funcion)
+        return funcion
+
+    def exponer(self) -> str:
+        with self._lock:
+            familias = [(m.nombre, m.tipo, m.ayuda, m.muestras()) for m in self._metricas.values()]
+        for recolector in self._recolectores:
+            familias.extend(recolector())
+
+        lineas = []
+        for nombre, tipo, ayuda, muestras in familias:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            lineas.extend(_formatear(n, e, v) for n, e, v in muestras)
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+
+requests_en_curso = registro.gauge("http_requests_en_curso", "Requests HTTP en proceso")
+duracion_requests = registro.histograma(
+    "http_request_duracion_segundos", "Duración de los requests HTTP por ruta", ("metodo", "ruta")
+)
+requests_totales = registro.contador(
+    "http_requests_total", "Requests HTTP por ruta y status", ("metodo", "ruta", "status")
+)
+
+duracion_jobs = registro.histograma(
+    "job_duracion_segundos", "Duración de los jobs del scheduler", ("job",), buckets=(0.1, 0.5, 1, 5, 15, 60, 300)
+)
+filas_jobs = registro.contador("job_filas_actualizadas_total", "Filas actualizadas por los jobs del scheduler", ("job",))
+errores_jobs = registro.contador("job_errores_total", "Ejecuciones fallidas de los jobs del scheduler", ("job",))
+ultima_ejecucion_jobs = registro.gauge(
+    "job_ultima_ejecucion_timestamp_segundos", "Momento (epoch) de la última ejecución exitosa", ("job",)
+)
+
+duracion_servicios = registro.histograma(
+    "servicio_duracion_segundos", "Duración de funciones de servicio instrumentadas", ("funcion",)
+)
+errores_servicios = registro.contador(
+    "servicio_errores_total", "Excepciones lanzadas por funciones de servicio instrumentadas", ("funcion",)
+)
+
+
+def medir(funcion):
+    """Decorador: registra la duración (y los errores) de una función de servicio."""
+    nombre = funcion.__name__
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        except Exception:
+            errores_servicios.inc(funcion=nombre)
+            raise
+        finally:
+            duracion_servicios.observar(time.perf_counter() - inicio, funcion=nombre)
+    return envoltura
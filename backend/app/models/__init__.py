@@ -4,5 +4,10 @@ from .clientes import Cliente
 from .empleados import Empleado
 from .estados_vehiculo import EstadoVehiculo
 from .mantenimientos import Mantenimiento
+from .marcas_proceso import MarcaProceso
 from .multasDanios import MultaDanio
+from .ocupacion_vehiculo import OcupacionVehiculo
+from .ocupacion_vehiculo_mensual import OcupacionVehiculoMensual
+from .ranking_vehiculo_mensual import RankingVehiculoMensual
+from .resumen_mensual import ResumenMensualAlquiler
 from .vehiculos import Vehiculo
@@ -7,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     DECIMAL,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -14,6 +15,17 @@ from ..database import Base
 
 class Alquiler(Base):
     __tablename__ = "alquiler"
+    __table_args__ = (
+        # Usados por las transiciones de estado diarias (PENDIENTE→EN_CURSO→CHECKOUT)
+        Index("ix_alquiler_estado_fecha_inicio", "estado", "fecha_inicio"),
+        Index("ix_alquiler_estado_fecha_fin", "estado", "fecha_fin"),
+        # Reportes por rango de fecha_inicio (vehículos más alquilados, bordes del resumen mensual)
+        Index("ix_alquiler_fecha_inicio_vehiculo_costo", "fecha_inicio", "id_vehiculo", "costo_total"),
+        # Alquileres por cliente: conteo, orden y continuación por cursor (fecha_inicio, id_alquiler)
+        Index("ix_alquiler_cliente_fecha_inicio_id", "id_cliente", "fecha_inicio", "id_alquiler"),
+        # Validación de disponibilidad de un vehículo
+        Index("ix_alquiler_vehiculo_estado_fechas", "id_vehiculo", "estado", "fecha_inicio", "fecha_fin"),
+    )
 
     id_alquiler = Column(Integer, primary_key=True, index=True)
     id_cliente = Column(Integer, ForeignKey("cliente.id_cliente"), nullable=False)
@@ -7,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     DECIMAL,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -14,6 +15,13 @@ from ..database import Base
 
 class Cliente(Base):
     __tablename__ = "cliente"
+    __table_args__ = (
+        # Búsqueda de texto libre `q` (en SQLite se usa la tabla FTS5 cliente_fts)
+        Index(
+            "ft_cliente_texto", "nombre", "apellido", "dni", "email", "telefono", "direccion",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
 
     id_cliente = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
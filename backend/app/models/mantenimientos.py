@@ -7,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     DECIMAL,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -14,6 +15,12 @@ from ..database import Base
 
 class Mantenimiento(Base):
     __tablename__ = "mantenimiento"
+    __table_args__ = (
+        # Validación de disponibilidad y mantenimientos activos de un vehículo
+        Index("ix_mantenimiento_vehiculo_fechas", "id_vehiculo", "fecha_inicio", "fecha_fin"),
+        # Mantenimientos finalizados desde la última corrida del job nocturno
+        Index("ix_mantenimiento_fecha_fin", "fecha_fin"),
+    )
 
     id_mantenimiento = Column(Integer, primary_key=True, index=True)
     id_vehiculo = Column(Integer, ForeignKey("vehiculo.id_vehiculo"), nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    String,
+)
+from ..database import Base
+
+
+class MarcaProceso(Base):
+    """Última fecha procesada por un job incremental (marca de agua)."""
+    __tablename__ = "marca_proceso"
+
+    nombre = Column(String(50), primary_key=True)
+    procesado_hasta = Column(Date, nullable=False)
+    actualizado_en = Column(DateTime, nullable=False)
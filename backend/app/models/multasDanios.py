@@ -7,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     DECIMAL,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -14,6 +15,11 @@ from ..database import Base
 
 class MultaDanio(Base):
     __tablename__ = "multa_danio"
+    __table_args__ = (
+        # Suma de multas por alquiler (costo_total, resumen mensual). MySQL crea un
+        # índice implícito para la FK, SQLite no: declararlo en ambos
+        Index("ix_multa_danio_alquiler_monto", "id_alquiler", "monto"),
+    )
 
     id_multa_danio = Column(Integer, primary_key=True, index=True)
     id_alquiler = Column(Integer, ForeignKey("alquiler.id_alquiler"), nullable=False)
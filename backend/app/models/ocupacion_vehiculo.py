@@ -0,0 +1,30 @@
+from sqlalchemy import (
+    Column,
+    Date,
+    Integer,
+    String,
+    Index,
+)
+from ..database import Base
+
+
+class OcupacionVehiculo(Base):
+    """Calendario de ocupación: una fila por (vehículo, día, alquiler no cancelado o mantenimiento).
+
+    Tabla derivada de alquiler y mantenimiento: se mantiene en cada escritura
+    (ver services/ocupacion.py) y puede reconstruirse desde cero.
+    """
+    __tablename__ = "ocupacion_vehiculo"
+    __table_args__ = (
+        # Vehículos ocupados en un día o rango (libres, utilización). De cobertura
+        # para filtrar los períodos que bloquean y agrupar por origen
+        Index("ix_ocupacion_dia_vehiculo_origen", "dia", "id_vehiculo", "origen", "estado"),
+        # Días de un período, para reemplazarlos o cambiarles el estado
+        Index("ix_ocupacion_origen", "origen", "id_origen"),
+    )
+
+    id_vehiculo = Column(Integer, primary_key=True, autoincrement=False)
+    dia = Column(Date, primary_key=True)
+    origen = Column(String(20), primary_key=True)  # "alquiler" | "mantenimiento"
+    id_origen = Column(Integer, primary_key=True, autoincrement=False)
+    estado = Column(String(50))  # estado del alquiler o tipo de mantenimiento
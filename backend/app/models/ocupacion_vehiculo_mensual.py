@@ -0,0 +1,30 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    Index,
+)
+from ..database import Base
+
+
+class OcupacionVehiculoMensual(Base):
+    """Días alquilados y en mantenimiento por (vehículo, año, mes), agrupados del calendario.
+
+    Tabla derivada de ocupacion_vehiculo: se recalcula para los meses que toca
+    cada escritura del calendario (ver services/ocupacion.py) y puede
+    reconstruirse desde cero.
+    """
+    __tablename__ = "ocupacion_vehiculo_mensual"
+    __table_args__ = (
+        # Suma de los meses de una ventana por vehículo (utilización): de cobertura y
+        # en orden de vehículo, el GROUP BY se resuelve recorriéndolo sin ordenar
+        Index(
+            "ix_ocupacion_mensual_vehiculo", "id_vehiculo", "anio", "mes", "dias_alquilado", "dias_mantenimiento"
+        ),
+    )
+
+    id_vehiculo = Column(Integer, primary_key=True, autoincrement=False)
+    anio = Column(Integer, primary_key=True, autoincrement=False)
+    mes = Column(Integer, primary_key=True, autoincrement=False)
+
+    dias_alquilado = Column(Integer, nullable=False, default=0)  # con algún alquiler y sin mantenimiento
+    dias_mantenimiento = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,25 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    Index,
+)
+from ..database import Base
+
+
+class RankingVehiculoMensual(Base):
+    """Alquileres no cancelados por (vehículo, año, mes de fecha_inicio).
+
+    Tabla derivada: se mantiene en cada alta, edición, cancelación y baja de
+    alquileres (ver services/ranking_vehiculos.py) y puede reconstruirse desde cero.
+    """
+    __tablename__ = "ranking_vehiculo_mensual"
+    __table_args__ = (
+        # Suma de los meses de una ventana, agrupada por vehículo
+        Index("ix_ranking_vehiculo_mensual_periodo", "anio", "mes", "id_vehiculo", "cantidad"),
+    )
+
+    id_vehiculo = Column(Integer, primary_key=True, autoincrement=False)
+    anio = Column(Integer, primary_key=True, autoincrement=False)
+    mes = Column(Integer, primary_key=True, autoincrement=False)
+
+    cantidad = Column(Integer, nullable=False, default=0)
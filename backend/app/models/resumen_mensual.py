@@ -0,0 +1,26 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DECIMAL,
+)
+from ..database import Base
+
+
+class ResumenMensualAlquiler(Base):
+    """Totales de alquileres por (año, mes de fecha_inicio, categoría, estado).
+
+    Tabla derivada: se mantiene en cada escritura de alquileres y multas
+    (ver services/resumen_mensual.py) y puede reconstruirse desde cero.
+    """
+    __tablename__ = "resumen_mensual_alquiler"
+
+    anio = Column(Integer, primary_key=True, autoincrement=False)
+    mes = Column(Integer, primary_key=True, autoincrement=False)
+    id_categoria = Column(Integer, primary_key=True, autoincrement=False)
+    estado = Column(String(30), primary_key=True)  # "" si el alquiler no tiene estado
+
+    cantidad = Column(Integer, nullable=False, default=0)
+    total_costo_base = Column(DECIMAL(14, 2), nullable=False, default=0)
+    total_costo_total = Column(DECIMAL(14, 2), nullable=False, default=0)
+    total_multas = Column(DECIMAL(14, 2), nullable=False, default=0)
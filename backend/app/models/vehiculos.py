@@ -7,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     DECIMAL,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -14,6 +15,10 @@ from ..database import Base
 
 class Vehiculo(Base):
     __tablename__ = "vehiculo"
+    __table_args__ = (
+        # Búsqueda de texto libre `q` (en SQLite se usa la tabla FTS5 vehiculo_fts)
+        Index("ft_vehiculo_texto", "patente", "marca", "modelo", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
     id_vehiculo = Column(Integer, primary_key=True, index=True)
     patente = Column(String(20), unique=True, nullable=False)
@@ -0,0 +1,114 @@
+"""Ruteo de lecturas a réplicas (DB_REPLICA_URLS).
+
+- Las sesiones de lectura se reparten round-robin entre las réplicas sanas.
+- Una réplica deja de usarse si su atraso de replicación supera
+  DB_REPLICA_MAX_LAG segundos o si no responde; el atraso se mide como mucho
+  una vez cada `INTERVALO_CHEQUEO` segundos. Sin réplicas sanas se lee del primario.
+- Lectura de las propias escrituras: después de una escritura exitosa, el mismo
+  cliente lee del primario durante DB_LECTURA_PROPIA_SEGUNDOS. El cliente se
+  identifica con una cookie (sirve entre procesos) y, para clientes sin
+  cookies, por X-Client-Id o IP dentro del proceso.
+"""
+import itertools
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+INTERVALO_CHEQUEO = 5.0
+COOKIE_ESCRITURA = "db_escritura"
+
+
+class Replica:
+    def __init__(self, nombre: str, engine, max_lag_segundos: float):
+        self.nombre = nombre
+        self.engine = engine
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self._max_lag = max_lag_segundos
+        self._lag: Optional[float] = None
+        self._chequeado_en = float("-inf")
+        self._lock = Lock()
+
+    def disponible(self) -> bool:
+        if time.monotonic() - self._chequeado_en >= INTERVALO_CHEQUEO:
+            # Un solo hilo mide; el resto usa el último valor
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._lag = self._medir_lag()
+                    self._chequeado_en = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self._lag is not None and self._lag <= self._max_lag
+
+    def _medir_lag(self) -> Optional[float]:
+        """Atraso en segundos; None si la réplica no responde o la replicación está detenida."""
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name != "mysql":
+                    return 0.0
+                try:
+                    estado = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+                except Exception:
+                    # MySQL < 8.0.22
+                    estado = conn.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+        except Exception:
+            return None
+        if estado is None:
+            # No está configurada como réplica: no hay atraso que medir
+            return 0.0
+        lag = estado.get("Seconds_Behind_Source", estado.get("Seconds_Behind_Master"))
+        return float(lag) if lag is not None else None
+
+    def estado(self) -> dict:
+        return {
+            "nombre": self.nombre,
+            "lag_segundos": self._lag,
+            "disponible": self._lag is not None and self._lag <= self._max_lag,
+        }
+
+
+class EnrutadorLecturas:
+    def __init__(self, sesion_primaria: Callable[[], Session], replicas: List[Replica], ventana_lectura_propia: float):
+        self._sesion_primaria = sesion_primaria
+        self.replicas = replicas
+        self._turno = itertools.count()
+        self._ventana = ventana_lectura_propia
+        self._escrituras: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def sesion(self, forzar_primario: bool = False) -> Session:
+        if not forzar_primario and self.replicas:
+            inicio = next(self._turno)
+            for i in range(len(self.replicas)):
+                replica = self.replicas[(inicio + i) % len(self.replicas)]
+                if replica.disponible():
+                    return replica.SessionLocal()
+        return self._sesion_primaria()
+
+    def marcar_escritura(self, request, response) -> None:
+        """Registra que el cliente de `request` escribió (llamar tras una escritura exitosa)."""
+        if not self.replicas:
+            return
+        hasta = time.time() + self._ventana
+        response.set_cookie(COOKIE_ESCRITURA, str(int(hasta) + 1), max_age=int(self._ventana) + 1, httponly=True)
+        with self._lock:
+            self._escrituras[_id_cliente(request)] = hasta
+            if len(self._escrituras) > 10000:
+                ahora = time.time()
+                self._escrituras = {k: v for k, v in self._escrituras.items() if v > ahora}
+
+    def escribio_recientemente(self, request) -> bool:
+        ahora = time.time()
+        cookie = request.cookies.get(COOKIE_ESCRITURA)
+        if cookie and cookie.isdigit() and int(cookie) > ahora:
+            return True
+        with self._lock:
+            return self._escrituras.get(_id_cliente(request), 0) > ahora
+
+    def estado(self) -> List[dict]:
+        return [r.estado() for r in self.replicas]
+
+
+def _id_cliente(request) -> str:
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "")
@@ -1,9 +1,20 @@
 from typing import Optional, Tuple, List
 from datetime import datetime
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from app.models import alquileres as m_alquileres
 from app.models import clientes as m_clientes
 from app.models import vehiculos as m_vehiculos
+from app.services.paginacion import codificar_cursor, paginar
+from app.services.rangos_fecha import en_rango, rango_desde_filtro
+from app.services.totales_cliente import totales_cliente
+
+# Mismo sentido en las dos columnas: el índice (id_cliente, fecha_inicio, id_alquiler)
+# se recorre hacia atrás y resuelve filtro, orden y continuación sin ordenar filas
+ORDEN_POR_CLIENTE = [
+    (m_alquileres.Alquiler.fecha_inicio, True),
+    (m_alquileres.Alquiler.id_alquiler, True),
+]
 
 
 def fetch_alquileres_by_cliente(
@@ -13,34 +24,61 @@ def fetch_alquileres_by_cliente(
     size: int = 10,
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
-) -> Tuple[int, List[object]]:
+    cursor: Optional[str] = None,
+) -> Tuple[int, Optional[object], List[object], Optional[str]]:
     """Repository function to retrieve alquileres for a given client with optional date filters.
-    Returns total count and ORM result rows.
+    Returns total count, the client row (nombre, apellido), ORM result rows and the next-page cursor.
+
+    With `cursor` the page continues after the last row of the previous one (keyset), so
+    page N costs the same as page 1; without it `page` is applied as an OFFSET.
+    The total is counted once per client and range (see services/totales_cliente.py).
     """
+    Alquiler = m_alquileres.Alquiler
+    inicio, fin = rango_desde_filtro(desde, hasta)
+    filtro = [Alquiler.id_cliente == client_id, en_rango(Alquiler.fecha_inicio, inicio, fin)]
+
+    # El cliente es el mismo para todas las filas: se lee una vez en lugar de unirlo a cada una
+    cliente = db.execute(
+        select(m_clientes.Cliente.nombre, m_clientes.Cliente.apellido)
+        .where(m_clientes.Cliente.id_cliente == client_id)
+    ).first()
+    if cliente is None:
+        return 0, None, [], None
+
+    total = totales_cliente.obtener_o_contar(
+        client_id, desde, hasta,
+        lambda: db.scalar(select(func.count()).select_from(Alquiler).where(*filtro)),
+    )
+
     query = (
         db.query(
-            m_alquileres.Alquiler.id_alquiler,
-            m_alquileres.Alquiler.id_cliente,
-            m_alquileres.Alquiler.id_vehiculo,
-            m_alquileres.Alquiler.fecha_inicio,
-            m_alquileres.Alquiler.fecha_fin,
-            m_alquileres.Alquiler.costo_total,
-            m_alquileres.Alquiler.estado.label("estado"),
-            m_clientes.Cliente.nombre.label("cliente_nombre"),
-            m_clientes.Cliente.apellido.label("cliente_apellido"),
+            Alquiler.id_alquiler,
+            Alquiler.id_cliente,
+            Alquiler.id_vehiculo,
+            Alquiler.fecha_inicio,
+            Alquiler.fecha_fin,
+            Alquiler.costo_total,
+            Alquiler.estado.label("estado"),
             m_vehiculos.Vehiculo.patente.label("vehiculo_patente"),
         )
-        .join(m_clientes.Cliente, m_clientes.Cliente.id_cliente == m_alquileres.Alquiler.id_cliente)
-        .join(m_vehiculos.Vehiculo, m_vehiculos.Vehiculo.id_vehiculo == m_alquileres.Alquiler.id_vehiculo)
-        .filter(m_alquileres.Alquiler.id_cliente == client_id)
-        .order_by(m_alquileres.Alquiler.fecha_inicio.desc())
+        .join(m_vehiculos.Vehiculo, m_vehiculos.Vehiculo.id_vehiculo == Alquiler.id_vehiculo)
+        .filter(*filtro)
     )
 
-    if desde:
-        query = query.filter(m_alquileres.Alquiler.fecha_inicio >= desde)
-    if hasta:
-        query = query.filter(m_alquileres.Alquiler.fecha_inicio <= hasta)
+    if cursor or page <= 1:
+        rows, siguiente = paginar(query, Alquiler, ORDEN_POR_CLIENTE, limit=size, cursor=cursor)
+        return total, cliente, rows, siguiente
 
-    total = query.count()
-    rows = query.offset((page - 1) * size).limit(size).all()
-    return total, rows
+    # Sin cursor y page > 1 (clientes anteriores): OFFSET, devolviendo igual el cursor
+    # para continuar por clave desde acá
+    rows = (
+        query.order_by(*[c.desc() for c, _ in ORDEN_POR_CLIENTE])
+        .offset((page - 1) * size)
+        .limit(size + 1)
+        .all()
+    )
+    siguiente = None
+    if len(rows) > size:
+        rows = rows[:size]
+        siguiente = codificar_cursor([getattr(rows[-1], c.key) for c, _ in ORDEN_POR_CLIENTE])
+    return total, cliente, rows, siguiente
@@ -1,24 +1,32 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from pydantic import TypeAdapter
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from decimal import Decimal
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 
 from ..schemas import alquileres as alquilerSchema
 from ..services import alquileres as alquiler_service
+from ..services import exportaciones as exportacion_service
 from ..services.exceptions import DomainNotFound, BusinessRuleError
+from .paginacion import ParametrosPagina, responder_pagina, responder_pagina_serializada
+from .exportacion import respuesta_exportacion
+from ..metricas.consultas import presupuesto_consultas
 
 router = APIRouter(
     prefix="/alquileres",
     tags=["Alquileres"],
 )
 
+_LISTA_RESUMEN = TypeAdapter(List[alquilerSchema.AlquilerResumenOut])
 
-@router.get("/", response_model=List[alquilerSchema.AlquilerOut])
+
+@router.get("/", response_model=List[alquilerSchema.AlquilerOut], dependencies=[Depends(presupuesto_consultas(4))])
 def listar_alquileres(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     estado: List[str] | None = Query(default=None),
     id_cliente: int | None = None,
     id_vehiculo: int | None = None,
@@ -27,18 +35,46 @@ def listar_alquileres(
     fecha_inicio_hasta: date | None = None,
     fecha_fin_desde: date | None = None,
     fecha_fin_hasta: date | None = None,
+    vista: str = Query(
+        "completa",
+        pattern="^(completa|resumen)$",
+        description="resumen: solo las columnas de la grilla (AlquilerResumenOut)",
+    ),
+    pagina: ParametrosPagina = Depends(),
 ):
-    return alquiler_service.listar_alquileres(
-        db,
-        estado,
-        id_cliente,
-        id_vehiculo,
-        id_empleado,
-        fecha_inicio_desde,
-        fecha_inicio_hasta,
-        fecha_fin_desde,
-        fecha_fin_hasta,
-    )
+    try:
+        items, cursor_siguiente = alquiler_service.listar_alquileres(
+            db,
+            estado,
+            id_cliente,
+            id_vehiculo,
+            id_empleado,
+            fecha_inicio_desde,
+            fecha_inicio_hasta,
+            fecha_fin_desde,
+            fecha_fin_hasta,
+            limit=pagina.limit,
+            cursor=pagina.cursor,
+            campos=pagina.campos,
+            vista=vista,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if vista == "resumen":
+        return responder_pagina_serializada(_LISTA_RESUMEN.dump_json(items), cursor_siguiente)
+    return responder_pagina(response, items, cursor_siguiente, pagina)
+
+
+@router.get("/exportar")
+def exportar_alquileres(
+    formato: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    desde: date | None = Query(None, description="fecha_inicio desde (YYYY-MM-DD)"),
+    hasta: date | None = Query(None, description="fecha_inicio hasta (YYYY-MM-DD)"),
+):
+    """
+    Exporta el histórico de alquileres en NDJSON o CSV, en streaming.
+    """
+    return respuesta_exportacion("alquileres", exportacion_service.exportar_alquileres, formato, desde=desde, hasta=hasta)
 
 
 @router.get("/{id_alquiler}", response_model=alquilerSchema.AlquilerOut)
@@ -65,6 +101,27 @@ def crear_alquiler(alquiler_in: alquilerSchema.AlquilerCreate, db: Session = Dep
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/lote", response_model=alquilerSchema.AlquilerLoteResponse, status_code=status.HTTP_201_CREATED)
+def crear_alquileres_lote(
+    lote: alquilerSchema.AlquilerLoteRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+):
+    """
+    Alta masiva de alquileres con resultado por fila.
+    Responde 201 si se insertó al menos una fila y 400 si no se insertó ninguna.
+    """
+    try:
+        resultado = alquiler_service.crear_alquileres_lote(db, lote.alquileres, lote.modo)
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if resultado["creados"] == 0:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return resultado
+
+
 @router.put("/{id_alquiler}", response_model=alquilerSchema.AlquilerOut)
 def actualizar_alquiler(id_alquiler: int,alquiler_in: alquilerSchema.AlquilerUpdate,db: Session = Depends(get_db),):
     try:
@@ -129,17 +186,18 @@ def cancelar_alquiler(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("actualizar-estado-alquileres", response_model=int)
+@router.post("/actualizar-estado-alquileres", response_model=int)
 def actualizar_estado_alquileres(db: Session = Depends(get_db)):
     """
     Actualiza el estado de los alquileres basándose en la fecha actual.
     - De PENDIENTE a EN_CURSO si la fecha de inicio es hoy o anterior.
     - De EN_CURSO a CHECKOUT si la fecha de fin es anterior a hoy.
-    
+
+    Fuerza la ejecución aunque la transición diaria ya se haya aplicado hoy.
     Retorna la cantidad de alquileres actualizados.
     """
     try:
-        cantidad_actualizados = alquiler_service.actualizar_estados_alquileres(db)
+        cantidad_actualizados = alquiler_service.actualizar_estados_alquileres(db, forzar=True)
         return cantidad_actualizados
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
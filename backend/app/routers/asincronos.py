@@ -0,0 +1,208 @@
+"""Versiones `async def` de los endpoints más usados (modo DB_ASYNC).
+
+Se registran antes que los routers sync y con las mismas rutas y parámetros,
+por lo que los reemplazan sin cambiar el contrato. Quedan fuera del esquema
+OpenAPI para no duplicar operaciones: la documentación es la de los sync.
+"""
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from ..metricas.consultas import presupuesto_consultas
+from ..schemas import alquileres as alquilerSchema
+from ..schemas import vehiculos as vehiculoSchema
+from ..schemas.reports import (
+    AlquileresPorClienteResponse,
+    VehiculosMasAlquiladosResponse,
+    AlquileresPorPeriodoResponse,
+    FacturacionMensualResponse,
+)
+from ..services import asincronos as svc
+from ..services.exceptions import DomainNotFound, BusinessRuleError
+from .alquileres import _LISTA_RESUMEN
+from .paginacion import CABECERA_CURSOR, ParametrosPagina, responder_pagina, responder_pagina_serializada
+
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/alquileres/", response_model=List[alquilerSchema.AlquilerOut], dependencies=[Depends(presupuesto_consultas(4))])
+async def listar_alquileres(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    estado: List[str] | None = Query(default=None),
+    id_cliente: int | None = None,
+    id_vehiculo: int | None = None,
+    id_empleado: int | None = None,
+    fecha_inicio_desde: date | None = None,
+    fecha_inicio_hasta: date | None = None,
+    fecha_fin_desde: date | None = None,
+    fecha_fin_hasta: date | None = None,
+    vista: str = Query(
+        "completa",
+        pattern="^(completa|resumen)$",
+        description="resumen: solo las columnas de la grilla (AlquilerResumenOut)",
+    ),
+    pagina: ParametrosPagina = Depends(),
+):
+    try:
+        items, cursor_siguiente = await svc.listar_alquileres(
+            db,
+            estado,
+            id_cliente,
+            id_vehiculo,
+            id_empleado,
+            fecha_inicio_desde,
+            fecha_inicio_hasta,
+            fecha_fin_desde,
+            fecha_fin_hasta,
+            limit=pagina.limit,
+            cursor=pagina.cursor,
+            campos=pagina.campos,
+            vista=vista,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if vista == "resumen":
+        return responder_pagina_serializada(_LISTA_RESUMEN.dump_json(items), cursor_siguiente)
+    return responder_pagina(response, items, cursor_siguiente, pagina)
+
+
+@router.post("/alquileres/", response_model=alquilerSchema.AlquilerOut, status_code=status.HTTP_201_CREATED)
+async def crear_alquiler(alquiler_in: alquilerSchema.AlquilerCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_alquiler(db, alquiler_in)
+    except DomainNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/vehiculos/disponibilidad", response_model=List[vehiculoSchema.VehiculoDisponibilidadOut], dependencies=[Depends(presupuesto_consultas(2))])
+async def listar_vehiculos_con_disponibilidad(db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.obtener_vehiculos_con_disponibilidad(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/vehiculos/libres", response_model=vehiculoSchema.VehiculosLibresResponse, dependencies=[Depends(presupuesto_consultas(3))])
+async def buscar_vehiculos_libres(
+    id_categoria: int = Query(..., description="Categoría de vehículo buscada"),
+    fecha_inicio: date = Query(..., description="Inicio del período (YYYY-MM-DD)"),
+    fecha_fin: date = Query(..., description="Fin del período (YYYY-MM-DD)"),
+    marca: Optional[str] = None,
+    modelo: Optional[str] = None,
+    anio: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        total, items = await svc.buscar_vehiculos_libres(
+            db,
+            id_categoria=id_categoria,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            marca=marca,
+            modelo=modelo,
+            anio=anio,
+            page=page,
+            size=size,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "id_categoria": id_categoria,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "total": total,
+        "page": page,
+        "size": size,
+        "items": items,
+    }
+
+
+@router.get("/reports/alquileres-por-cliente", response_model=AlquileresPorClienteResponse, dependencies=[Depends(presupuesto_consultas(3))])
+async def alquileres_por_cliente(
+    response: Response,
+    client_id: int = Query(..., description="ID del cliente"),
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    desde: Optional[str] = Query(None, description="Fecha ISO desde (YYYY-MM-DD)"),
+    hasta: Optional[str] = Query(None, description="Fecha ISO hasta (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description=f"Cursor devuelto en la cabecera {CABECERA_CURSOR}; reemplaza a page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    d_dt = datetime.fromisoformat(desde) if desde else None
+    h_dt = datetime.fromisoformat(hasta) if hasta else None
+    if d_dt and h_dt and h_dt < d_dt:
+        raise ValueError("La fecha fin no puede ser menor a la fecha inicio")
+    try:
+        total, items, cursor_siguiente = await svc.get_alquileres_por_cliente(
+            db, client_id=client_id, page=page, size=size, desde=d_dt, hasta=h_dt, cursor=cursor
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor_siguiente:
+        response.headers[CABECERA_CURSOR] = cursor_siguiente
+    return {
+        "client_id": client_id,
+        "desde": desde,
+        "hasta": hasta,
+        "total": total,
+        "page": page,
+        "size": size,
+        "items": items,
+    }
+
+
+@router.get("/reports/vehiculos-mas-alquilados", response_model=VehiculosMasAlquiladosResponse, dependencies=[Depends(presupuesto_consultas(4))])
+async def vehiculos_mas_alquilados(
+    limit: int = Query(10, ge=1, le=100),
+    desde: Optional[str] = Query(None, description="Fecha ISO desde (YYYY-MM-DD)"),
+    hasta: Optional[str] = Query(None, description="Fecha ISO hasta (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    d_dt = datetime.fromisoformat(desde) if desde else None
+    h_dt = datetime.fromisoformat(hasta) if hasta else None
+    items = await svc.get_vehiculos_mas_alquilados(db, limit=limit, desde=d_dt, hasta=h_dt)
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "items": items,
+    }
+
+
+@router.get("/reports/alquileres-por-periodo", response_model=AlquileresPorPeriodoResponse, dependencies=[Depends(presupuesto_consultas(4))])
+async def alquileres_por_periodo(
+    periodo: str = Query("mes", regex="^(mes|trimestre)$"),
+    desde: Optional[str] = Query(None, description="Fecha ISO desde (YYYY-MM-DD)"),
+    hasta: Optional[str] = Query(None, description="Fecha ISO hasta (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    d_dt = datetime.fromisoformat(desde) if desde else None
+    h_dt = datetime.fromisoformat(hasta) if hasta else None
+    items = await svc.get_alquileres_por_periodo(db, periodo=periodo, desde=d_dt, hasta=h_dt)
+    return {
+        "periodo": periodo,
+        "desde": desde,
+        "hasta": hasta,
+        "items": items,
+    }
+
+
+@router.get("/reports/facturacion-mensual", response_model=FacturacionMensualResponse, dependencies=[Depends(presupuesto_consultas(2))])
+async def facturacion_mensual(
+    anio: int = Query(..., ge=1900, le=2100),
+    db: AsyncSession = Depends(get_async_db),
+):
+    items = await svc.get_facturacion_mensual(db, anio=anio)
+    return {
+        "anio": anio,
+        "items": items,
+    }
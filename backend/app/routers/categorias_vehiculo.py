@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..schemas import categorias_vehiculo as categoriaSchema
 from ..services.exceptions import BusinessRuleError, DomainNotFound
 from ..services import categorias_vehiculo as categoriaService
@@ -29,7 +29,7 @@ def listar_categorias(
     descripcion: Optional[str] = None,
     tarifa_desde: Optional[float] = None,
     tarifa_hasta: Optional[float] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     return categoriaService.listar_categorias_vehiculo(
         db,
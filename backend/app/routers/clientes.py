@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from sqlalchemy import or_
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..schemas import clientes as clienteSchema
 from ..services import clientes as clientes_service
 from ..services.exceptions import DomainNotFound, BusinessRuleError
+from .paginacion import ParametrosPagina, responder_pagina
 
 router = APIRouter(prefix="/clientes", tags=["clientes"])
 
@@ -25,6 +26,7 @@ def crear_cliente(cliente_in: clienteSchema.ClienteCreate,db: Session = Depends(
 
 @router.get("/", response_model=List[clienteSchema.ClienteOut])
 def listar_clientes(
+    response: Response,
     nombre: Optional[str] = None,
     apellido: Optional[str] = None,
     dni: Optional[str] = None,
@@ -32,23 +34,33 @@ def listar_clientes(
     email: Optional[str] = None,
     direccion: Optional[str] = None,
     estado: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    q: Optional[str] = Query(None, description="Texto libre en todos los campos, ordenado por relevancia"),
+    pagina: ParametrosPagina = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    return clientes_service.listar_clientes(
-        nombre=nombre,
-        apellido=apellido,
-        dni=dni,
-        telefono=telefono,
-        email=email,
-        direccion=direccion,
-        estado=estado,
-        db=db
-    )
+    try:
+        items, cursor_siguiente = clientes_service.listar_clientes(
+            nombre=nombre,
+            apellido=apellido,
+            dni=dni,
+            telefono=telefono,
+            email=email,
+            direccion=direccion,
+            estado=estado,
+            db=db,
+            limit=pagina.limit,
+            cursor=pagina.cursor,
+            campos=pagina.campos,
+            q=q,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return responder_pagina(response, items, cursor_siguiente, pagina)
 
 
 @router.get("/suggest", summary="Sugerencias de clientes por coincidencia aproximada")
 def sugerir_clientes(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     query: str = Query(..., min_length=1, description="Texto parcial para buscar en nombre o apellido"),
     limit: int = Query(3, ge=1, le=10),
 ):
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Query
+
+from ..metricas.consultas import requests_recientes
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+)
+
+
+@router.get("/requests")
+def listar_requests_recientes(
+    limit: int = Query(50, ge=1, le=500),
+    solo_repetidas: bool = Query(False, description="Solo requests con consultas repetidas (posible N+1)"),
+):
+    """Últimos requests con su cantidad de consultas, tiempo en la DB y consultas repetidas."""
+    return requests_recientes(limit, solo_repetidas)
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..schemas import empleados as empleadoSchema
 from ..services.exceptions import BusinessRuleError, DomainNotFound
 from ..services import empleados as empleado_service
+from .paginacion import ParametrosPagina, responder_pagina
 
 
 router = APIRouter(prefix="/empleados", tags=["empleados"])
@@ -25,6 +26,7 @@ def crear_empleado(empleado_in: empleadoSchema.EmpleadoCreate, db: Session = Dep
 
 @router.get("/", response_model=List[empleadoSchema.EmpleadoOut])
 def listar_empleados(
+    response: Response,
     nombre: Optional[str] = None,
     apellido: Optional[str] = None,
     dni: Optional[str] = None,
@@ -33,19 +35,29 @@ def listar_empleados(
     telefono: Optional[str] = None,
     rol: Optional[str] = None,
     estado: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    q: Optional[str] = Query(None, description="Texto libre en todos los campos, ordenado por relevancia"),
+    pagina: ParametrosPagina = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    return empleado_service.listar_empleados(
-        db,
-        nombre=nombre,
-        apellido=apellido,
-        dni=dni,
-        legajo=legajo,
-        email=email,
-        telefono=telefono,
-        rol=rol,
-        estado=estado,
-    )
+    try:
+        items, cursor_siguiente = empleado_service.listar_empleados(
+            db,
+            nombre=nombre,
+            apellido=apellido,
+            dni=dni,
+            legajo=legajo,
+            email=email,
+            telefono=telefono,
+            rol=rol,
+            estado=estado,
+            limit=pagina.limit,
+            cursor=pagina.cursor,
+            campos=pagina.campos,
+            q=q,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return responder_pagina(response, items, cursor_siguiente, pagina)
 
 
 @router.get("/{empleado_id}", response_model=empleadoSchema.EmpleadoOut)
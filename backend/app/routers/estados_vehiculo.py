@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..models import estados_vehiculo as estadoModel
 from ..schemas import estados_vehiculo as estadoSchema
+from ..services.catalogos import catalogo_vehiculos
 
 router = APIRouter(
     prefix="/estados-vehiculo",
@@ -25,12 +26,13 @@ def crear_estado(estado_in: estadoSchema.EstadoVehiculoCreate, db: Session = Dep
     estado = estadoModel.EstadoVehiculo(**estado_in.model_dump())
     db.add(estado)
     db.commit()
+    catalogo_vehiculos.invalidar()
     db.refresh(estado)
     return estado
 
 
 @router.get("/", response_model=List[estadoSchema.EstadoVehiculoOut])
-def listar_estados(db: Session = Depends(get_db)):
+def listar_estados(db: Session = Depends(get_read_db)):
     return db.query(estadoModel.EstadoVehiculo).all()
 
 
@@ -57,6 +59,7 @@ def actualizar_estado(
         setattr(estado, field, value)
 
     db.commit()
+    catalogo_vehiculos.invalidar()
     db.refresh(estado)
     return estado
 
@@ -71,4 +74,5 @@ def eliminar_estado(estado_id: int, db: Session = Depends(get_db)):
 
     db.delete(estado)
     db.commit()
+    catalogo_vehiculos.invalidar()
     return None
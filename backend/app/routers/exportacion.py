@@ -0,0 +1,24 @@
+"""Respuesta en streaming compartida por los endpoints de exportación."""
+from typing import AsyncIterator, Callable, Iterator
+
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+
+from ..database import sesion_lectura, sesion_limitada
+from ..services.exportaciones import TIPOS_CONTENIDO
+
+
+async def _generar(exportar: Callable[..., Iterator[str]], formato: str, filtros: dict) -> AsyncIterator[str]:
+    # La sesión (y su permiso de conexión) vive mientras dura el stream, no lo que
+    # dura el endpoint. El histórico tolera el atraso de una réplica.
+    async with sesion_limitada(await sesion_lectura()) as db:
+        async for parte in iterate_in_threadpool(exportar(db, formato, **filtros)):
+            yield parte
+
+
+def respuesta_exportacion(nombre: str, exportar: Callable[..., Iterator[str]], formato: str, **filtros) -> StreamingResponse:
+    return StreamingResponse(
+        _generar(exportar, formato, filtros),
+        media_type=TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
@@ -1,14 +1,18 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
 from datetime import date
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..schemas import mantenimientos as mantenimientoSchema
 from ..models import Mantenimiento, Vehiculo, Empleado, Alquiler
 from ..services import mantenimientos as mantenimientos_service
+from ..services import exportaciones as exportacion_service
 from ..services.exceptions import DomainNotFound, BusinessRuleError
+from .paginacion import ParametrosPagina, responder_pagina
+from .exportacion import respuesta_exportacion
+from ..metricas.consultas import presupuesto_consultas
 
 router = APIRouter(
     prefix="/mantenimientos",
@@ -16,20 +20,39 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[mantenimientoSchema.MantenimientoOut])
+@router.get("/", response_model=List[mantenimientoSchema.MantenimientoOut], dependencies=[Depends(presupuesto_consultas(3))])
 def listar_mantenimientos(
+    response: Response,
     vehiculo: Optional[int] = Query(None, description="Filtro por id_vehiculo"),
     tipo: Optional[str] = Query(None, description="Filtro por tipo de mantenimiento"),
     empleado: Optional[int] = Query(None, description="Filtro por id_empleado"),
     estado: Optional[str] = Query(None, description='Filtro por estado: "en_curso" o "finalizado"'),
-    db: Session = Depends(get_db),
+    pagina: ParametrosPagina = Depends(),
+    db: Session = Depends(get_read_db),
 ):
     """Lista todos los mantenimientos. Permite filtrar por vehículo, tipo y estado.
 
     - `estado="en_curso"`: devuelve mantenimientos cuya `fecha_fin` sea hoy o posterior, o `NULL` (sin fecha de fin).
     - `estado="finalizado"`: devuelve mantenimientos cuya `fecha_fin` sea anterior a hoy.
     """
-    return mantenimientos_service.list_mantenimientos(db, vehiculo, tipo, empleado, estado)
+    try:
+        items, cursor_siguiente = mantenimientos_service.list_mantenimientos(
+            db, vehiculo, tipo, empleado, estado,
+            limit=pagina.limit, cursor=pagina.cursor, campos=pagina.campos,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return responder_pagina(response, items, cursor_siguiente, pagina)
+
+
+@router.get("/exportar")
+def exportar_mantenimientos(
+    formato: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    desde: Optional[date] = Query(None, description="fecha_inicio desde (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="fecha_inicio hasta (YYYY-MM-DD)"),
+):
+    """Exporta el histórico de mantenimientos en NDJSON o CSV, en streaming."""
+    return respuesta_exportacion("mantenimientos", exportacion_service.exportar_mantenimientos, formato, desde=desde, hasta=hasta)
 
 
 @router.get("/{id_mantenimiento}", response_model=mantenimientoSchema.MantenimientoOut)
@@ -85,11 +108,11 @@ def eliminar_mantenimiento(id_mantenimiento: int, db: Session = Depends(get_db))
         raise HTTPException(status_code=500, detail="Error interno al eliminar mantenimiento")
 
 
-@router.post("/actualizar-vehiculos-disponibles", response_model=int)
+@router.post("/actualizar-vehiculos-disponibles", response_model=mantenimientoSchema.LiberacionVehiculosOut)
 def actualizar_vehiculos_disponibles(db: Session = Depends(get_db)):
-    """Actualiza el estado de los vehículos a 'Disponible' si sus mantenimientos han finalizado."""
+    """Actualiza el estado de los vehículos a 'Disponible' si sus mantenimientos han finalizado
+    desde la corrida anterior. Retorna las estadísticas de la corrida."""
     try:
-        cantidad = mantenimientos_service.actualizar_vehiculos_disponibles_por_mantenimientos(db)
-        return cantidad
+        return mantenimientos_service.actualizar_vehiculos_disponibles_por_mantenimientos(db)
     except Exception:
         raise HTTPException(status_code=500, detail="Error interno al actualizar vehículos disponibles")
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from ..database import Database
+from ..metricas.pool import estado_pools
+
+router = APIRouter(
+    prefix="/metricas",
+    tags=["Métricas"],
+)
+
+
+@router.get("/pool")
+def metricas_pool():
+    """Configuración y métricas del pool de conexiones a la DB y estado de las réplicas."""
+    return {
+        "configuracion": Database.config_pool.como_kwargs(),
+        "pools": estado_pools(),
+        "replicas": Database.lecturas.estado(),
+    }
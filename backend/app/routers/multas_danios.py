@@ -1,13 +1,17 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..schemas import multas_danios as multaDanioSchema
 from ..services import multas_danios as multaDanioService
+from ..services import exportaciones as exportacion_service
 from ..services.exceptions import DomainNotFound, BusinessRuleError
 from ..models import MultaDanio, Alquiler
+from .paginacion import ParametrosPagina, responder_pagina
+from .exportacion import respuesta_exportacion
+from ..metricas.consultas import presupuesto_consultas
 
 router = APIRouter(
     prefix="/multas-danios",
@@ -15,30 +19,49 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[multaDanioSchema.MultaDanioOut])
+@router.get("/", response_model=List[multaDanioSchema.MultaDanioOut], dependencies=[Depends(presupuesto_consultas(4))])
 def listar_multas_danios(
+    response: Response,
     id_alquiler: Optional[int] = None,
     tipo: Optional[List[str]] = Query(None),
     monto_desde: Optional[float] = None,
     monto_hasta: Optional[float] = None,
     fecha_desde: Optional[datetime] = None,
     fecha_hasta: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    pagina: ParametrosPagina = Depends(),
+    db: Session = Depends(get_read_db)
 ):
     """Listar todas las multas y daños con filtros opcionales"""
-    return multaDanioService.listar_multas_danios(
-        db,
-        id_alquiler=id_alquiler,
-        tipo=tipo,
-        monto_desde=monto_desde,
-        monto_hasta=monto_hasta,
-        fecha_desde=fecha_desde,
-        fecha_hasta=fecha_hasta,
-    )
+    try:
+        items, cursor_siguiente = multaDanioService.listar_multas_danios(
+            db,
+            id_alquiler=id_alquiler,
+            tipo=tipo,
+            monto_desde=monto_desde,
+            monto_hasta=monto_hasta,
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            limit=pagina.limit,
+            cursor=pagina.cursor,
+            campos=pagina.campos,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return responder_pagina(response, items, cursor_siguiente, pagina)
+
+
+@router.get("/exportar")
+def exportar_multas_danios(
+    formato: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    desde: Optional[datetime] = Query(None, description="fecha_registro desde"),
+    hasta: Optional[datetime] = Query(None, description="fecha_registro hasta"),
+):
+    """Exportar multas y daños en NDJSON o CSV, en streaming"""
+    return respuesta_exportacion("multas_danios", exportacion_service.exportar_multas_danios, formato, desde=desde, hasta=hasta)
 
 
 @router.get("/alquiler/{id_alquiler}", response_model=List[multaDanioSchema.MultaDanioOut])
-def listar_multas_por_alquiler(id_alquiler: int, db: Session = Depends(get_db)):
+def listar_multas_por_alquiler(id_alquiler: int, db: Session = Depends(get_read_db)):
     """Listar multas y daños de un alquiler específico"""
     try:
         return multaDanioService.listar_multas_por_alquiler(db, id_alquiler)
@@ -0,0 +1,47 @@
+"""Utilidades compartidas por los routers de listados paginados por cursor."""
+from typing import List, Optional
+
+from fastapi import Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+class ParametrosPagina:
+    """Parámetros opcionales de paginación: sin `limit` ni `cursor` se lista todo."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=500, description="Cantidad máxima de filas por página"),
+        cursor: Optional[str] = Query(None, description=f"Cursor devuelto en la cabecera {CABECERA_CURSOR}"),
+        fields: Optional[str] = Query(None, description="Columnas a devolver, separadas por coma"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.campos: Optional[List[str]] = (
+            [c.strip() for c in fields.split(",") if c.strip()] if fields else None
+        )
+
+
+def responder_pagina(response: Response, items: list, cursor_siguiente: Optional[str], pagina: ParametrosPagina):
+    """Devuelve la página con el cursor siguiente en la cabecera `X-Next-Cursor`.
+
+    Con proyección (`fields`) las filas son dicts parciales, por lo que se
+    responden directamente sin pasar por el `response_model` del endpoint.
+    """
+    headers = {CABECERA_CURSOR: cursor_siguiente} if cursor_siguiente else {}
+    if pagina.campos:
+        return JSONResponse(content=jsonable_encoder(items), headers=headers)
+    response.headers.update(headers)
+    return items
+
+
+def responder_pagina_serializada(contenido: bytes, cursor_siguiente: Optional[str]) -> Response:
+    """Página ya serializada a JSON (p. ej. con `TypeAdapter.dump_json`).
+
+    Se devuelve tal cual: no pasa por `jsonable_encoder` ni por la validación
+    del `response_model`.
+    """
+    headers = {CABECERA_CURSOR: cursor_siguiente} if cursor_siguiente else {}
+    return Response(content=contenido, media_type="application/json", headers=headers)
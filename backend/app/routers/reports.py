@@ -1,36 +1,49 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.metricas.consultas import presupuesto_consultas
 from app.schemas.reports import (
     AlquileresPorClienteResponse,
     VehiculosMasAlquiladosResponse,
     AlquileresPorPeriodoResponse,
     FacturacionMensualResponse,
+    UtilizacionResponse,
 )
 from app.services import reports as svc
+from app.services.exceptions import BusinessRuleError
+from app.routers.paginacion import CABECERA_CURSOR
 
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
 
-@router.get("/alquileres-por-cliente", response_model=AlquileresPorClienteResponse)
+@router.get("/alquileres-por-cliente", response_model=AlquileresPorClienteResponse, dependencies=[Depends(presupuesto_consultas(3))])
 def alquileres_por_cliente(
+    response: Response,
     client_id: int = Query(..., description="ID del cliente"),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     desde: Optional[str] = Query(None, description="Fecha ISO desde (YYYY-MM-DD)"),
     hasta: Optional[str] = Query(None, description="Fecha ISO hasta (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"Cursor devuelto en la cabecera {CABECERA_CURSOR}; reemplaza a page"),
+    db: Session = Depends(get_read_db),
 ):
     d_dt = datetime.fromisoformat(desde) if desde else None
     h_dt = datetime.fromisoformat(hasta) if hasta else None
     if d_dt and h_dt and h_dt < d_dt:
         raise ValueError("La fecha fin no puede ser menor a la fecha inicio")
-    total, items = svc.get_alquileres_por_cliente(db, client_id=client_id, page=page, size=size, desde=d_dt, hasta=h_dt)
+    try:
+        total, items, cursor_siguiente = svc.get_alquileres_por_cliente(
+            db, client_id=client_id, page=page, size=size, desde=d_dt, hasta=h_dt, cursor=cursor
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor_siguiente:
+        response.headers[CABECERA_CURSOR] = cursor_siguiente
     return {
         "client_id": client_id,
         "desde": desde,
@@ -42,12 +55,12 @@ def alquileres_por_cliente(
     }
 
 
-@router.get("/vehiculos-mas-alquilados", response_model=VehiculosMasAlquiladosResponse)
+@router.get("/vehiculos-mas-alquilados", response_model=VehiculosMasAlquiladosResponse, dependencies=[Depends(presupuesto_consultas(4))])
 def vehiculos_mas_alquilados(
     limit: int = Query(10, ge=1, le=100),
     desde: Optional[str] = Query(None, description="Fecha ISO desde (YYYY-MM-DD)"),
     hasta: Optional[str] = Query(None, description="Fecha ISO hasta (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     d_dt = datetime.fromisoformat(desde) if desde else None
     h_dt = datetime.fromisoformat(hasta) if hasta else None
@@ -59,12 +72,12 @@ def vehiculos_mas_alquilados(
     }
 
 
-@router.get("/alquileres-por-periodo", response_model=AlquileresPorPeriodoResponse)
+@router.get("/alquileres-por-periodo", response_model=AlquileresPorPeriodoResponse, dependencies=[Depends(presupuesto_consultas(4))])
 def alquileres_por_periodo(
     periodo: str = Query("mes", regex="^(mes|trimestre)$"),
     desde: Optional[str] = Query(None, description="Fecha ISO desde (YYYY-MM-DD)"),
     hasta: Optional[str] = Query(None, description="Fecha ISO hasta (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     d_dt = datetime.fromisoformat(desde) if desde else None
     h_dt = datetime.fromisoformat(hasta) if hasta else None
@@ -77,13 +90,60 @@ def alquileres_por_periodo(
     }
 
 
-@router.get("/facturacion-mensual", response_model=FacturacionMensualResponse)
+@router.get("/facturacion-mensual", response_model=FacturacionMensualResponse, dependencies=[Depends(presupuesto_consultas(2))])
 def facturacion_mensual(
     anio: int = Query(..., ge=1900, le=2100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     items = svc.get_facturacion_mensual(db, anio=anio)
     return {
         "anio": anio,
         "items": items,
     }
+
+
+@router.get("/utilizacion", response_model=UtilizacionResponse, dependencies=[Depends(presupuesto_consultas(6))])
+def utilizacion(
+    desde: str = Query(..., description="Fecha ISO desde (YYYY-MM-DD)"),
+    hasta: str = Query(..., description="Fecha ISO hasta (YYYY-MM-DD), inclusive"),
+    id_categoria: Optional[int] = Query(None, description="Solo los vehículos de esta categoría"),
+    db: Session = Depends(get_read_db),
+):
+    """Días alquilados / días disponibles por vehículo y por categoría; los días en mantenimiento no cuentan como disponibles."""
+    d_dt = datetime.fromisoformat(desde)
+    h_dt = datetime.fromisoformat(hasta)
+    if h_dt < d_dt:
+        raise HTTPException(status_code=400, detail="La fecha fin no puede ser menor a la fecha inicio")
+    resultado = svc.get_utilizacion(db, desde=d_dt, hasta=h_dt, id_categoria=id_categoria)
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "id_categoria": id_categoria,
+        **resultado,
+    }
+
+
+@router.post("/resumen-mensual/reconstruir")
+def reconstruir_resumen_mensual(db: Session = Depends(get_db)):
+    """Recalcula desde cero el resumen mensual que usan los reportes por período."""
+    filas = svc.reconstruir_resumen_mensual(db)
+    return {
+        "success": True,
+        "filas": filas,
+    }
+
+
+@router.post("/ranking-vehiculos/reconstruir")
+def reconstruir_ranking_vehiculos(db: Session = Depends(get_db)):
+    """Recalcula desde cero el ranking mensual por vehículo que usa /vehiculos-mas-alquilados."""
+    filas = svc.reconstruir_ranking_vehiculos(db)
+    return {
+        "success": True,
+        "filas": filas,
+    }
+
+
+@router.get("/cache/metricas")
+def metricas_cache():
+    """Aciertos/fallos por reporte y estado del cache de reportes."""
+    return svc.get_metricas_cache()
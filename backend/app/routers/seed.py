@@ -16,8 +16,20 @@ from ..models import (
     Alquiler,
     MultaDanio,
     Mantenimiento,
+    ResumenMensualAlquiler,
+    OcupacionVehiculo,
+    OcupacionVehiculoMensual,
+    RankingVehiculoMensual,
 )
 from ..seed_extended import generate_extended_seed
+from ..services.alquileres import actualizar_estados_alquileres
+from ..services.cache_reportes import cache_reportes
+from ..services.catalogos import catalogo_vehiculos
+from ..services.indice_clientes import indice_clientes
+from ..services.resumen_mensual import reconstruir as reconstruir_resumen_mensual
+from ..services.ocupacion import reconstruir as reconstruir_ocupacion
+from ..services.totales_cliente import totales_cliente
+from ..services.ranking_vehiculos import ranking_vehiculos, reconstruir as reconstruir_ranking_vehiculos
 
 router = APIRouter(
     prefix="/seed",
@@ -28,6 +40,10 @@ router = APIRouter(
 def clear_all_data(db: Session):
     """Eliminar todos los datos de las tablas"""
     # Eliminar en orden inverso debido a las foreign keys
+    db.query(ResumenMensualAlquiler).delete()
+    db.query(OcupacionVehiculo).delete()
+    db.query(OcupacionVehiculoMensual).delete()
+    db.query(RankingVehiculoMensual).delete()
     db.query(MultaDanio).delete()
     db.query(Mantenimiento).delete()
     db.query(Alquiler).delete()
@@ -37,6 +53,11 @@ def clear_all_data(db: Session):
     db.query(Empleado).delete()
     db.query(Cliente).delete()
     db.commit()
+    cache_reportes.invalidar()
+    ranking_vehiculos.invalidar()
+    totales_cliente.invalidar()
+    catalogo_vehiculos.invalidar()
+    indice_clientes.invalidar()
 
 
 @router.post("/")
@@ -306,6 +327,17 @@ def seed_database(
             stats["alquileres"] = len(alquileres)
             stats["multas_danios"] = len(multas)
             stats["mantenimientos"] = len(mantenimientos)
+
+        # Los datos se insertan directamente: aplicar las transiciones de estado del día
+        actualizar_estados_alquileres(db, forzar=True)
+        # Los alquileres y multas se insertan sin pasar por los servicios
+        reconstruir_resumen_mensual(db)
+        reconstruir_ocupacion(db)
+        reconstruir_ranking_vehiculos(db)
+        cache_reportes.invalidar()
+        totales_cliente.invalidar()
+        catalogo_vehiculos.invalidar()
+        indice_clientes.invalidar()
         
         return {
             "message": f"Base de datos poblada exitosamente (modo {mode})",
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import date, datetime
 
-from ..database import get_db
+from ..database import get_db, get_read_db
+from ..metricas.consultas import presupuesto_consultas
 from ..schemas import vehiculos as vehiculoSchema
 from ..schemas.vehiculos import VehiculoDisponibilidadOut
 from ..services.exceptions import DomainNotFound, BusinessRuleError
 from ..schemas.vehiculos_disponibilidad import VehiculoDisponibilidadDetalleOut
 from ..services import vehiculos as vehiculoService
+from .paginacion import ParametrosPagina, responder_pagina
 
 
 router = APIRouter(prefix="/vehiculos", tags=["vehiculos"])
@@ -29,6 +31,7 @@ def crear_vehiculo(vehiculo_in: vehiculoSchema.VehiculoCreate, db: Session = Dep
 
 @router.get("/", response_model=List[vehiculoSchema.VehiculoOut])
 def listar_vehiculos(
+    response: Response,
     patente: Optional[str] = None,
     marca: Optional[str] = None,
     modelo: Optional[str] = None,
@@ -40,22 +43,85 @@ def listar_vehiculos(
     km_hasta: Optional[int] = None,
     fecha_ultimo_mantenimiento_desde: Optional[date] = None,
     fecha_ultimo_mantenimiento_hasta: Optional[date] = None,
-    db: Session = Depends(get_db),
+    q: Optional[str] = Query(None, description="Texto libre en todos los campos, ordenado por relevancia"),
+    pagina: ParametrosPagina = Depends(),
+    db: Session = Depends(get_read_db),
 ):
-    return vehiculoService.listar_vehiculos(
-        db,
-        patente,
-        marca,
-        modelo,
-        anio_desde,
-        anio_hasta,
-        categoria,
-        estado,
-        km_desde,
-        km_hasta,
-        fecha_ultimo_mantenimiento_desde,
-        fecha_ultimo_mantenimiento_hasta
-    )
+    try:
+        items, cursor_siguiente = vehiculoService.listar_vehiculos(
+            db,
+            patente,
+            marca,
+            modelo,
+            anio_desde,
+            anio_hasta,
+            categoria,
+            estado,
+            km_desde,
+            km_hasta,
+            fecha_ultimo_mantenimiento_desde,
+            fecha_ultimo_mantenimiento_hasta,
+            limit=pagina.limit,
+            cursor=pagina.cursor,
+            campos=pagina.campos,
+            q=q,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return responder_pagina(response, items, cursor_siguiente, pagina)
+
+
+@router.get("/disponibilidad", response_model=List[VehiculoDisponibilidadOut], dependencies=[Depends(presupuesto_consultas(2))])
+def listar_vehiculos_con_disponibilidad(db: Session = Depends(get_read_db)):
+    """
+    Devuelve toda la flota con su estado de disponibilidad para hoy.
+    """
+    try:
+        return vehiculoService.obtener_vehiculos_con_disponibilidad(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/libres", response_model=vehiculoSchema.VehiculosLibresResponse, dependencies=[Depends(presupuesto_consultas(3))])
+def buscar_vehiculos_libres(
+    id_categoria: int = Query(..., description="Categoría de vehículo buscada"),
+    fecha_inicio: date = Query(..., description="Inicio del período (YYYY-MM-DD)"),
+    fecha_fin: date = Query(..., description="Fin del período (YYYY-MM-DD)"),
+    marca: Optional[str] = None,
+    modelo: Optional[str] = None,
+    anio: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Busca vehículos de una categoría que estén libres (sin alquileres activos ni
+    mantenimientos) durante todo el período indicado.
+    """
+    try:
+        total, items = vehiculoService.buscar_vehiculos_libres(
+            db,
+            id_categoria=id_categoria,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            marca=marca,
+            modelo=modelo,
+            anio=anio,
+            page=page,
+            size=size,
+        )
+    except BusinessRuleError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "id_categoria": id_categoria,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "total": total,
+        "page": page,
+        "size": size,
+        "items": items,
+    }
+
 
 @router.get("/{vehiculo_id}", response_model=vehiculoSchema.VehiculoOut)
 def obtener_vehiculo(vehiculo_id: int, db: Session = Depends(get_db)):
@@ -92,7 +158,7 @@ def eliminar_vehiculo(vehiculo_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/disponibilidad/{vehiculo_id}", response_model=VehiculoDisponibilidadDetalleOut)
-def obtener_disponibilidad_vehiculo(vehiculo_id: int, db: Session = Depends(get_db)):
+def obtener_disponibilidad_vehiculo(vehiculo_id: int, db: Session = Depends(get_read_db)):
     """
     Obtiene el estado de disponibilidad de un vehículo específico junto con detalles de ocupación.
     """
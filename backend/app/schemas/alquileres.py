@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 from app.schemas.clientes import ClienteOut
@@ -86,6 +86,57 @@ class AlquilerOut(BaseModel):
         from_attributes = True
 
 
+class PersonaResumenOut(BaseModel):
+    nombre: str
+    apellido: str
+
+
+class VehiculoResumenOut(BaseModel):
+    patente: str
+    marca: str
+    modelo: str
+
+
+class AlquilerResumenOut(BaseModel):
+    """Fila de la grilla de alquileres (GET /alquileres/?vista=resumen)."""
+    id_alquiler: int
+    id_cliente: int
+    cliente: PersonaResumenOut
+    id_vehiculo: int
+    vehiculo: VehiculoResumenOut
+    id_empleado: int
+    empleado: PersonaResumenOut
+
+    fecha_inicio: date
+    fecha_fin: date
+
+    costo_base: Decimal
+    costo_total: Optional[Decimal] = None
+
+    estado: Optional[str] = None
+    km_inicial: Optional[int] = None
+
+
+class AlquilerLoteRequest(BaseModel):
+    modo: str = Field("todo_o_nada", pattern="^(todo_o_nada|parcial)$")
+    alquileres: List[AlquilerCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class AlquilerLoteResultado(BaseModel):
+    indice: int  # posición de la fila en el lote
+    ok: bool
+    id_alquiler: Optional[int] = None
+    error: Optional[str] = None
+
+
+class AlquilerLoteResponse(BaseModel):
+    modo: str
+    total: int
+    creados: int
+    rechazados: int
+    resultados: List[AlquilerLoteResultado]
+
+
 class CheckoutRequest(BaseModel):
     km_final: int
     id_empleado_finalizador: int  # Empleado que realiza el checkout
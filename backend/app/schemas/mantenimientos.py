@@ -50,3 +50,10 @@ class MantenimientoOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class LiberacionVehiculosOut(BaseModel):
+    actualizados: int
+    desde: Optional[date] = None  # marca de agua de la corrida anterior (None: primera corrida)
+    hasta: date
+    duracion_ms: float
@@ -33,4 +33,4 @@ class MultaDanioOut(MultaDanioBase):
     tipo: str  # multa, daño, retraso, otro
     descripcion: Optional[str] = None
     monto: Decimal
-    fecha_registro: datetime
+    fecha_registro: Optional[datetime] = None  # la edición permite dejarla en NULL
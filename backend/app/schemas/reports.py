@@ -60,3 +60,36 @@ class FacturacionMensualItem(BaseModel):
 class FacturacionMensualResponse(BaseModel):
     anio: int
     items: List[FacturacionMensualItem]
+
+
+class UtilizacionItem(BaseModel):
+    dias_alquilados: int
+    dias_mantenimiento: int
+    dias_disponibles: int  # días de la ventana sin mantenimiento
+    utilizacion: Optional[float] = None  # dias_alquilados / dias_disponibles
+
+
+class UtilizacionVehiculoItem(UtilizacionItem):
+    id_vehiculo: int
+    patente: Optional[str] = None
+    id_categoria: Optional[int] = None
+
+
+class UtilizacionCategoriaItem(UtilizacionItem):
+    id_categoria: Optional[int] = None
+    categoria: Optional[str] = None
+    vehiculos: int
+
+
+class UtilizacionTotal(UtilizacionItem):
+    vehiculos: int
+
+
+class UtilizacionResponse(BaseModel):
+    desde: str
+    hasta: str
+    id_categoria: Optional[int] = None
+    dias_ventana: int
+    total: UtilizacionTotal
+    por_categoria: List[UtilizacionCategoriaItem]
+    por_vehiculo: List[UtilizacionVehiculoItem]
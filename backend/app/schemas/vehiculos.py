@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 from app.schemas.categorias_vehiculo import CategoriaVehiculoOut
 from app.schemas.estados_vehiculo import EstadoVehiculoOut
@@ -125,3 +125,13 @@ class VehiculoDisponibilidadOut(BaseModel):
     vehiculo: VehiculoOut
     estado_disponibilidad: str
     ocupacion_detalle: Optional[str] = None
+
+
+class VehiculosLibresResponse(BaseModel):
+    id_categoria: int
+    fecha_inicio: date
+    fecha_fin: date
+    total: int
+    page: int
+    size: int
+    items: List[VehiculoOut]
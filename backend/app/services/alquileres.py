@@ -1,10 +1,27 @@
-from sqlalchemy import or_
+from fastapi import HTTPException
+from sqlalchemy import insert, or_, select, text, update
 from datetime import date, datetime
+from threading import Lock
 from sqlalchemy.orm import Session
 
-from ..models import Alquiler, Cliente, Vehiculo, Empleado, Mantenimiento, EstadoVehiculo, MultaDanio
+from ..models import Alquiler, Cliente, Vehiculo, Empleado, Mantenimiento, MultaDanio
 from ..schemas import alquileres as alquilerSchema
 from .exceptions import DomainNotFound, BusinessRuleError
+from . import ocupacion, ranking_vehiculos
+from .indice_disponibilidad import ESTADOS_ALQUILER_BLOQUEANTES, cargar_periodos_vehiculos, reservas_vehiculos
+from .cache_reportes import cache_reportes
+from .totales_cliente import totales_cliente
+from .catalogos import catalogo_vehiculos
+from .paginacion import paginar
+from .carga import CARGA_ALQUILER
+from ..metricas.registro import medir
+from . import resumen_mensual
+
+
+# Última fecha en la que se aplicaron las transiciones de estado (por proceso).
+# Mientras no cambie el día, actualizar_estados_alquileres no vuelve a tocar la DB.
+_ultima_transicion: date | None = None
+_transicion_lock = Lock()
 
 
 def validar_referencias(
@@ -23,6 +40,7 @@ def validar_referencias(
         raise HTTPException(status_code=400, detail="Empleado no encontrado")
 
 
+@medir
 def validar_disponibilidad_vehiculo(
     db: Session,
     id_vehiculo: int,
@@ -34,6 +52,9 @@ def validar_disponibilidad_vehiculo(
     Valida que el vehículo esté disponible en el período solicitado.
     Verifica conflictos con otros alquileres activos (PENDIENTE, EN_CURSO, CHECKOUT).
     Verifica si el vehículo está en mantenimiento.
+
+    Los períodos bloqueantes se consultan en el calendario de ocupación
+    (`ocupacion`): una búsqueda de rango sobre (id_vehiculo, dia).
     
     Args:
         db: Sesión de base de datos
@@ -43,53 +64,36 @@ def validar_disponibilidad_vehiculo(
         id_alquiler_actual: ID del alquiler que se está editando (para excluirlo)
     
     Raises:
-        HTTPException: Si el vehículo no está disponible
+        BusinessRuleError: Si el vehículo no está disponible
     """
-    
-    # Verificar si el vehículo estará en mantenimiento durante el período solicitado (solapamiento de rangos)
-    # Solapa si: mant.inicio <= nuevo_fin AND (mant.fin IS NULL OR mant.fin >= nuevo_inicio)
-    mantenimientos_conflictivos = db.query(Mantenimiento).filter(
-        Mantenimiento.id_vehiculo == id_vehiculo,
-        Mantenimiento.fecha_inicio <= fecha_fin,
-        ((Mantenimiento.fecha_fin.is_(None)) | (Mantenimiento.fecha_fin >= fecha_inicio))
-    ).all()
+    conflictos = ocupacion.conflictos(
+        db,
+        id_vehiculo,
+        fecha_inicio,
+        fecha_fin,
+        id_alquiler_excluido=id_alquiler_actual,
+    )
+    error = mensaje_conflictos(conflictos)
+    if error:
+        raise BusinessRuleError(error)
 
+
+def mensaje_conflictos(conflictos) -> str | None:
+    """Mensaje de error para una lista de períodos bloqueantes (None si no hay conflictos)."""
+    mantenimientos_conflictivos = [p for p in conflictos if p.tipo == "mantenimiento"]
     if mantenimientos_conflictivos:
         detalles = []
         for m in mantenimientos_conflictivos:
             detalles.append(
-                f"{(m.tipo or 'Mantenimiento')} del {m.fecha_inicio} al {m.fecha_fin if m.fecha_fin else 'sin fin'}"
+                f"{(m.detalle or 'Mantenimiento')} del {m.fecha_inicio} al {m.fecha_fin if m.fecha_fin else 'sin fin'}"
             )
-        raise HTTPException(
-            status_code=400,
-            detail=f"El vehículo está en mantenimiento durante el período solicitado. {', '.join(detalles)}"
-        )
-    
-    # Verificar conflictos con otros ALQUILERES activos (PENDIENTE, EN_CURSO, CHECKOUT)
-    query_alquileres = db.query(Alquiler).filter(
-        Alquiler.id_vehiculo == id_vehiculo,
-        Alquiler.estado.in_(["PENDIENTE", "EN_CURSO", "CHECKOUT"]),  # Estados que bloquean el vehículo
-        # Condición de solapamiento de fechas:
-        # (nuevo_inicio <= existente_fin) AND (nuevo_fin >= existente_inicio)
-        Alquiler.fecha_inicio <= fecha_fin,
-        Alquiler.fecha_fin >= fecha_inicio
-    )
-    
-    # Si estamos editando un alquiler, excluirlo de la búsqueda
-    if id_alquiler_actual:
-        query_alquileres = query_alquileres.filter(
-            Alquiler.id_alquiler != id_alquiler_actual
-        )
-    
-    alquileres_conflictivos = query_alquileres.all()
-    
-    # Reportar conflictos si existen
+        return f"El vehículo está en mantenimiento durante el período solicitado. {', '.join(detalles)}"
+
+    alquileres_conflictivos = [p for p in conflictos if p.tipo == "alquiler"]
     if alquileres_conflictivos:
         fechas = [f"{a.fecha_inicio} a {a.fecha_fin}" for a in alquileres_conflictivos]
-        raise HTTPException(
-            status_code=400,
-            detail=f"El vehículo no está disponible en el período solicitado. Conflicto con {len(alquileres_conflictivos)} alquiler(es): {', '.join(fechas)}"
-        )
+        return f"El vehículo no está disponible en el período solicitado. Conflicto con {len(alquileres_conflictivos)} alquiler(es): {', '.join(fechas)}"
+    return None
 
 
 def listar_alquileres(
@@ -103,10 +107,33 @@ def listar_alquileres(
     fecha_fin_desde=None,
     fecha_fin_hasta=None,
     periodo_estado=None,
+    limit=None,
+    cursor=None,
+    campos=None,
+    vista="completa",
 ):
-    actualizar_estados_alquileres(db)
+    """Alquileres filtrados, del más reciente al más antiguo.
 
-    q = db.query(Alquiler)
+    - vista "completa": objetos ORM con cliente, vehículo y empleados cargados
+      según CARGA_ALQUILER (para `AlquilerOut`).
+    - vista "resumen": solo las columnas de la grilla en una consulta con joins;
+      las filas se convierten a `AlquilerResumenOut` con `model_construct`, sin
+      hidratar objetos ORM ni validar.
+    """
+    resumen = vista == "resumen"
+    if resumen and campos:
+        raise BusinessRuleError("La vista resumen no admite fields")
+
+    if resumen:
+        q = (
+            db.query(*_COLUMNAS_RESUMEN)
+            .select_from(Alquiler)
+            .join(Alquiler.cliente)
+            .join(Alquiler.vehiculo)
+            .join(Alquiler.empleado)
+        )
+    else:
+        q = db.query(Alquiler)
 
     if estado:
         q = q.filter(Alquiler.estado.in_(estado))
@@ -126,9 +153,58 @@ def listar_alquileres(
     if fecha_fin_hasta:
         q = q.filter(Alquiler.fecha_fin <= fecha_fin_hasta)
 
-    # Orden por defecto: fecha_inicio desc
-    q = q.order_by(Alquiler.fecha_inicio.desc())
-    return q.all()
+    # Orden por defecto: fecha_inicio desc (id_alquiler desempata para el cursor)
+    orden = [(Alquiler.fecha_inicio, True), (Alquiler.id_alquiler, True)]
+    if resumen:
+        filas, siguiente = paginar(q, Alquiler, orden, limit=limit, cursor=cursor)
+        return [_a_resumen(fila) for fila in filas], siguiente
+    return paginar(q, Alquiler, orden, limit=limit, cursor=cursor, campos=campos, opciones=CARGA_ALQUILER)
+
+
+_COLUMNAS_RESUMEN = (
+    Alquiler.id_alquiler,
+    Alquiler.id_cliente,
+    Cliente.nombre.label("cliente_nombre"),
+    Cliente.apellido.label("cliente_apellido"),
+    Alquiler.id_vehiculo,
+    Vehiculo.patente,
+    Vehiculo.marca,
+    Vehiculo.modelo,
+    Alquiler.id_empleado,
+    Empleado.nombre.label("empleado_nombre"),
+    Empleado.apellido.label("empleado_apellido"),
+    Alquiler.fecha_inicio,
+    Alquiler.fecha_fin,
+    Alquiler.costo_base,
+    Alquiler.costo_total,
+    Alquiler.estado,
+    Alquiler.km_inicial,
+)
+
+
+def _a_resumen(fila) -> alquilerSchema.AlquilerResumenOut:
+    # Los valores vienen tipados de la DB: model_construct evita validarlos de nuevo
+    return alquilerSchema.AlquilerResumenOut.model_construct(
+        id_alquiler=fila.id_alquiler,
+        id_cliente=fila.id_cliente,
+        cliente=alquilerSchema.PersonaResumenOut.model_construct(
+            nombre=fila.cliente_nombre, apellido=fila.cliente_apellido
+        ),
+        id_vehiculo=fila.id_vehiculo,
+        vehiculo=alquilerSchema.VehiculoResumenOut.model_construct(
+            patente=fila.patente, marca=fila.marca, modelo=fila.modelo
+        ),
+        id_empleado=fila.id_empleado,
+        empleado=alquilerSchema.PersonaResumenOut.model_construct(
+            nombre=fila.empleado_nombre, apellido=fila.empleado_apellido
+        ),
+        fecha_inicio=fila.fecha_inicio,
+        fecha_fin=fila.fecha_fin,
+        costo_base=fila.costo_base,
+        costo_total=fila.costo_total,
+        estado=fila.estado,
+        km_inicial=fila.km_inicial,
+    )
 
 
 def get_alquiler(db: Session, id_alquiler: int) -> Alquiler:
@@ -138,114 +214,362 @@ def get_alquiler(db: Session, id_alquiler: int) -> Alquiler:
     return alquiler
 
 
+@medir
 def create_alquiler(db: Session, alquiler_in) -> Alquiler:
-    validar_referencias(
-        db,
-        alquiler_in.id_cliente,
-        alquiler_in.id_vehiculo,
-        alquiler_in.id_empleado,
-    )
+    # Verificar y guardar con el vehículo reservado (lock en proceso + FOR UPDATE)
+    # para que dos altas concurrentes del mismo vehículo no pasen ambas la validación
+    with reservas_vehiculos.reservar(db, alquiler_in.id_vehiculo):
+        validar_referencias(
+            db,
+            alquiler_in.id_cliente,
+            alquiler_in.id_vehiculo,
+            alquiler_in.id_empleado,
+        )
 
-    validar_disponibilidad_vehiculo(
-        db,
-        alquiler_in.id_vehiculo,
-        alquiler_in.fecha_inicio,
-        alquiler_in.fecha_fin,
-    )
+        validar_disponibilidad_vehiculo(
+            db,
+            alquiler_in.id_vehiculo,
+            alquiler_in.fecha_inicio,
+            alquiler_in.fecha_fin,
+        )
 
-    nuevo_alquiler = Alquiler(
-        id_cliente=alquiler_in.id_cliente,
-        id_vehiculo=alquiler_in.id_vehiculo,
-        id_empleado=alquiler_in.id_empleado,
-        fecha_inicio=alquiler_in.fecha_inicio,
-        fecha_fin=alquiler_in.fecha_fin,
-        estado=alquiler_in.estado,
-        costo_base=alquiler_in.costo_base,
-        costo_total=alquiler_in.costo_base,  # Inicialmente igual al costo_base
-        observaciones=alquiler_in.observaciones,
-    )
+        nuevo_alquiler = Alquiler(
+            id_cliente=alquiler_in.id_cliente,
+            id_vehiculo=alquiler_in.id_vehiculo,
+            id_empleado=alquiler_in.id_empleado,
+            fecha_inicio=alquiler_in.fecha_inicio,
+            fecha_fin=alquiler_in.fecha_fin,
+            estado=alquiler_in.estado,
+            costo_base=alquiler_in.costo_base,
+            costo_total=alquiler_in.costo_base,  # Inicialmente igual al costo_base
+            observaciones=alquiler_in.observaciones,
+        )
+        aplicar_transicion_estado(nuevo_alquiler, date.today())
+
+        db.add(nuevo_alquiler)
+        db.flush()
+        resumen_mensual.registrar_cambio(db, None, resumen_mensual.contribucion_alquiler(db, nuevo_alquiler))
+        ranking_vehiculos.registrar_cambio(db, None, ranking_vehiculos.clave_alquiler(nuevo_alquiler))
+        ocupacion.registrar_alquileres(db, nuevo_alquiler)
+        db.commit()
+        cache_reportes.invalidar("alquileres")
+        totales_cliente.invalidar(nuevo_alquiler.id_cliente)
 
-    db.add(nuevo_alquiler)
-    db.commit()
     db.refresh(nuevo_alquiler)
     return nuevo_alquiler
 
 
-def update_alquiler(db: Session, id_alquiler: int, alquiler_in) -> Alquiler:
-    alquiler = get_alquiler(db, id_alquiler)
+@medir
+def crear_alquileres_lote(db: Session, alquileres_in: list, modo: str = "todo_o_nada") -> dict:
+    """
+    Alta de varios alquileres en una sola transacción.
 
-    # Validar referencias si se están actualizando
-    if alquiler_in.id_cliente is not None:
-        if not db.query(Cliente).filter(Cliente.id_cliente == alquiler_in.id_cliente).first():
-            raise HTTPException(status_code=400, detail="Cliente no encontrado")
-        alquiler.id_cliente = alquiler_in.id_cliente
+    - Referencias (clientes, vehículos, empleados): una consulta IN por tabla.
+    - Disponibilidad: una consulta de intervalos para todos los vehículos del lote.
+    - Solapamientos dentro del lote: en memoria, en el orden de las filas.
+    - Inserción: un único INSERT con todas las filas.
 
-    if alquiler_in.id_vehiculo is not None:
-        if not db.query(Vehiculo).filter(Vehiculo.id_vehiculo == alquiler_in.id_vehiculo).first():
-            raise HTTPException(status_code=400, detail="Vehículo no encontrado")
-        alquiler.id_vehiculo = alquiler_in.id_vehiculo
+    Modos:
+    - "todo_o_nada": si alguna fila es inválida no se inserta ninguna.
+    - "parcial": se insertan las filas válidas y se informan las rechazadas.
 
-    if alquiler_in.id_empleado is not None:
-        if not db.query(Empleado).filter(Empleado.id_empleado == alquiler_in.id_empleado).first():
-            raise HTTPException(status_code=400, detail="Empleado no encontrado")
-        alquiler.id_empleado = alquiler_in.id_empleado
+    Retorna un dict con el resultado por fila (mismo orden que `alquileres_in`).
+    """
+    resultados = [{"indice": i, "ok": False, "id_alquiler": None, "error": None} for i in range(len(alquileres_in))]
+    if not alquileres_in:
+        return _resumen_lote(modo, resultados)
 
-    # Validar disponibilidad si se están actualizando fechas o vehículo
-    nueva_fecha_inicio = alquiler_in.fecha_inicio if alquiler_in.fecha_inicio is not None else alquiler.fecha_inicio
-    nueva_fecha_fin = alquiler_in.fecha_fin if alquiler_in.fecha_fin is not None else alquiler.fecha_fin
-    nuevo_id_vehiculo = alquiler_in.id_vehiculo if alquiler_in.id_vehiculo is not None else alquiler.id_vehiculo
+    ids_cliente = {a.id_cliente for a in alquileres_in}
+    ids_vehiculo = {a.id_vehiculo for a in alquileres_in}
+    ids_empleado = {a.id_empleado for a in alquileres_in}
 
-    validar_disponibilidad_vehiculo(
-        db,
-        nuevo_id_vehiculo,
-        nueva_fecha_inicio,
-        nueva_fecha_fin,
-        id_alquiler_actual=id_alquiler
-    )
+    hoy = date.today()
+    # Reservar los vehículos (en orden, para que dos lotes concurrentes no se crucen)
+    # antes de cualquier otra lectura de la transacción
+    with reservas_vehiculos.reservar(db, *ids_vehiculo):
+        clientes = {c for (c,) in db.query(Cliente.id_cliente).filter(Cliente.id_cliente.in_(ids_cliente))}
+        categorias = dict(
+            db.query(Vehiculo.id_vehiculo, Vehiculo.id_categoria).filter(Vehiculo.id_vehiculo.in_(ids_vehiculo))
+        )
+        empleados = {e for (e,) in db.query(Empleado.id_empleado).filter(Empleado.id_empleado.in_(ids_empleado))}
+
+        ocupados = cargar_periodos_vehiculos(
+            db,
+            categorias.keys(),
+            min(a.fecha_inicio for a in alquileres_in),
+            max(a.fecha_fin for a in alquileres_in),
+        )
+        # Filas ya aceptadas del lote que bloquean al vehículo: (indice, inicio, fin)
+        aceptados_por_vehiculo: dict[int, list] = {}
+        filas = []
+
+        for i, alquiler_in in enumerate(alquileres_in):
+            if alquiler_in.id_cliente not in clientes:
+                resultados[i]["error"] = "Cliente no encontrado"
+                continue
+            if alquiler_in.id_vehiculo not in categorias:
+                resultados[i]["error"] = "Vehículo no encontrado"
+                continue
+            if alquiler_in.id_empleado not in empleados:
+                resultados[i]["error"] = "Empleado no encontrado"
+                continue
+
+            error = mensaje_conflictos(
+                ocupados[alquiler_in.id_vehiculo].solapados(alquiler_in.fecha_inicio, alquiler_in.fecha_fin)
+            )
+            if error:
+                resultados[i]["error"] = error
+                continue
+
+            aceptados = aceptados_por_vehiculo.setdefault(alquiler_in.id_vehiculo, [])
+            solapada = next(
+                (j for j, ini, fin in aceptados if ini <= alquiler_in.fecha_fin and fin >= alquiler_in.fecha_inicio),
+                None,
+            )
+            if solapada is not None:
+                resultados[i]["error"] = f"El período se solapa con la fila {solapada} del lote para el mismo vehículo"
+                continue
+
+            nuevo = Alquiler(
+                id_cliente=alquiler_in.id_cliente,
+                id_vehiculo=alquiler_in.id_vehiculo,
+                id_empleado=alquiler_in.id_empleado,
+                fecha_inicio=alquiler_in.fecha_inicio,
+                fecha_fin=alquiler_in.fecha_fin,
+                estado=alquiler_in.estado,
+                costo_base=alquiler_in.costo_base,
+                costo_total=alquiler_in.costo_base,  # Inicialmente igual al costo_base
+                observaciones=alquiler_in.observaciones,
+            )
+            aplicar_transicion_estado(nuevo, hoy)
+            if nuevo.estado in ESTADOS_ALQUILER_BLOQUEANTES:
+                aceptados.append((i, nuevo.fecha_inicio, nuevo.fecha_fin))
+            resultados[i]["ok"] = True
+            filas.append((i, nuevo))
+
+        hay_errores = any(not r["ok"] for r in resultados)
+        if not filas or (hay_errores and modo == "todo_o_nada"):
+            for r in resultados:
+                if r["ok"]:
+                    r["ok"] = False
+                    r["error"] = "No se insertó: el lote tiene filas inválidas (modo todo_o_nada)"
+            return _resumen_lote(modo, resultados)
+
+        ids = _insertar_alquileres(db, [nuevo for _, nuevo in filas])
+        resumen_mensual.registrar_altas(db, [
+            resumen_mensual.contribucion(
+                nuevo.fecha_inicio, categorias[nuevo.id_vehiculo], nuevo.estado, nuevo.costo_base, nuevo.costo_total
+            )
+            for _, nuevo in filas
+        ])
+        ranking_vehiculos.registrar_altas(db, [ranking_vehiculos.clave_alquiler(nuevo) for _, nuevo in filas])
+        for (_, nuevo), id_alquiler in zip(filas, ids):
+            nuevo.id_alquiler = id_alquiler
+        ocupacion.registrar_alquileres(db, *[nuevo for _, nuevo in filas])
+        db.commit()
+        cache_reportes.invalidar("alquileres")
+        totales_cliente.invalidar(*[nuevo.id_cliente for _, nuevo in filas])
+
+    for (i, _), id_alquiler in zip(filas, ids):
+        resultados[i]["id_alquiler"] = id_alquiler
+    return _resumen_lote(modo, resultados)
+
+
+def _insertar_alquileres(db: Session, alquileres: list) -> list:
+    """Inserta todas las filas en un solo statement y devuelve los IDs en el orden de `alquileres`."""
+    columnas = ["id_cliente", "id_vehiculo", "id_empleado", "fecha_inicio", "fecha_fin",
+                "estado", "costo_base", "costo_total", "observaciones"]
+    valores = [{c: getattr(a, c) for c in columnas} for a in alquileres]
+    dialecto = db.get_bind().dialect
+
+    if dialecto.name in ("mysql", "sqlite"):
+        # Un INSERT con todas las filas en VALUES; los IDs salen de lastrowid. En MySQL es
+        # LAST_INSERT_ID(), el de la primera fila: InnoDB reserva de una vez los IDs de un
+        # insert con cantidad de filas conocida, consecutivos con el paso de
+        # auto_increment_increment. En SQLite es el de la última, y el lock de escritura
+        # hace que las filas del statement tengan rowids consecutivos.
+        # (RETURNING con sort_by_parameter_order en SQLite se degrada a un INSERT por fila.)
+        resultado = db.execute(insert(Alquiler).values(valores))
+        if dialecto.name == "mysql":
+            primero, paso = resultado.lastrowid, db.scalar(text("SELECT @@auto_increment_increment"))
+        else:
+            primero, paso = resultado.lastrowid - len(valores) + 1, 1
+        return [primero + i * paso for i in range(len(valores))]
+
+    if dialecto.insert_executemany_returning:
+        # RETURNING por sí solo no garantiza el orden de las filas: sort_by_parameter_order
+        # las devuelve en el orden de `valores`. No se asocian por los valores insertados,
+        # porque la DB los normaliza (p. ej. redondea costo_base a la escala de la columna)
+        resultado = db.execute(
+            insert(Alquiler).returning(Alquiler.id_alquiler, sort_by_parameter_order=True),
+            valores,
+        )
+        return list(resultado.scalars())
 
-    # Actualizar campos
-    for field, value in alquiler_in.model_dump(exclude_unset=True).items():
-        setattr(alquiler, field, value)
+    # Otros motores sin RETURNING: el ORM inserta por fila para conocer cada ID,
+    # dentro de la misma transacción
+    db.add_all(alquileres)
+    db.flush()
+    return [a.id_alquiler for a in alquileres]
+
+
+def _resumen_lote(modo: str, resultados: list) -> dict:
+    creados = sum(1 for r in resultados if r["ok"])
+    return {
+        "modo": modo,
+        "total": len(resultados),
+        "creados": creados,
+        "rechazados": len(resultados) - creados,
+        "resultados": resultados,
+    }
+
+
+def update_alquiler(db: Session, id_alquiler: int, alquiler_in) -> Alquiler:
+    # Vehículo actual del alquiler, leído en una transacción aparte: la reserva
+    # tiene que ser la primera consulta de la transacción que escribe
+    id_vehiculo_anterior = db.scalar(select(Alquiler.id_vehiculo).where(Alquiler.id_alquiler == id_alquiler))
+    if id_vehiculo_anterior is None:
+        raise DomainNotFound(f"Alquiler con id {id_alquiler} no encontrado")
+    db.rollback()
+    nuevo_id_vehiculo = alquiler_in.id_vehiculo if alquiler_in.id_vehiculo is not None else id_vehiculo_anterior
+
+    with reservas_vehiculos.reservar(db, id_vehiculo_anterior, nuevo_id_vehiculo):
+        alquiler = get_alquiler(db, id_alquiler)
+        if alquiler.id_vehiculo != id_vehiculo_anterior:
+            raise BusinessRuleError("El alquiler fue modificado por otra operación, reintentar")
+        contribucion_anterior = resumen_mensual.contribucion_alquiler(db, alquiler)
+        clave_ranking_anterior = ranking_vehiculos.clave_alquiler(alquiler)
+        id_cliente_anterior = alquiler.id_cliente
+
+        # Validar referencias si se están actualizando
+        if alquiler_in.id_cliente is not None:
+            if not db.query(Cliente).filter(Cliente.id_cliente == alquiler_in.id_cliente).first():
+                raise HTTPException(status_code=400, detail="Cliente no encontrado")
+            alquiler.id_cliente = alquiler_in.id_cliente
+
+        if alquiler_in.id_vehiculo is not None:
+            if not db.query(Vehiculo).filter(Vehiculo.id_vehiculo == alquiler_in.id_vehiculo).first():
+                raise HTTPException(status_code=400, detail="Vehículo no encontrado")
+            alquiler.id_vehiculo = alquiler_in.id_vehiculo
+
+        if alquiler_in.id_empleado is not None:
+            if not db.query(Empleado).filter(Empleado.id_empleado == alquiler_in.id_empleado).first():
+                raise HTTPException(status_code=400, detail="Empleado no encontrado")
+            alquiler.id_empleado = alquiler_in.id_empleado
+
+        # Validar disponibilidad si se están actualizando fechas o vehículo
+        nueva_fecha_inicio = alquiler_in.fecha_inicio if alquiler_in.fecha_inicio is not None else alquiler.fecha_inicio
+        nueva_fecha_fin = alquiler_in.fecha_fin if alquiler_in.fecha_fin is not None else alquiler.fecha_fin
+
+        validar_disponibilidad_vehiculo(
+            db,
+            nuevo_id_vehiculo,
+            nueva_fecha_inicio,
+            nueva_fecha_fin,
+            id_alquiler_actual=id_alquiler
+        )
+
+        # Actualizar campos
+        for field, value in alquiler_in.model_dump(exclude_unset=True).items():
+            setattr(alquiler, field, value)
+        aplicar_transicion_estado(alquiler, date.today())
+
+        db.flush()
+        resumen_mensual.registrar_cambio(
+            db, contribucion_anterior, resumen_mensual.contribucion_alquiler(db, alquiler)
+        )
+        ranking_vehiculos.registrar_cambio(db, clave_ranking_anterior, ranking_vehiculos.clave_alquiler(alquiler))
+        ocupacion.registrar_alquileres(db, alquiler)
+        db.commit()
+        cache_reportes.invalidar("alquileres")
+        totales_cliente.invalidar(id_cliente_anterior, alquiler.id_cliente)
 
-    db.commit()
     db.refresh(alquiler)
     return alquiler
 
 
 def eliminar_alquiler(db: Session, id_alquiler: int) -> None:
     alquiler = get_alquiler(db, id_alquiler)
+    resumen_mensual.registrar_cambio(db, resumen_mensual.contribucion_alquiler(db, alquiler), None)
+    ranking_vehiculos.registrar_cambio(db, ranking_vehiculos.clave_alquiler(alquiler), None)
     db.delete(alquiler)
     # eliminar multas asociadas al alquiler
     multas = db.query(MultaDanio).filter(MultaDanio.id_alquiler == id_alquiler).all()
     for multa in multas:
         db.delete(multa)
+    id_cliente = alquiler.id_cliente
+    ocupacion.quitar(db, ocupacion.ALQUILER, id_alquiler)
 
     db.commit()
+    cache_reportes.invalidar("alquileres", "multas")
+    totales_cliente.invalidar(id_cliente)
 
 
-def actualizar_estados_alquileres(db: Session) -> int:
-    """Actualiza los estados de los alquileres según la fecha actual.
-    Retorna la cantidad de alquileres actualizados.
+def aplicar_transicion_estado(alquiler: Alquiler, hoy: date) -> None:
+    """Aplica a un alquiler puntual las mismas reglas que actualizar_estados_alquileres.
+
+    Se usa en altas y ediciones para que un alquiler escrito después de la
+    transición diaria quede en el estado correcto sin esperar a la próxima.
     """
-    hoy = date.today()
-    alquileres = db.query(Alquiler).all()
-    actualizados = 0
+    if alquiler.estado == "PENDIENTE" and alquiler.fecha_inicio <= hoy:
+        alquiler.estado = "EN_CURSO"
+    if alquiler.estado == "EN_CURSO" and alquiler.fecha_fin < hoy:
+        alquiler.estado = "CHECKOUT"
 
-    for alquiler in alquileres:
-        estado_original = alquiler.estado
 
-        if alquiler.estado == "PENDIENTE" and alquiler.fecha_inicio <= hoy:
-            alquiler.estado = "EN_CURSO"
-        elif alquiler.estado == "EN_CURSO" and alquiler.fecha_fin < hoy:
-            alquiler.estado = "CHECKOUT"
+def actualizar_estados_alquileres(db: Session, forzar: bool = False) -> int:
+    """Actualiza los estados de los alquileres según la fecha actual.
 
-        if alquiler.estado != estado_original:
-            actualizados += 1
+    - De PENDIENTE a EN_CURSO si la fecha de inicio es hoy o anterior.
+    - De EN_CURSO a CHECKOUT si la fecha de fin es anterior a hoy.
 
-    db.commit()
-    return actualizados
+    Las transiciones se hacen con UPDATEs por conjunto que aprovechan los índices
+    (estado, fecha_inicio) y (estado, fecha_fin), sin cargar filas en memoria.
+    Antes de cada UPDATE se mueven los aportes al resumen mensual con una
+    consulta agrupada y se actualiza el calendario de ocupación, en la misma
+    transacción.
+    Si ya se ejecutó hoy no hace nada, salvo que se pida `forzar`.
+    Retorna la cantidad de filas actualizadas.
+    """
+    global _ultima_transicion
+
+    hoy = date.today()
+    with _transicion_lock:
+        if not forzar and _ultima_transicion == hoy:
+            return 0
+
+        resumen_mensual.registrar_transicion(
+            db, "EN_CURSO", Alquiler.estado == "PENDIENTE", Alquiler.fecha_inicio <= hoy
+        )
+        ocupacion.registrar_transicion(
+            db, "EN_CURSO", Alquiler.estado == "PENDIENTE", Alquiler.fecha_inicio <= hoy
+        )
+        en_curso = db.execute(
+            update(Alquiler)
+            .where(Alquiler.estado == "PENDIENTE", Alquiler.fecha_inicio <= hoy)
+            .values(estado="EN_CURSO")
+            .execution_options(synchronize_session=False)
+        )
+        resumen_mensual.registrar_transicion(
+            db, "CHECKOUT", Alquiler.estado == "EN_CURSO", Alquiler.fecha_fin < hoy
+        )
+        ocupacion.registrar_transicion(
+            db, "CHECKOUT", Alquiler.estado == "EN_CURSO", Alquiler.fecha_fin < hoy
+        )
+        checkout = db.execute(
+            update(Alquiler)
+            .where(Alquiler.estado == "EN_CURSO", Alquiler.fecha_fin < hoy)
+            .values(estado="CHECKOUT")
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        cache_reportes.invalidar("alquileres")
 
+        _ultima_transicion = hoy
+        return en_curso.rowcount + checkout.rowcount
 
+
+@medir
 def realizar_checkout(db: Session, id_alquiler: int, checkout_data) -> Alquiler:
     """
     Realiza el checkout de un alquiler:
@@ -318,6 +642,7 @@ def realizar_checkout(db: Session, id_alquiler: int, checkout_data) -> Alquiler:
         )
     
     # 6. Actualizar el alquiler
+    contribucion_anterior = resumen_mensual.contribucion_alquiler(db, alquiler)
     alquiler.km_final = checkout_data.km_final
     # Al completar el proceso de devolución, el alquiler queda FINALIZADO
     alquiler.estado = "FINALIZADO"
@@ -361,9 +686,7 @@ def realizar_checkout(db: Session, id_alquiler: int, checkout_data) -> Alquiler:
     
     if requiere_mantenimiento:
         # Cambiar estado a Mantenimiento
-        estado_mant = db.query(EstadoVehiculo).filter(
-            EstadoVehiculo.nombre == "Mantenimiento"
-        ).first()
+        estado_mant = catalogo_vehiculos.estado_por_nombre(db, "Mantenimiento")
         
         if estado_mant:
             vehiculo.id_estado = estado_mant.id_estado
@@ -382,18 +705,22 @@ def realizar_checkout(db: Session, id_alquiler: int, checkout_data) -> Alquiler:
             db.add(nuevo_mantenimiento)
             db.flush()  # Para obtener el ID
             mantenimiento_id = nuevo_mantenimiento.id_mantenimiento
+            ocupacion.registrar_mantenimientos(db, nuevo_mantenimiento)
     else:
         # Cambiar estado a Disponible
-        estado_disp = db.query(EstadoVehiculo).filter(
-            EstadoVehiculo.nombre == "Disponible"
-        ).first()
+        estado_disp = catalogo_vehiculos.estado_por_nombre(db, "Disponible")
         
         if estado_disp:
             vehiculo.id_estado = estado_disp.id_estado
             nuevo_estado_vehiculo = "Disponible"
     
     # 10. Guardar todos los cambios
+    resumen_mensual.registrar_cambio(
+        db, contribucion_anterior, resumen_mensual.contribucion_alquiler(db, alquiler)
+    )
+    ocupacion.registrar_alquileres(db, alquiler)
     db.commit()
+    cache_reportes.invalidar("alquileres", "mantenimientos")
     db.refresh(alquiler)
     db.refresh(vehiculo)
     
@@ -408,6 +735,7 @@ def realizar_checkout(db: Session, id_alquiler: int, checkout_data) -> Alquiler:
     )
 
 
+@medir
 def cancelar_alquiler(db: Session, id_alquiler: int, datos_cancelacion) -> Alquiler:
     """
     Cancela un alquiler que esté en estado PENDIENTE o EN_CURSO.
@@ -435,6 +763,8 @@ def cancelar_alquiler(db: Session, id_alquiler: int, datos_cancelacion) -> Alqui
     estado_anterior = alquiler.estado
     
     # 5. Actualizar el alquiler con los datos de cancelación
+    contribucion_anterior = resumen_mensual.contribucion_alquiler(db, alquiler)
+    ranking_vehiculos.registrar_cambio(db, ranking_vehiculos.clave_alquiler(alquiler), None)
     alquiler.estado = "CANCELADO"
     alquiler.motivo_cancelacion = datos_cancelacion.motivo_cancelacion
     alquiler.fecha_cancelacion = datetime.now()
@@ -448,15 +778,18 @@ def cancelar_alquiler(db: Session, id_alquiler: int, datos_cancelacion) -> Alqui
         
         if vehiculo:
             # Buscar el estado "Disponible"
-            estado_disponible = db.query(EstadoVehiculo).filter(
-                EstadoVehiculo.nombre == "Disponible"
-            ).first()
+            estado_disponible = catalogo_vehiculos.estado_por_nombre(db, "Disponible")
             
             if estado_disponible:
                 vehiculo.id_estado = estado_disponible.id_estado
     
     # 7. Guardar cambios
+    resumen_mensual.registrar_cambio(
+        db, contribucion_anterior, resumen_mensual.contribucion_alquiler(db, alquiler)
+    )
+    ocupacion.registrar_alquileres(db, alquiler)
     db.commit()
+    cache_reportes.invalidar("alquileres")
     db.refresh(alquiler)
     
     return alquilerSchema.CancelarResponse(
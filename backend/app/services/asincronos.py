@@ -0,0 +1,85 @@
+"""Variantes async de los servicios más usados (modo DB_ASYNC).
+
+La lógica de negocio es la de los servicios sync: cada variante la ejecuta con
+`AsyncSession.run_sync`, que corre ese código sobre la conexión async (aiomysql)
+sin ocupar un hilo del threadpool mientras espera a la DB. La conversión a los
+esquemas de salida se hace dentro de `run_sync`, porque las relaciones lazy
+solo pueden cargarse ahí.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..schemas import alquileres as alquilerSchema
+from ..schemas.vehiculos import VehiculoOut
+from . import alquileres as alquiler_service
+from . import reports as reports_service
+from . import vehiculos as vehiculo_service
+from .indice_disponibilidad import reservas_vehiculos
+
+_locks_vehiculo: Dict[int, asyncio.Lock] = {}
+
+
+@asynccontextmanager
+async def _bloquear_vehiculo(id_vehiculo: int):
+    """Toma el lock por vehículo de `reservas_vehiculos` sin bloquear el event loop.
+
+    Ese lock es un threading.Lock que también toman los endpoints sync (lotes,
+    ediciones, mantenimientos) desde el threadpool. Tomarlo dentro de `run_sync`
+    lo esperaría en el hilo del loop, y mientras tanto no avanzaría la tarea que
+    lo tiene, ni las que tienen los que espera un hilo sync: un deadlock. Se
+    espera en un hilo (`bloquear_async`) y el asyncio.Lock previo hace que las
+    tareas del mismo vehículo esperen en el loop y no ocupen un hilo cada una.
+    """
+    lock = _locks_vehiculo.setdefault(id_vehiculo, asyncio.Lock())
+    async with lock, reservas_vehiculos.bloquear_async(id_vehiculo):
+        yield
+
+
+async def listar_alquileres(db: AsyncSession, *args, **kwargs):
+    def _listar(session):
+        items, cursor_siguiente = alquiler_service.listar_alquileres(session, *args, **kwargs)
+        if not kwargs.get("campos") and kwargs.get("vista") != "resumen":
+            items = [alquilerSchema.AlquilerOut.model_validate(a) for a in items]
+        return items, cursor_siguiente
+
+    return await db.run_sync(_listar)
+
+
+async def create_alquiler(db: AsyncSession, alquiler_in) -> alquilerSchema.AlquilerOut:
+    def _crear(session):
+        alquiler = alquiler_service.create_alquiler(session, alquiler_in)
+        return alquilerSchema.AlquilerOut.model_validate(alquiler)
+
+    async with _bloquear_vehiculo(alquiler_in.id_vehiculo):
+        return await db.run_sync(_crear)
+
+
+async def obtener_vehiculos_con_disponibilidad(db: AsyncSession):
+    return await db.run_sync(vehiculo_service.obtener_vehiculos_con_disponibilidad)
+
+
+async def buscar_vehiculos_libres(db: AsyncSession, **kwargs):
+    def _buscar(session):
+        total, items = vehiculo_service.buscar_vehiculos_libres(session, **kwargs)
+        return total, [VehiculoOut.model_validate(v) for v in items]
+
+    return await db.run_sync(_buscar)
+
+
+async def get_alquileres_por_cliente(db: AsyncSession, **kwargs):
+    return await db.run_sync(reports_service.get_alquileres_por_cliente, **kwargs)
+
+
+async def get_vehiculos_mas_alquilados(db: AsyncSession, **kwargs):
+    return await db.run_sync(reports_service.get_vehiculos_mas_alquilados, **kwargs)
+
+
+async def get_alquileres_por_periodo(db: AsyncSession, **kwargs):
+    return await db.run_sync(reports_service.get_alquileres_por_periodo, **kwargs)
+
+
+async def get_facturacion_mensual(db: AsyncSession, **kwargs):
+    return await db.run_sync(reports_service.get_facturacion_mensual, **kwargs)
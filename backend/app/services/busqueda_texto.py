@@ -0,0 +1,160 @@
+"""Búsqueda de texto libre (`q`) sobre clientes, empleados y vehículos.
+
+Cada modelo declara en `__table_args__` el índice `ft_<tabla>_texto` con las
+columnas de texto que abarca `q`; esa es la única definición de los campos:
+
+- MySQL: el índice es FULLTEXT. Se filtra y ordena por
+  `MATCH(...) AGAINST(:q IN BOOLEAN MODE)`, con cada término como prefijo
+  obligatorio (`+term*`).
+- SQLite (desarrollo y pruebas locales): el índice FULLTEXT no se crea; en su
+  lugar `crear_indices_texto` arma la tabla virtual FTS5 `<tabla>_fts` (de
+  contenido externo, sincronizada con triggers) y se ordena por bm25.
+- Otro motor: todos los términos deben aparecer en alguna columna (LIKE), sin
+  ranking.
+
+Los filtros por campo de los listados siguen siendo por substring (ILIKE
+'%x%'), como antes de `q`; el índice de texto se usa solo para `q`.
+"""
+import logging
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Integer, and_, bindparam, or_, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Query
+
+from ..models import Cliente, Empleado, Vehiculo
+from .exceptions import BusinessRuleError
+from .paginacion import LIMITE_POR_DEFECTO, validar_campos
+
+logger = logging.getLogger(__name__)
+
+MODELOS_CON_TEXTO = (Cliente, Empleado, Vehiculo)
+MAX_TERMINOS = 8
+
+_TERMINO = re.compile(r"\w+", re.UNICODE)
+
+
+def terminos(q: str) -> List[str]:
+    """Palabras de la búsqueda, sin los operadores de MATCH/FTS5."""
+    return _TERMINO.findall(q or "")[:MAX_TERMINOS]
+
+
+def columnas_texto(modelo) -> list:
+    tabla = modelo.__table__
+    for indice in tabla.indexes:
+        if indice.name == f"ft_{tabla.name}_texto":
+            return list(indice.columns)
+    raise ValueError(f"{tabla.name} no declara el índice ft_{tabla.name}_texto")
+
+
+def _clave_primaria(modelo):
+    return modelo.__table__.primary_key.columns.values()[0]
+
+
+def crear_indices_texto(engine) -> None:
+    """Crea las tablas FTS5 y sus triggers en SQLite (en MySQL alcanza con el índice FULLTEXT)."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for modelo in MODELOS_CON_TEXTO:
+            tabla = modelo.__table__.name
+            fts = f"{tabla}_fts"
+            existe = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+            ).first()
+            if existe:
+                continue
+
+            pk = _clave_primaria(modelo).name
+            columnas = [c.name for c in columnas_texto(modelo)]
+            lista = ", ".join(columnas)
+            nuevos = ", ".join(f"new.{c}" for c in columnas)
+            viejos = ", ".join(f"old.{c}" for c in columnas)
+
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({lista}, content='{tabla}', content_rowid='{pk}', "
+                f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+                f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.{pk}, {nuevos}); END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.{pk}, {viejos}); END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {tabla} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.{pk}, {viejos}); "
+                f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.{pk}, {nuevos}); END"
+            )
+            # Indexa las filas que ya existían
+            conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            logger.info("[startup] Tabla de búsqueda %s creada", fts)
+
+
+def filtrar_por_texto(query: Query, modelo, q: str) -> Tuple[Query, list]:
+    """Restringe `query` a las filas que coinciden con `q`.
+
+    Retorna la consulta y la lista de `order_by` (más relevantes primero,
+    desempate por clave primaria).
+    """
+    palabras = terminos(q)
+    if not palabras:
+        raise BusinessRuleError("La búsqueda no contiene palabras")
+
+    pk = _clave_primaria(modelo)
+    columnas = columnas_texto(modelo)
+    dialecto = query.session.get_bind().dialect.name
+
+    if dialecto == "mysql":
+        relevancia = match(
+            *columnas, against=bindparam("q_texto", " ".join(f"+{p}*" for p in palabras))
+        ).in_boolean_mode()
+        return query.filter(relevancia), [relevancia.desc(), pk.asc()]
+
+    if dialecto == "sqlite":
+        fts = f"{modelo.__table__.name}_fts"
+        coincidencias = (
+            text(f"SELECT rowid AS id, bm25({fts}) AS rango FROM {fts} WHERE {fts} MATCH :q_texto")
+            .bindparams(q_texto=" ".join(f'"{p}"*' for p in palabras))
+            .columns(id=Integer, rango=Float)
+            .subquery("coincidencias")
+        )
+        # bm25 es más negativo cuanto más relevante
+        query = query.join(coincidencias, coincidencias.c.id == pk)
+        return query, [coincidencias.c.rango.asc(), pk.asc()]
+
+    condiciones = [or_(*[c.ilike(f"%{p}%") for c in columnas]) for p in palabras]
+    return query.filter(and_(*condiciones)), [pk.asc()]
+
+
+def buscar_por_texto(
+    query: Query,
+    modelo,
+    q: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    campos: Optional[Sequence[str]] = None,
+    opciones: Sequence = (),
+) -> Tuple[list, Optional[str]]:
+    """Los `limit` resultados más relevantes para `q`, con la forma de retorno de `paginar`.
+
+    El ranking no es una clave estable para keyset, así que no hay cursor: se
+    devuelve solo la primera página (hasta LIMITE_POR_DEFECTO sin `limit`).
+    """
+    if cursor:
+        raise BusinessRuleError("La búsqueda por texto (q) no admite cursor; usar limit")
+    campos = validar_campos(modelo, campos)
+
+    query, orden = filtrar_por_texto(query, modelo, q)
+    if campos:
+        query = query.with_entities(*[getattr(modelo, c) for c in campos])
+    elif opciones:
+        query = query.options(*opciones)
+    filas = query.order_by(*orden).limit(limit or LIMITE_POR_DEFECTO).all()
+
+    if campos:
+        filas = [{c: getattr(fila, c) for c in campos} for fila in filas]
+    return filas, None
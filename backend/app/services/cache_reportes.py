@@ -0,0 +1,229 @@
+"""Cache de resultados de los reportes (/reports/*).
+
+Clave: (reporte, generaciones de los dominios de los que depende, parámetros
+normalizados). Los servicios que escriben alquileres, multas, mantenimientos o
+vehículos llaman a `cache_reportes.invalidar(<dominio>)` luego del commit: eso incrementa
+el contador de generación del dominio, y las entradas calculadas con la
+generación anterior dejan de ser alcanzables (vencen por TTL o las desplaza el
+LRU). Cada reporte tiene además su propio TTL, que acota lo desactualizado
+frente a escrituras que no pasan por los servicios.
+
+Backends:
+- `CacheLRU` (por defecto): en memoria del proceso, guarda los objetos tal cual.
+- `CacheExterno`: cualquier cliente con la interfaz de redis (`get`, `set` con
+  `ex`, `incr`), compartido entre procesos; los valores se guardan en JSON.
+
+Configuración por entorno: REPORTES_CACHE_BACKEND (memoria | redis),
+REPORTES_CACHE_URL y REPORTES_CACHE_MAX_ENTRADAS.
+"""
+import inspect
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .rangos_fecha import rango_desde_filtro
+
+DOMINIOS = ("alquileres", "multas", "mantenimientos", "vehiculos")
+
+
+@dataclass(frozen=True)
+class ConfigReporte:
+    ttl_segundos: int
+    dominios: Tuple[str, ...]
+
+
+REPORTES: Dict[str, ConfigReporte] = {
+    "alquileres_por_cliente": ConfigReporte(30, ("alquileres", "multas", "vehiculos")),
+    "vehiculos_mas_alquilados": ConfigReporte(60, ("alquileres", "vehiculos")),
+    "alquileres_por_periodo": ConfigReporte(300, ("alquileres",)),
+    "facturacion_mensual": ConfigReporte(300, ("alquileres", "multas")),
+    "utilizacion": ConfigReporte(300, ("alquileres", "mantenimientos", "vehiculos")),
+}
+
+_SIN_VALOR = object()
+
+
+class BackendCache(ABC):
+    @abstractmethod
+    def obtener(self, clave: str) -> Any:
+        """Valor guardado o `_SIN_VALOR` si no existe o venció."""
+
+    @abstractmethod
+    def guardar(self, clave: str, valor: Any, ttl_segundos: int) -> None:
+        pass
+
+    @abstractmethod
+    def leer_contador(self, clave: str) -> int:
+        pass
+
+    @abstractmethod
+    def incrementar(self, clave: str) -> int:
+        pass
+
+    def tamanio(self) -> Optional[int]:
+        return None
+
+
+class CacheLRU(BackendCache):
+    def __init__(self, max_entradas: int = 512):
+        self._max = max_entradas
+        self._lock = Lock()
+        self._entradas: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._contadores: Dict[str, int] = {}
+
+    def obtener(self, clave: str) -> Any:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return _SIN_VALOR
+            if entrada[0] <= time.monotonic():
+                del self._entradas[clave]
+                return _SIN_VALOR
+            self._entradas.move_to_end(clave)
+            return entrada[1]
+
+    def guardar(self, clave: str, valor: Any, ttl_segundos: int) -> None:
+        with self._lock:
+            self._entradas[clave] = (time.monotonic() + ttl_segundos, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max:
+                self._entradas.popitem(last=False)
+
+    def leer_contador(self, clave: str) -> int:
+        with self._lock:
+            return self._contadores.get(clave, 0)
+
+    def incrementar(self, clave: str) -> int:
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + 1
+            return self._contadores[clave]
+
+    def tamanio(self) -> Optional[int]:
+        with self._lock:
+            return len(self._entradas)
+
+
+class CacheExterno(BackendCache):
+    """Backend fuera de proceso sobre un cliente con la interfaz de redis."""
+
+    def __init__(self, cliente, prefijo: str = "reportes:"):
+        self._cliente = cliente
+        self._prefijo = prefijo
+
+    def obtener(self, clave: str) -> Any:
+        crudo = self._cliente.get(self._prefijo + clave)
+        if crudo is None:
+            return _SIN_VALOR
+        return json.loads(crudo)
+
+    def guardar(self, clave: str, valor: Any, ttl_segundos: int) -> None:
+        self._cliente.set(self._prefijo + clave, json.dumps(valor, default=_serializar), ex=ttl_segundos)
+
+    def leer_contador(self, clave: str) -> int:
+        return int(self._cliente.get(self._prefijo + clave) or 0)
+
+    def incrementar(self, clave: str) -> int:
+        return int(self._cliente.incr(self._prefijo + clave))
+
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def crear_backend() -> BackendCache:
+    tipo = os.getenv("REPORTES_CACHE_BACKEND", "memoria")
+    if tipo == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REPORTES_CACHE_BACKEND=redis requiere el paquete 'redis'")
+        url = os.getenv("REPORTES_CACHE_URL", "redis://localhost:6379/0")
+        return CacheExterno(redis.Redis.from_url(url))
+    return CacheLRU(int(os.getenv("REPORTES_CACHE_MAX_ENTRADAS", "512")))
+
+
+class CacheReportes:
+    def __init__(self, backend: Optional[BackendCache] = None):
+        self.backend = backend or crear_backend()
+        self._lock = Lock()
+        self._aciertos: Dict[str, int] = {nombre: 0 for nombre in REPORTES}
+        self._fallos: Dict[str, int] = {nombre: 0 for nombre in REPORTES}
+
+    def obtener_o_calcular(self, reporte: str, parametros: dict, calcular: Callable[[], Any]) -> Any:
+        config = REPORTES[reporte]
+        generaciones = ".".join(
+            str(self.backend.leer_contador(f"generacion:{d}")) for d in config.dominios
+        )
+        clave = f"{reporte}:{generaciones}:{json.dumps(parametros, sort_keys=True, default=_serializar)}"
+
+        valor = self.backend.obtener(clave)
+        if valor is not _SIN_VALOR:
+            self._contar(self._aciertos, reporte)
+            return valor
+
+        self._contar(self._fallos, reporte)
+        valor = calcular()
+        self.backend.guardar(clave, valor, config.ttl_segundos)
+        return valor
+
+    def cacheado(self, reporte: str):
+        """Decorador para funciones de reporte `f(db, ...)`: cachea por el resto de los parámetros.
+
+        `desde`/`hasta` se normalizan al rango semiabierto equivalente, así
+        "2025-01-01" y "2025-01-01T00:00:00" comparten entrada.
+        """
+        def decorador(funcion):
+            firma = inspect.signature(funcion)
+
+            @wraps(funcion)
+            def envoltura(db, *args, **kwargs):
+                argumentos = firma.bind(db, *args, **kwargs)
+                argumentos.apply_defaults()
+                parametros = {k: v for k, v in argumentos.arguments.items() if k != "db"}
+                if "desde" in parametros or "hasta" in parametros:
+                    inicio, fin = rango_desde_filtro(parametros.pop("desde", None), parametros.pop("hasta", None))
+                    parametros["rango"] = [inicio, fin]
+                return self.obtener_o_calcular(reporte, parametros, lambda: funcion(db, *args, **kwargs))
+            return envoltura
+        return decorador
+
+    def invalidar(self, *dominios: str) -> None:
+        """Invalida los reportes que dependen de los dominios indicados (sin argumentos: todos)."""
+        for dominio in dominios or DOMINIOS:
+            self.backend.incrementar(f"generacion:{dominio}")
+
+    def metricas(self) -> dict:
+        with self._lock:
+            reportes = {
+                nombre: {
+                    "aciertos": self._aciertos[nombre],
+                    "fallos": self._fallos[nombre],
+                    "ttl_segundos": REPORTES[nombre].ttl_segundos,
+                }
+                for nombre in REPORTES
+            }
+        return {
+            "backend": type(self.backend).__name__,
+            "entradas": self.backend.tamanio(),
+            "generaciones": {d: self.backend.leer_contador(f"generacion:{d}") for d in DOMINIOS},
+            "reportes": reportes,
+        }
+
+    def _contar(self, contadores: Dict[str, int], reporte: str) -> None:
+        with self._lock:
+            contadores[reporte] += 1
+
+
+cache_reportes = CacheReportes()
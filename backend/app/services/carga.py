@@ -0,0 +1,37 @@
+"""Estrategias de carga de relaciones para las respuestas anidadas.
+
+Los schemas de salida (`AlquilerOut`, `MantenimientoOut`, `MultaDanioOut`,
+`VehiculoOut`) se arman con `from_attributes` y recorren las relaciones del
+modelo; sin opciones de carga cada relación es un lazy load por fila. Cada
+listado aplica acá la estrategia que corresponde a lo que serializa:
+
+- joinedload para las many-to-one que casi siempre tienen valor y varían por
+  fila (cliente, empleado, vehículo de un alquiler): viajan en la misma consulta.
+- selectinload para catálogos chicos y relaciones casi siempre vacías
+  (categoría/estado del vehículo, empleado cancelador): una consulta IN por
+  relación, sin ensanchar cada fila.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from ..models import Alquiler, Mantenimiento, MultaDanio, Vehiculo
+
+CARGA_VEHICULO = (
+    selectinload(Vehiculo.categoria),
+    selectinload(Vehiculo.estado),
+)
+
+CARGA_ALQUILER = (
+    joinedload(Alquiler.cliente),
+    joinedload(Alquiler.vehiculo).options(*CARGA_VEHICULO),
+    joinedload(Alquiler.empleado),
+    selectinload(Alquiler.empleado_cancelador),
+)
+
+CARGA_MANTENIMIENTO = (
+    joinedload(Mantenimiento.vehiculo).options(*CARGA_VEHICULO),
+    joinedload(Mantenimiento.empleado),
+)
+
+CARGA_MULTA = (
+    joinedload(MultaDanio.alquiler).options(*CARGA_ALQUILER),
+)
@@ -0,0 +1,119 @@
+"""Cache en proceso de los catálogos EstadoVehiculo y CategoriaVehiculo.
+
+Son tablas chicas que casi no cambian, pero los servicios las consultan en cada
+checkout, cancelación o mantenimiento para traducir "Disponible"/"Mantenimiento"
+a su id. El catálogo se carga al iniciar y se recarga:
+- cuando lo invalidan las escrituras de estados/categorías (y el seed),
+- al vencer CATALOGOS_TTL_SEGUNDOS (escrituras hechas por otro proceso),
+- ante una búsqueda sin resultado (un valor recién creado en otro proceso).
+"""
+import os
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models import CategoriaVehiculo, EstadoVehiculo
+
+CATALOGOS_TTL_SEGUNDOS = float(os.getenv("CATALOGOS_TTL_SEGUNDOS", "300"))
+
+
+@dataclass(frozen=True)
+class EstadoCatalogo:
+    id_estado: int
+    nombre: str
+    descripcion: Optional[str]
+
+
+@dataclass(frozen=True)
+class CategoriaCatalogo:
+    id_categoria: int
+    nombre: str
+    descripcion: Optional[str]
+    tarifa_diaria: Decimal
+
+
+@dataclass(frozen=True)
+class _Contenido:
+    estados_por_id: Dict[int, EstadoCatalogo]
+    estados_por_nombre: Dict[str, EstadoCatalogo]
+    categorias_por_id: Dict[int, CategoriaCatalogo]
+    categorias_por_nombre: Dict[str, CategoriaCatalogo]
+    cargado_en: float
+
+
+class CatalogoVehiculos:
+    def __init__(self, ttl_segundos: float = CATALOGOS_TTL_SEGUNDOS):
+        self._ttl = ttl_segundos
+        self._lock = Lock()
+        self._contenido: Optional[_Contenido] = None
+
+    def cargar(self, db: Session) -> None:
+        """Lee ambos catálogos (dos consultas) y reemplaza el contenido de una vez."""
+        estados = [
+            EstadoCatalogo(e.id_estado, e.nombre, e.descripcion)
+            for e in db.query(EstadoVehiculo.id_estado, EstadoVehiculo.nombre, EstadoVehiculo.descripcion)
+        ]
+        categorias = [
+            CategoriaCatalogo(c.id_categoria, c.nombre, c.descripcion, c.tarifa_diaria)
+            for c in db.query(
+                CategoriaVehiculo.id_categoria,
+                CategoriaVehiculo.nombre,
+                CategoriaVehiculo.descripcion,
+                CategoriaVehiculo.tarifa_diaria,
+            )
+        ]
+        contenido = _Contenido(
+            estados_por_id={e.id_estado: e for e in estados},
+            estados_por_nombre={e.nombre: e for e in estados},
+            categorias_por_id={c.id_categoria: c for c in categorias},
+            categorias_por_nombre={c.nombre: c for c in categorias},
+            cargado_en=time.monotonic(),
+        )
+        with self._lock:
+            self._contenido = contenido
+
+    def invalidar(self) -> None:
+        """Descarta el contenido; la próxima búsqueda recarga desde la DB."""
+        with self._lock:
+            self._contenido = None
+
+    def _vigente(self, db: Session, recargar: bool = False) -> _Contenido:
+        contenido = self._contenido
+        if recargar or contenido is None or time.monotonic() - contenido.cargado_en > self._ttl:
+            self.cargar(db)
+            contenido = self._contenido
+        return contenido
+
+    def _buscar(self, db: Session, atributo: str, clave):
+        valor = getattr(self._vigente(db), atributo).get(clave)
+        if valor is None:
+            # Puede haberse creado en otro proceso después de la última carga
+            valor = getattr(self._vigente(db, recargar=True), atributo).get(clave)
+        return valor
+
+    def estado_por_nombre(self, db: Session, nombre: str) -> Optional[EstadoCatalogo]:
+        return self._buscar(db, "estados_por_nombre", nombre)
+
+    def estado(self, db: Session, id_estado: int) -> Optional[EstadoCatalogo]:
+        return self._buscar(db, "estados_por_id", id_estado)
+
+    def id_estado(self, db: Session, nombre: str) -> Optional[int]:
+        estado = self.estado_por_nombre(db, nombre)
+        return estado.id_estado if estado else None
+
+    def categoria_por_nombre(self, db: Session, nombre: str) -> Optional[CategoriaCatalogo]:
+        return self._buscar(db, "categorias_por_nombre", nombre)
+
+    def categoria(self, db: Session, id_categoria: int) -> Optional[CategoriaCatalogo]:
+        return self._buscar(db, "categorias_por_id", id_categoria)
+
+    def tarifa_diaria(self, db: Session, id_categoria: int) -> Optional[Decimal]:
+        categoria = self.categoria(db, id_categoria)
+        return categoria.tarifa_diaria if categoria else None
+
+
+catalogo_vehiculos = CatalogoVehiculos()
@@ -4,6 +4,8 @@ from typing import List, Optional
 
 from ..models import CategoriaVehiculo, Vehiculo
 from .exceptions import DomainNotFound, BusinessRuleError
+from .cache_reportes import cache_reportes
+from .catalogos import catalogo_vehiculos
 
 
 def listar_categorias_vehiculo(
@@ -38,6 +40,7 @@ def crear_categoria_vehiculo(db: Session, categoria_in) -> CategoriaVehiculo:
     nueva_categoria = CategoriaVehiculo(**categoria_in.model_dump())
     db.add(nueva_categoria)
     db.commit()
+    catalogo_vehiculos.invalidar()
     db.refresh(nueva_categoria)
     return nueva_categoria
 
@@ -49,6 +52,8 @@ def actualizar_categoria_vehiculo(db: Session, categoria_id: int, categoria_in)
         setattr(categoria, field, value)
 
     db.commit()
+    catalogo_vehiculos.invalidar()
+    cache_reportes.invalidar("vehiculos")
     db.refresh(categoria)
     return categoria
 
@@ -62,3 +67,4 @@ def eliminar_categoria_vehiculo(db: Session, categoria_id: int) -> None:
 
     db.delete(categoria)
     db.commit()
+    catalogo_vehiculos.invalidar()
@@ -1,13 +1,15 @@
-from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import Optional, List
-from difflib import SequenceMatcher
+from typing import Optional, List, Tuple
 
 from ..models import Cliente, Alquiler
 from .exceptions import DomainNotFound, BusinessRuleError
+from .paginacion import paginar
+from .busqueda_texto import buscar_por_texto
+from .indice_clientes import indice_clientes
 
 
-def listar_clientes(nombre: Optional[str],apellido: Optional[str],dni: Optional[str],telefono: Optional[str],email: Optional[str],direccion: Optional[str],estado: Optional[bool],db: Session,) -> List[Cliente]:
+def listar_clientes(nombre: Optional[str],apellido: Optional[str],dni: Optional[str],telefono: Optional[str],email: Optional[str],direccion: Optional[str],estado: Optional[bool],db: Session,limit: Optional[int] = None,cursor: Optional[str] = None,campos: Optional[List[str]] = None,q: Optional[str] = None,) -> Tuple[list, Optional[str]]:
+    """Filtros por campo: substring. `q`: texto libre ordenado por relevancia (índice FULLTEXT/FTS5)."""
     query = db.query(Cliente)
 
     if nombre:
@@ -25,7 +27,9 @@ def listar_clientes(nombre: Optional[str],apellido: Optional[str],dni: Optional[
     if estado is not None:
         query = query.filter(Cliente.estado == estado)
 
-    return query.all()
+    if q:
+        return buscar_por_texto(query, Cliente, q, limit=limit, cursor=cursor, campos=campos)
+    return paginar(query, Cliente, [(Cliente.id_cliente, False)], limit=limit, cursor=cursor, campos=campos)
 
 
 def obtener_cliente_por_id(db: Session, id_cliente: int) -> Cliente:
@@ -44,6 +48,7 @@ def crear_cliente(db:Session, cliente_in) -> Cliente:
     db.add(cliente)
     db.commit()
     db.refresh(cliente)
+    indice_clientes.agregar(cliente)
     return cliente
 
 
@@ -57,6 +62,7 @@ def actualizar_cliente(db: Session, id_cliente: int, cliente_in) -> Cliente:
 
     db.commit()
     db.refresh(cliente)
+    indice_clientes.agregar(cliente)
     return cliente
 
 
@@ -76,47 +82,9 @@ def eliminar_cliente(db: Session, id_cliente: int) -> None:
 
     db.delete(cliente)
     db.commit()
+    indice_clientes.quitar(id_cliente)
 
 
 def sugerir_clientes(db: Session, query: str, limit: int) -> List[dict]:
-    q = query.strip()
-    if not q:
-        return []
-    pattern = f"%{q.lower()}%"
-    # Buscar hasta 200 candidatos por substring
-    candidatos = db.query(Cliente).filter(
-        or_(
-            Cliente.nombre.ilike(pattern),
-            Cliente.apellido.ilike(pattern)
-        )
-    ).limit(200).all()
-    # Si no hay candidatos por substring y la query es >=2 chars, traer primeros 50 para similitud general
-    if not candidatos and len(q) >= 2:
-        candidatos = db.query(Cliente).limit(50).all()
-
-    scored = []
-    q_lower = q.lower()
-    for c in candidatos:
-        full = f"{c.nombre} {c.apellido}".lower()
-        nombre_lower = c.nombre.lower()
-        apellido_lower = c.apellido.lower()
-        # Scoring base
-        ratio = SequenceMatcher(None, q_lower, full).ratio()
-        # Boost si empieza con query
-        starts_boost = 0.15 if (nombre_lower.startswith(q_lower) or apellido_lower.startswith(q_lower)) else 0.0
-        # Boost si query está totalmente contenido en nombre/apellido
-        contains_boost = 0.05 if (q_lower in nombre_lower or q_lower in apellido_lower) else 0.0
-        score = ratio + starts_boost + contains_boost
-        scored.append((score, ratio, c))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    seleccion = scored[:limit]
-    return [
-        {
-            "id_cliente": c.id_cliente,
-            "nombre": c.nombre,
-            "apellido": c.apellido,
-            "similaridad": round(ratio, 4),
-        }
-        for score, ratio, c in seleccion
-    ]
\ No newline at end of file
+    """Sugerencias por nombre, apellido o DNI desde el índice en memoria (ver indice_clientes.py)."""
+    return indice_clientes.sugerir(db, query, limit)
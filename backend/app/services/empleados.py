@@ -1,9 +1,11 @@
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from ..models import Empleado, Alquiler, Mantenimiento
 from .exceptions import DomainNotFound, BusinessRuleError
+from .paginacion import paginar
+from .busqueda_texto import buscar_por_texto
 
 
 def listar_empleados(
@@ -16,7 +18,12 @@ def listar_empleados(
     telefono: Optional[str] = None,
     rol: Optional[str] = None,
     estado: Optional[bool] = None,
-) -> List[Empleado]:
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    campos: Optional[List[str]] = None,
+    q: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """Filtros por campo: substring. `q`: texto libre ordenado por relevancia (índice FULLTEXT/FTS5)."""
     query = db.query(Empleado)
 
     if nombre:
@@ -36,7 +43,9 @@ def listar_empleados(
     if estado is not None:
         query = query.filter(Empleado.estado == estado)
 
-    return query.all()
+    if q:
+        return buscar_por_texto(query, Empleado, q, limit=limit, cursor=cursor, campos=campos)
+    return paginar(query, Empleado, [(Empleado.id_empleado, False)], limit=limit, cursor=cursor, campos=campos)
 
 
 def crear_empleado(db: Session, empleado_in) -> Empleado:
@@ -0,0 +1,107 @@
+"""Exportación en streaming (NDJSON / CSV) de alquileres, multas y mantenimientos.
+
+Las filas se leen con un cursor del lado del servidor (`stream_results`) en
+lotes de `TAMANIO_LOTE`, sin construir objetos ORM ni esquemas Pydantic, y se
+serializan a medida que llegan: la memoria queda acotada al tamaño del lote.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Alquiler, Mantenimiento, MultaDanio
+
+TAMANIO_LOTE = 1000
+
+TIPOS_CONTENIDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _serializar(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        # Como texto para no perder precisión en los montos
+        return str(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _exportar(db: Session, modelo, formato: str, filtros: list) -> Iterator[str]:
+    columnas = list(modelo.__table__.columns)
+    nombres = [c.key for c in columnas]
+    consulta = (
+        select(*columnas)
+        .where(*filtros)
+        .order_by(*modelo.__table__.primary_key.columns)
+        .execution_options(stream_results=True, yield_per=TAMANIO_LOTE)
+    )
+    resultado = db.execute(consulta)
+
+    if formato == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(nombres)
+        yield buffer.getvalue()
+        for lote in resultado.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(lote)
+            yield buffer.getvalue()
+    else:
+        for lote in resultado.partitions():
+            yield "".join(
+                json.dumps(dict(zip(nombres, fila)), default=_serializar, ensure_ascii=False) + "\n"
+                for fila in lote
+            )
+
+
+def exportar_alquileres(
+    db: Session,
+    formato: str,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+) -> Iterator[str]:
+    """Alquileres con fecha_inicio en [desde, hasta] (ambos opcionales)."""
+    filtros = []
+    if desde:
+        filtros.append(Alquiler.fecha_inicio >= desde)
+    if hasta:
+        filtros.append(Alquiler.fecha_inicio <= hasta)
+    return _exportar(db, Alquiler, formato, filtros)
+
+
+def exportar_multas_danios(
+    db: Session,
+    formato: str,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+) -> Iterator[str]:
+    """Multas y daños con fecha_registro en [desde, hasta] (ambos opcionales)."""
+    filtros = []
+    if desde:
+        filtros.append(MultaDanio.fecha_registro >= desde)
+    if hasta:
+        filtros.append(MultaDanio.fecha_registro <= hasta)
+    return _exportar(db, MultaDanio, formato, filtros)
+
+
+def exportar_mantenimientos(
+    db: Session,
+    formato: str,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+) -> Iterator[str]:
+    """Mantenimientos con fecha_inicio en [desde, hasta] (ambos opcionales)."""
+    filtros = []
+    if desde:
+        filtros.append(Mantenimiento.fecha_inicio >= desde)
+    if hasta:
+        filtros.append(Mantenimiento.fecha_inicio <= hasta)
+    return _exportar(db, Mantenimiento, formato, filtros)
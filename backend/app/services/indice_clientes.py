@@ -0,0 +1,425 @@
+"""Índice en memoria para el autocompletado de clientes (/clientes/suggest).
+
+Los textos se normalizan (minúsculas, sin acentos). Estructuras:
+- `ids_por_token`: cada palabra de nombre/apellido -> ids de clientes.
+- `tokens_por_trigrama`: trigramas -> palabras distintas que los contienen.
+  Se indexan las palabras distintas y no los clientes, así el índice crece con
+  el vocabulario de nombres y no con la cantidad de clientes.
+- `tokens_ordenados` y `dnis`: listas ordenadas para búsqueda por prefijo (bisect).
+
+Una búsqueda junta como mucho `MAX_CANDIDATOS` clientes con una palabra que
+contiene la consulta (primero los que empiezan con ella); si la consulta tiene
+varias palabras, clientes con palabras que empiezan con cada una. Si no hay
+ninguno (errores de tipeo), prueba con prefijos más cortos de la consulta y,
+por último, por trigramas compartidos. Después los puntúa
+con el mismo criterio que antes: SequenceMatcher más bonus por prefijo y por
+substring. Como 2·min(a, b)/(a + b) acota el ratio, el SequenceMatcher solo se
+calcula para los candidatos que todavía pueden entrar en el top-k.
+
+El índice se construye al iniciar y lo actualizan las altas, ediciones y bajas
+de clientes. Las escrituras que llegan durante una reconstrucción se aplican
+también sobre el índice nuevo. Las hechas por otro proceso (otro worker, cargas
+directas en la DB) se ven al vencer INDICE_CLIENTES_TTL_SEGUNDOS: la búsqueda que
+lo encuentra vencido lo reconstruye, y las que llegan mientras tanto siguen
+usando el índice anterior.
+"""
+import heapq
+import os
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import Cliente
+
+INDICE_CLIENTES_TTL_SEGUNDOS = float(os.getenv("INDICE_CLIENTES_TTL_SEGUNDOS", "300"))
+MAX_CANDIDATOS = 200
+MAX_CANDIDATOS_APROXIMADOS = 50  # como el fallback anterior, que puntuaba 50 filas
+MAX_CONTEO_APROXIMADO = 20000
+MAX_IDS_FILTRO = 50000
+LARGO_PREFIJOS_CONTADOS = 3
+_ULTIMO_CARACTER = "\U0010ffff"  # prefijo + esto acota por arriba a todo lo que empieza con el prefijo
+TAMANIO_LOTE_CARGA = 10000
+
+
+def normalizar(texto: Optional[str]) -> str:
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.lower().split())
+
+
+def _trigramas(texto: str) -> Set[str]:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+@dataclass(frozen=True)
+class _Entrada:
+    id_cliente: int
+    nombre: str
+    apellido: str
+    nombre_n: str
+    apellido_n: str
+    dni_n: str
+    completo_n: str
+
+    @property
+    def tokens(self) -> Set[str]:
+        return set(self.nombre_n.split()) | set(self.apellido_n.split())
+
+
+class _Estructuras:
+    def __init__(self):
+        self.entradas: Dict[int, _Entrada] = {}
+        self.ids_por_token: Dict[str, Set[int]] = {}
+        self.tokens_por_trigrama: Dict[str, Set[str]] = {}
+        self.tokens_ordenados: List[str] = []
+        self.dnis: List[Tuple[str, int]] = []
+        # Pares (palabra, cliente) por prefijo corto: los prefijos de 1 a 3 letras abarcan
+        # demasiadas palabras para sumarlas en cada búsqueda
+        self.conteo_por_prefijo: Counter = Counter()
+
+    def agregar(self, entrada: _Entrada, ordenar: bool = True) -> None:
+        self.quitar(entrada.id_cliente)
+        self.entradas[entrada.id_cliente] = entrada
+        for token in entrada.tokens:
+            ids = self.ids_por_token.get(token)
+            if ids is None:
+                ids = self.ids_por_token[token] = set()
+                # Los trigramas se calculan sobre la palabra con un espacio a cada lado,
+                # para que también cuenten el inicio y el final de la palabra
+                for trigrama in _trigramas(f" {token} "):
+                    self.tokens_por_trigrama.setdefault(trigrama, set()).add(token)
+                if ordenar:
+                    insort(self.tokens_ordenados, token)
+                else:
+                    self.tokens_ordenados.append(token)
+            ids.add(entrada.id_cliente)
+            for largo in range(1, min(len(token), LARGO_PREFIJOS_CONTADOS) + 1):
+                self.conteo_por_prefijo[token[:largo]] += 1
+        if entrada.dni_n:
+            if ordenar:
+                insort(self.dnis, (entrada.dni_n, entrada.id_cliente))
+            else:
+                self.dnis.append((entrada.dni_n, entrada.id_cliente))
+
+    def quitar(self, id_cliente: int) -> None:
+        entrada = self.entradas.pop(id_cliente, None)
+        if entrada is None:
+            return
+        for token in entrada.tokens:
+            ids = self.ids_por_token[token]
+            ids.discard(id_cliente)
+            for largo in range(1, min(len(token), LARGO_PREFIJOS_CONTADOS) + 1):
+                self.conteo_por_prefijo[token[:largo]] -= 1
+            if not ids:
+                del self.ids_por_token[token]
+                for trigrama in _trigramas(f" {token} "):
+                    tokens = self.tokens_por_trigrama[trigrama]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self.tokens_por_trigrama[trigrama]
+                del self.tokens_ordenados[bisect_left(self.tokens_ordenados, token)]
+        if entrada.dni_n:
+            posicion = bisect_left(self.dnis, (entrada.dni_n, id_cliente))
+            if posicion < len(self.dnis) and self.dnis[posicion] == (entrada.dni_n, id_cliente):
+                del self.dnis[posicion]
+
+    def ordenar(self) -> None:
+        self.tokens_ordenados.sort()
+        self.dnis.sort()
+
+    # --- Búsqueda ---
+
+    def _con_prefijo(self, palabra: str) -> List[str]:
+        """Palabras indexadas que empiezan con `palabra` (una porción de la lista ordenada)."""
+        inicio = bisect_left(self.tokens_ordenados, palabra)
+        return self.tokens_ordenados[inicio:bisect_left(self.tokens_ordenados, palabra + _ULTIMO_CARACTER, inicio)]
+
+    def _cantidad_clientes(self, tokens: Iterable[str]) -> int:
+        """Cota superior de los clientes con alguna de `tokens` (un cliente puede tener varias)."""
+        return sum(map(len, map(self.ids_por_token.__getitem__, tokens)))
+
+    def _cantidad_con_prefijo(self, palabra: str) -> int:
+        if len(palabra) <= LARGO_PREFIJOS_CONTADOS:
+            return self.conteo_por_prefijo[palabra]
+        return self._cantidad_clientes(self._con_prefijo(palabra))
+
+    def _tokens_que_contienen(self, palabra: str) -> Iterator[str]:
+        """Palabras indexadas que contienen `palabra`: primero las que empiezan con ella.
+
+        Es un generador: las que la contienen en el medio se calculan solo si
+        las de prefijo no alcanzaron para juntar los candidatos.
+        """
+        yield from self._con_prefijo(palabra)
+        if len(palabra) < 3:
+            return
+        conjuntos = sorted(
+            (self.tokens_por_trigrama.get(t, set()) for t in _trigramas(palabra)), key=len
+        )
+        if not conjuntos[0]:
+            return
+        contienen = [t for t in conjuntos[0].intersection(*conjuntos[1:]) if palabra in t and not t.startswith(palabra)]
+        yield from sorted(contienen, key=len)
+
+    def candidatos(self, consulta: str) -> List[_Entrada]:
+        if consulta.isdigit():
+            inicio = bisect_left(self.dnis, (consulta,))
+            fin = min(bisect_left(self.dnis, (consulta + _ULTIMO_CARACTER,), inicio), inicio + MAX_CANDIDATOS)
+            return [self.entradas[id_cliente] for _, id_cliente in self.dnis[inicio:fin]]
+
+        palabras = consulta.split()
+        if len(palabras) == 1:
+            guia, filtro, verificar = consulta, None, []
+            tokens = self._tokens_que_contienen(guia)
+        else:
+            # Con varias palabras ('juan gon') cada una es el prefijo de una palabra del
+            # cliente. Se recorre la más selectiva; las demás filtran por conjunto de ids
+            # o, si son muy comunes, se verifican cliente por cliente.
+            guia = self._mas_selectiva(palabras)
+            resto = list(palabras)
+            resto.remove(guia)
+            filtro, verificar = self._filtro(resto)
+            if filtro is not None and not filtro:
+                return self._candidatos_aproximados(palabras)
+            tokens = self._con_prefijo(guia)
+        resultado = self._juntar(tokens, filtro, verificar, MAX_CANDIDATOS)
+        if resultado or len(consulta) < 2:
+            return resultado
+
+        # Sin coincidencias: los errores de tipeo suelen estar hacia el final, así que
+        # se prueba con prefijos cada vez más cortos de la palabra guía
+        for largo in range(len(guia) - 1, 2, -1):
+            tokens = self._con_prefijo(guia[:largo])
+            resultado = self._juntar(tokens, filtro, verificar, MAX_CANDIDATOS_APROXIMADOS)
+            if resultado:
+                return resultado
+        return self._candidatos_aproximados(palabras)
+
+    def _mas_selectiva(self, palabras: List[str]) -> str:
+        """Palabra con menos clientes con ese prefijo (la más larga si empatan).
+
+        Con nombres comunes la más larga no alcanza: en 'agustina fe' conviene
+        recorrer los clientes con palabras 'fe...' y no todas las Agustinas.
+        """
+        return min(palabras, key=lambda p: (self._cantidad_con_prefijo(p), -len(p)))
+
+    def _filtro(self, resto: List[str]) -> Tuple[Optional[Set[int]], List[str]]:
+        """Clientes con palabras que empiezan con cada palabra de `resto` de hasta MAX_IDS_FILTRO clientes.
+
+        Retorna (ids, palabras a verificar cliente por cliente); ids es None si
+        ninguna palabra entró. Intersecar conjuntos es mucho más barato que revisar
+        cada cliente de la palabra guía cuando es un nombre común.
+        """
+        filtro, verificar = None, []
+        for palabra in resto:
+            if self._cantidad_con_prefijo(palabra) > MAX_IDS_FILTRO:
+                verificar.append(palabra)
+                continue
+            ids = set().union(*map(self.ids_por_token.__getitem__, self._con_prefijo(palabra)))
+            filtro = ids if filtro is None else filtro & ids
+        return filtro, verificar
+
+    def _juntar(
+        self, tokens: Iterable[str], filtro: Optional[Set[int]], verificar: List[str], maximo: int
+    ) -> List[_Entrada]:
+        # Prefijo de alguna palabra: al comienzo del texto o después de un espacio
+        pares = [(p, f" {p}") for p in verificar]
+        resultado, vistos = [], set()
+        for token in tokens:
+            ids = self.ids_por_token[token]
+            if filtro is not None:
+                ids = ids & filtro
+            if vistos:
+                ids = ids - vistos
+            for id_cliente in ids:
+                entrada = self.entradas[id_cliente]
+                texto = entrada.completo_n
+                if all(texto.startswith(p) or con_espacio in texto for p, con_espacio in pares):
+                    resultado.append(entrada)
+                    if len(resultado) >= maximo:
+                        return resultado
+            vistos |= ids
+        return resultado
+
+    def _candidatos_aproximados(self, palabras: List[str]) -> List[_Entrada]:
+        """Clientes con palabras que comparten más trigramas con la consulta.
+
+        Se cuentan primero los trigramas menos frecuentes y se corta al superar
+        `MAX_CONTEO_APROXIMADO` palabras contadas, para acotar el costo.
+        """
+        conjuntos = sorted(
+            (
+                self.tokens_por_trigrama[t]
+                for palabra in palabras
+                for t in _trigramas(f" {palabra} ")
+                if t in self.tokens_por_trigrama
+            ),
+            key=len,
+        )
+        compartidos: Counter = Counter()
+        contados = 0
+        for tokens in conjuntos:
+            if contados and contados + len(tokens) > MAX_CONTEO_APROXIMADO:
+                break
+            compartidos.update(tokens)
+            contados += len(tokens)
+        resultado = []
+        for token, _ in compartidos.most_common(MAX_CANDIDATOS_APROXIMADOS):
+            for id_cliente in self.ids_por_token[token]:
+                resultado.append(self.entradas[id_cliente])
+                if len(resultado) >= MAX_CANDIDATOS_APROXIMADOS:
+                    return resultado
+        return resultado
+
+
+def _entrada(id_cliente: int, nombre: str, apellido: str, dni: Optional[str]) -> _Entrada:
+    nombre_n, apellido_n = normalizar(nombre), normalizar(apellido)
+    return _Entrada(id_cliente, nombre, apellido, nombre_n, apellido_n, normalizar(dni), f"{nombre_n} {apellido_n}")
+
+
+def _puntuar(consulta: str, candidatos: List[_Entrada], limit: int) -> List[dict]:
+    """Top-k por ratio + bonus, calculando SequenceMatcher solo donde la cota lo justifica."""
+    numerica = consulta.isdigit()
+    acotados = []
+    for entrada in candidatos:
+        texto = entrada.dni_n if numerica else entrada.completo_n
+        if numerica:
+            empieza = entrada.dni_n.startswith(consulta)
+            contiene = consulta in entrada.dni_n
+        else:
+            empieza = entrada.nombre_n.startswith(consulta) or entrada.apellido_n.startswith(consulta)
+            contiene = consulta in entrada.nombre_n or consulta in entrada.apellido_n
+        bonus = (0.15 if empieza else 0.0) + (0.05 if contiene else 0.0)
+        cota = 2 * min(len(consulta), len(texto)) / (len(consulta) + len(texto)) + bonus
+        acotados.append((cota, bonus, texto, entrada))
+    acotados.sort(key=lambda x: x[0], reverse=True)
+
+    ratios: Dict[str, float] = {}  # homónimos: mismo texto, mismo ratio
+    mejores: List[Tuple[float, int, float, _Entrada]] = []  # heap mínimo de (score, -orden, ratio, entrada)
+    for orden, (cota, bonus, texto, entrada) in enumerate(acotados):
+        if len(mejores) == limit and cota <= mejores[0][0]:
+            break
+        ratio = ratios.get(texto)
+        if ratio is None:
+            comparador = SequenceMatcher(None, consulta, texto)
+            # quick_ratio también acota a ratio y es mucho más barato
+            if len(mejores) == limit and comparador.quick_ratio() + bonus <= mejores[0][0]:
+                continue
+            ratio = ratios[texto] = comparador.ratio()
+        item = (ratio + bonus, -orden, ratio, entrada)
+        if len(mejores) < limit:
+            heapq.heappush(mejores, item)
+        elif item > mejores[0]:
+            heapq.heapreplace(mejores, item)
+
+    return [
+        {
+            "id_cliente": entrada.id_cliente,
+            "nombre": entrada.nombre,
+            "apellido": entrada.apellido,
+            "similaridad": round(ratio, 4),
+        }
+        for score, _, ratio, entrada in sorted(mejores, reverse=True)
+    ]
+
+
+class IndiceClientes:
+    def __init__(self, ttl_segundos: float = INDICE_CLIENTES_TTL_SEGUNDOS):
+        self._ttl = ttl_segundos
+        self._lock = Lock()
+        self._lock_carga = Lock()
+        self._estructuras: Optional[_Estructuras] = None
+        # Escrituras recibidas mientras se reconstruye: se reaplican al índice nuevo
+        self._pendientes: Optional[list] = None
+        self._cargado_en = 0.0
+
+    @property
+    def cargado(self) -> bool:
+        return self._estructuras is not None
+
+    def cargar(self, db: Session) -> int:
+        """Construye el índice desde la DB y lo reemplaza. Retorna la cantidad de clientes."""
+        with self._lock_carga:
+            return self._cargar(db)
+
+    @property
+    def vencido(self) -> bool:
+        return time.monotonic() - self._cargado_en > self._ttl
+
+    def _cargar(self, db: Session) -> int:
+        # Lo escrito por otros procesos después de este momento puede no estar en la lectura
+        inicio = time.monotonic()
+        with self._lock:
+            self._pendientes = []
+        try:
+            nuevas = _Estructuras()
+            filas = (
+                db.query(Cliente.id_cliente, Cliente.nombre, Cliente.apellido, Cliente.dni)
+                .yield_per(TAMANIO_LOTE_CARGA)
+            )
+            for fila in filas:
+                nuevas.agregar(_entrada(*fila), ordenar=False)
+            nuevas.ordenar()
+            with self._lock:
+                for operacion, argumento in self._pendientes:
+                    if operacion == "agregar":
+                        nuevas.agregar(argumento)
+                    else:
+                        nuevas.quitar(argumento)
+                self._estructuras = nuevas
+                self._cargado_en = inicio
+                return len(nuevas.entradas)
+        finally:
+            with self._lock:
+                self._pendientes = None
+
+    def invalidar(self) -> None:
+        """Descarta el índice (p. ej. tras un seed); se reconstruye en la próxima búsqueda."""
+        with self._lock:
+            self._estructuras = None
+
+    def agregar(self, cliente) -> None:
+        """Alta o edición de un cliente (después del commit)."""
+        entrada = _entrada(cliente.id_cliente, cliente.nombre, cliente.apellido, cliente.dni)
+        with self._lock:
+            if self._estructuras is not None:
+                self._estructuras.agregar(entrada)
+            if self._pendientes is not None:
+                self._pendientes.append(("agregar", entrada))
+
+    def quitar(self, id_cliente: int) -> None:
+        with self._lock:
+            if self._estructuras is not None:
+                self._estructuras.quitar(id_cliente)
+            if self._pendientes is not None:
+                self._pendientes.append(("quitar", id_cliente))
+
+    def sugerir(self, db: Session, query: str, limit: int) -> List[dict]:
+        consulta = normalizar(query)
+        if not consulta:
+            return []
+        if not self.cargado:
+            with self._lock_carga:
+                if not self.cargado:
+                    self._cargar(db)
+        elif self.vencido and self._lock_carga.acquire(blocking=False):
+            try:
+                if self.vencido:
+                    self._cargar(db)
+            finally:
+                self._lock_carga.release()
+        with self._lock:
+            estructuras = self._estructuras
+            candidatos = estructuras.candidatos(consulta) if estructuras is not None else []
+        return _puntuar(consulta, candidatos, limit)
+
+
+indice_clientes = IndiceClientes()
@@ -0,0 +1,242 @@
+"""Períodos que bloquean a los vehículos y exclusión por vehículo al reservar.
+
+Un período bloqueante es un alquiler PENDIENTE, EN_CURSO o CHECKOUT, o un
+mantenimiento (con `fecha_fin` abierta o no). Las validaciones puntuales usan el
+calendario de ocupación (services/ocupacion.py); acá quedan:
+- las condiciones SQL de solapamiento sobre las tablas base,
+- el árbol de intervalos para validar lotes en memoria
+  (`cargar_periodos_vehiculos`),
+- `reservas_vehiculos`: el lock por vehículo (en proceso y en la DB) bajo el
+  que se verifica y se escribe.
+"""
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date
+from threading import Lock
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from anyio import to_thread
+from sqlalchemy import and_, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models import Alquiler, Mantenimiento, Vehiculo
+
+ESTADOS_ALQUILER_BLOQUEANTES = ["PENDIENTE", "EN_CURSO", "CHECKOUT"]
+
+# Vehículos cuyo lock ya tomó `bloquear_async` para la tarea actual
+_bloqueados_async: ContextVar[FrozenSet[int]] = ContextVar("vehiculos_bloqueados_async", default=frozenset())
+
+
+def alquiler_solapado(fecha_inicio: date, fecha_fin: date):
+    """Condición SQL: alquiler bloqueante que se solapa con [fecha_inicio, fecha_fin]."""
+    return and_(
+        Alquiler.estado.in_(ESTADOS_ALQUILER_BLOQUEANTES),
+        Alquiler.fecha_inicio <= fecha_fin,
+        Alquiler.fecha_fin >= fecha_inicio,
+    )
+
+
+def mantenimiento_solapado(fecha_inicio: date, fecha_fin: date):
+    """Condición SQL: mantenimiento (con o sin fecha de fin) que se solapa con [fecha_inicio, fecha_fin]."""
+    return and_(
+        Mantenimiento.fecha_inicio <= fecha_fin,
+        or_(Mantenimiento.fecha_fin.is_(None), Mantenimiento.fecha_fin >= fecha_inicio),
+    )
+
+
+@dataclass(frozen=True)
+class PeriodoBloqueante:
+    tipo: str  # "alquiler" | "mantenimiento"
+    id: int
+    fecha_inicio: date
+    fecha_fin: Optional[date]  # None: mantenimiento sin fecha de fin
+    detalle: Optional[str] = None  # estado del alquiler o tipo de mantenimiento
+
+    @property
+    def fin_efectivo(self) -> date:
+        return self.fecha_fin or date.max
+
+
+class ArbolIntervalos:
+    """Árbol de intervalos estático sobre un arreglo ordenado por fecha de inicio.
+
+    Cada posición `mid` es la raíz implícita del rango [lo, hi) y guarda el
+    máximo `fin` de ese rango, lo que permite podar subárboles completos.
+    """
+
+    def __init__(self, periodos: List[PeriodoBloqueante]):
+        self._periodos = sorted(periodos, key=lambda p: (p.fecha_inicio, p.id))
+        self._max_fin: List[date] = [date.min] * len(self._periodos)
+        self._construir(0, len(self._periodos))
+
+    def __len__(self) -> int:
+        return len(self._periodos)
+
+    def _construir(self, lo: int, hi: int) -> date:
+        if lo >= hi:
+            return date.min
+        mid = (lo + hi) // 2
+        self._max_fin[mid] = max(
+            self._periodos[mid].fin_efectivo,
+            self._construir(lo, mid),
+            self._construir(mid + 1, hi),
+        )
+        return self._max_fin[mid]
+
+    def solapados(self, fecha_inicio: date, fecha_fin: date) -> List[PeriodoBloqueante]:
+        """Períodos con inicio <= fecha_fin y (fin IS NULL o fin >= fecha_inicio).
+
+        Misma regla que `alquiler_solapado` / `mantenimiento_solapado`.
+        """
+        resultado: List[PeriodoBloqueante] = []
+        self._buscar(0, len(self._periodos), fecha_inicio, fecha_fin, resultado)
+        return resultado
+
+    def _buscar(self, lo: int, hi: int, fecha_inicio: date, fecha_fin: date, resultado: list) -> None:
+        if lo >= hi:
+            return
+        mid = (lo + hi) // 2
+        if self._max_fin[mid] < fecha_inicio:
+            return
+        self._buscar(lo, mid, fecha_inicio, fecha_fin, resultado)
+        periodo = self._periodos[mid]
+        if periodo.fecha_inicio > fecha_fin:
+            # Todo el subárbol derecho empieza todavía más tarde
+            return
+        if periodo.fin_efectivo >= fecha_inicio:
+            resultado.append(periodo)
+        self._buscar(mid + 1, hi, fecha_inicio, fecha_fin, resultado)
+
+
+class ReservasVehiculos:
+    def __init__(self):
+        self._lock = Lock()
+        self._locks_vehiculo: Dict[int, Lock] = {}
+
+    def _lock_vehiculo(self, id_vehiculo: int) -> Lock:
+        with self._lock:
+            return self._locks_vehiculo.setdefault(id_vehiculo, Lock())
+
+    @contextmanager
+    def bloquear(self, id_vehiculo: int):
+        """Serializa, dentro del proceso, verificar + escribir para un vehículo.
+
+        Operaciones sobre vehículos distintos siguen corriendo en paralelo. Si la
+        tarea async actual ya tiene el lock (`bloquear_async`), no lo vuelve a pedir.
+        """
+        if id_vehiculo in _bloqueados_async.get():
+            yield
+            return
+        with self._lock_vehiculo(id_vehiculo):
+            yield
+
+    @asynccontextmanager
+    async def bloquear_async(self, *ids_vehiculo: int):
+        """Los locks de `bloquear` para una tarea async, sin bloquear el event loop.
+
+        Cada lock se espera en un hilo del threadpool: el loop sigue atendiendo a
+        las tareas que tienen otros vehículos y esperan a la DB, que pueden ser
+        justo las que un hilo sync espera para soltar el suyo. Dentro del bloque,
+        `bloquear` (p. ej. desde `reservar` en `AsyncSession.run_sync`) no los
+        vuelve a pedir. Se toman en orden de id, como en `reservar`.
+        """
+        ids = sorted({i for i in ids_vehiculo if i is not None})
+        tomados: List[Lock] = []
+        try:
+            for id_vehiculo in ids:
+                lock_vehiculo = self._lock_vehiculo(id_vehiculo)
+                # Sin cancelación a mitad de espera: el lock tomado siempre queda en `tomados`
+                await to_thread.run_sync(lock_vehiculo.acquire)
+                tomados.append(lock_vehiculo)
+            token = _bloqueados_async.set(_bloqueados_async.get() | set(ids))
+            try:
+                yield
+            finally:
+                _bloqueados_async.reset(token)
+        finally:
+            for lock_vehiculo in reversed(tomados):
+                lock_vehiculo.release()
+
+    @contextmanager
+    def reservar(self, db: Session, *ids_vehiculo: int):
+        """Exclusión por vehículo para verificar disponibilidad y escribir, también entre procesos.
+
+        - En el proceso: los locks de `bloquear`, tomados en orden de id.
+        - En la DB: SELECT ... FOR UPDATE sobre las filas de `vehiculo`, en el
+          mismo orden; se liberan con el commit o rollback de la sesión. SQLite
+          no tiene FOR UPDATE: ahí alcanza con el lock del proceso.
+
+        Tiene que ser la primera consulta de la transacción: en MySQL (REPEATABLE
+        READ) la foto de las lecturas se toma en la primera lectura sin lock, y
+        así incluye las reservas que otro proceso confirmó mientras se esperaba.
+
+        Reservas sobre vehículos distintos no se esperan entre sí. Ante una
+        excepción se hace rollback para soltar las filas enseguida.
+        Retorna el conjunto de ids de vehículo que existen.
+        """
+        ids = sorted({i for i in ids_vehiculo if i is not None})
+        with ExitStack() as locks:
+            for id_vehiculo in ids:
+                locks.enter_context(self.bloquear(id_vehiculo))
+            try:
+                existentes: Set[int] = set(
+                    db.scalars(
+                        select(Vehiculo.id_vehiculo)
+                        .where(Vehiculo.id_vehiculo.in_(ids))
+                        .order_by(Vehiculo.id_vehiculo)
+                        .with_for_update()
+                    )
+                ) if ids else set()
+                yield existentes
+            except BaseException:
+                db.rollback()
+                raise
+
+
+def cargar_periodos_vehiculos(
+    db: Session,
+    ids_vehiculo,
+    fecha_inicio: date,
+    fecha_fin: date,
+) -> Dict[int, ArbolIntervalos]:
+    """Períodos bloqueantes de varios vehículos que tocan [fecha_inicio, fecha_fin], en una sola consulta.
+
+    Pensado para validaciones por lote, en memoria.
+    """
+    ids_vehiculo = list(ids_vehiculo)
+    if not ids_vehiculo:
+        return {}
+    consulta = union_all(
+        select(
+            literal("alquiler").label("tipo"),
+            Alquiler.id_vehiculo,
+            Alquiler.id_alquiler.label("id"),
+            Alquiler.fecha_inicio,
+            Alquiler.fecha_fin,
+            Alquiler.estado.label("detalle"),
+        ).where(
+            Alquiler.id_vehiculo.in_(ids_vehiculo),
+            alquiler_solapado(fecha_inicio, fecha_fin),
+        ),
+        select(
+            literal("mantenimiento").label("tipo"),
+            Mantenimiento.id_vehiculo,
+            Mantenimiento.id_mantenimiento.label("id"),
+            Mantenimiento.fecha_inicio,
+            Mantenimiento.fecha_fin,
+            Mantenimiento.tipo.label("detalle"),
+        ).where(
+            Mantenimiento.id_vehiculo.in_(ids_vehiculo),
+            mantenimiento_solapado(fecha_inicio, fecha_fin),
+        ),
+    )
+    periodos: Dict[int, List[PeriodoBloqueante]] = {id_vehiculo: [] for id_vehiculo in ids_vehiculo}
+    for fila in db.execute(consulta):
+        periodos[fila.id_vehiculo].append(
+            PeriodoBloqueante(fila.tipo, fila.id, fila.fecha_inicio, fila.fecha_fin, fila.detalle)
+        )
+    return {id_vehiculo: ArbolIntervalos(lista) for id_vehiculo, lista in periodos.items()}
+
+
+reservas_vehiculos = ReservasVehiculos()
@@ -1,13 +1,23 @@
-from sqlalchemy import or_
+import time
+from sqlalchemy import exists, or_, update
 from datetime import date
 from sqlalchemy.orm import Session
 
-from ..models import Vehiculo, Empleado, Alquiler, Mantenimiento, EstadoVehiculo
+from ..models import Vehiculo, Empleado, Alquiler, Mantenimiento
 from .exceptions import DomainNotFound, BusinessRuleError
+from . import ocupacion, ranking_vehiculos, resumen_mensual
+from .indice_disponibilidad import reservas_vehiculos
+from .cache_reportes import cache_reportes
+from .paginacion import paginar
+from .carga import CARGA_MANTENIMIENTO
+from .marcas_proceso import guardar_marca, leer_marca
+from .catalogos import catalogo_vehiculos
 
+MARCA_MANTENIMIENTOS = "vehiculos_disponibles_por_mantenimientos"
 
-def list_mantenimientos(db: Session, vehiculo=None, tipo=None, empleado=None, estado=None):
-    """Devuelve una lista de mantenimientos filtrados por los parámetros opcionales."""
+
+def list_mantenimientos(db: Session, vehiculo=None, tipo=None, empleado=None, estado=None, limit=None, cursor=None, campos=None):
+    """Devuelve (mantenimientos, cursor_siguiente) filtrados por los parámetros opcionales."""
     query = db.query(Mantenimiento)
 
     if vehiculo is not None:
@@ -27,7 +37,8 @@ def list_mantenimientos(db: Session, vehiculo=None, tipo=None, empleado=None, es
         elif estado_norm == "finalizado":
             query = query.filter(Mantenimiento.fecha_fin != None, Mantenimiento.fecha_fin <= hoy)
 
-    return query.all()
+    orden = [(Mantenimiento.id_mantenimiento, False)]
+    return paginar(query, Mantenimiento, orden, limit=limit, cursor=cursor, campos=campos, opciones=CARGA_MANTENIMIENTO)
 
 
 def get_mantenimiento(db: Session, id_mantenimiento: int) -> Mantenimiento:
@@ -47,62 +58,66 @@ def create_mantenimiento(db: Session, mantenimiento_in) -> Mantenimiento:
     de HTTPExceptions para que la capa de presentación decida la respuesta HTTP.
     """
     try:
-        # validar vehículo
-        vehiculo = db.query(Vehiculo).filter(Vehiculo.id_vehiculo == mantenimiento_in.id_vehiculo).first()
-        if not vehiculo:
-            raise DomainNotFound("Vehículo no encontrado")
-
-        # validar rango de fechas
-        if mantenimiento_in.fecha_fin is not None and mantenimiento_in.fecha_inicio > mantenimiento_in.fecha_fin:
-            raise BusinessRuleError("Rango de fechas inválido: fecha de inicio debe ser menor a fecha de fin")
-
-        # validar empleado si se proporciona
-        if mantenimiento_in.id_empleado:
-            empleado = db.query(Empleado).filter(Empleado.id_empleado == mantenimiento_in.id_empleado).first()
-            if not empleado:
-                raise DomainNotFound("Empleado no encontrado")
-
-        # No permitir crear mantenimiento si el vehículo tiene un alquiler EN_CURSO o en CHECKOUT
-        alquiler_activo = db.query(Alquiler).filter(
-            Alquiler.id_vehiculo == mantenimiento_in.id_vehiculo,
-            Alquiler.estado.in_(["EN_CURSO", "CHECKOUT"])
-        ).first()
-        if alquiler_activo:
-            raise BusinessRuleError("No se puede crear mantenimiento: el vehículo tiene un alquiler en curso o en checkout")
+        # Vehículo reservado (lock en proceso + FOR UPDATE) mientras se cancelan sus
+        # reservas pendientes, para no competir con un alta de alquiler concurrente
+        with reservas_vehiculos.reservar(db, mantenimiento_in.id_vehiculo):
+            # validar vehículo
+            vehiculo = db.query(Vehiculo).filter(Vehiculo.id_vehiculo == mantenimiento_in.id_vehiculo).first()
+            if not vehiculo:
+                raise DomainNotFound("Vehículo no encontrado")
 
-        # crear mantenimiento
-        nuevo_mantenimiento = Mantenimiento(**mantenimiento_in.model_dump())
-        db.add(nuevo_mantenimiento)
-        db.flush()  # obtener id si es necesario
+            # validar rango de fechas
+            if mantenimiento_in.fecha_fin is not None and mantenimiento_in.fecha_inicio > mantenimiento_in.fecha_fin:
+                raise BusinessRuleError("Rango de fechas inválido: fecha de inicio debe ser menor a fecha de fin")
 
-        # Si el mantenimiento está "en curso" (fecha_fin es None o > hoy), poner estado del vehículo en "Mantenimiento"
-        hoy = date.today()
-        en_curso = (
-            mantenimiento_in.fecha_fin is None or mantenimiento_in.fecha_fin > hoy
-        )
-        if en_curso:
-            estado_mantenimiento = db.query(EstadoVehiculo).filter(EstadoVehiculo.nombre == "Mantenimiento").first()
-            if not estado_mantenimiento:
-                raise DomainNotFound("No existe el estado 'Mantenimiento' en la tabla estado_vehiculo")
-            vehiculo.id_estado = estado_mantenimiento.id_estado
-            db.add(vehiculo)
+            # validar empleado si se proporciona
+            if mantenimiento_in.id_empleado:
+                empleado = db.query(Empleado).filter(Empleado.id_empleado == mantenimiento_in.id_empleado).first()
+                if not empleado:
+                    raise DomainNotFound("Empleado no encontrado")
 
-        # cancelar reservas futuras PENDIENTE si corresponde
-        reservas_futuras = db.query(Alquiler).filter(
-            Alquiler.id_vehiculo == mantenimiento_in.id_vehiculo,
-            Alquiler.estado == "PENDIENTE",
-            Alquiler.fecha_inicio >= hoy
-        ).all()
-
-        for reserva in reservas_futuras:
-            afecta = False
-            if mantenimiento_in.fecha_fin is None:
-                afecta = True
-            else:
-                if mantenimiento_in.fecha_fin >= reserva.fecha_inicio:
-                    afecta = True
-
-            if afecta:
+            # No permitir crear mantenimiento si el vehículo tiene un alquiler EN_CURSO o en CHECKOUT
+            alquiler_activo = db.query(Alquiler).filter(
+                Alquiler.id_vehiculo == mantenimiento_in.id_vehiculo,
+                Alquiler.estado.in_(["EN_CURSO", "CHECKOUT"])
+            ).first()
+            if alquiler_activo:
+                raise BusinessRuleError("No se puede crear mantenimiento: el vehículo tiene un alquiler en curso o en checkout")
+
+            # crear mantenimiento
+            nuevo_mantenimiento = Mantenimiento(**mantenimiento_in.model_dump())
+            db.add(nuevo_mantenimiento)
+            db.flush()  # obtener id si es necesario
+
+            # Si el mantenimiento está "en curso" (fecha_fin es None o > hoy), poner estado del vehículo en "Mantenimiento"
+            hoy = date.today()
+            en_curso = (
+                mantenimiento_in.fecha_fin is None or mantenimiento_in.fecha_fin > hoy
+            )
+            if en_curso:
+                estado_mantenimiento = catalogo_vehiculos.estado_por_nombre(db, "Mantenimiento")
+                if not estado_mantenimiento:
+                    raise DomainNotFound("No existe el estado 'Mantenimiento' en la tabla estado_vehiculo")
+                vehiculo.id_estado = estado_mantenimiento.id_estado
+                db.add(vehiculo)
+
+            # cancelar reservas futuras PENDIENTE que se solapan con el mantenimiento
+            # (búsqueda de rango en el calendario de ocupación)
+            ids_solapados = ocupacion.alquileres_solapados(
+                db,
+                mantenimiento_in.id_vehiculo,
+                mantenimiento_in.fecha_inicio,
+                mantenimiento_in.fecha_fin,
+                ["PENDIENTE"],
+            )
+            reservas_futuras = db.query(Alquiler).filter(
+                Alquiler.id_alquiler.in_(ids_solapados),
+                Alquiler.fecha_inicio >= hoy
+            ).all() if ids_solapados else []
+
+            contribuciones_anteriores = [resumen_mensual.contribucion_alquiler(db, r) for r in reservas_futuras]
+            for reserva in reservas_futuras:
+                ranking_vehiculos.registrar_cambio(db, ranking_vehiculos.clave_alquiler(reserva), None)
                 reserva.estado = "CANCELADO"
                 reserva.motivo_cancelacion = "Vehículo en mantenimiento"
                 reserva.fecha_cancelacion = hoy
@@ -110,10 +125,17 @@ def create_mantenimiento(db: Session, mantenimiento_in) -> Mantenimiento:
                     reserva.id_empleado_cancelador = mantenimiento_in.id_empleado
                 db.add(reserva)
 
-        db.commit()
-        db.refresh(nuevo_mantenimiento)
-
-        return nuevo_mantenimiento
+            db.flush()
+            for reserva, anterior in zip(reservas_futuras, contribuciones_anteriores):
+                resumen_mensual.registrar_cambio(db, anterior, resumen_mensual.contribucion_alquiler(db, reserva))
+            ocupacion.registrar_mantenimientos(db, nuevo_mantenimiento)
+            ocupacion.registrar_alquileres(db, *reservas_futuras)
+            db.commit()
+            # Las reservas canceladas salen del ranking de vehículos más alquilados
+            cache_reportes.invalidar("mantenimientos", "alquileres")
+            db.refresh(nuevo_mantenimiento)
+
+            return nuevo_mantenimiento
     except (DomainNotFound, BusinessRuleError):
         db.rollback()
         raise
@@ -168,13 +190,20 @@ def update_mantenimiento(db: Session, id_mantenimiento: int, mantenimiento_in) -
             # Buscar el vehículo actualizado
             vehiculo_id = update_data.get("id_vehiculo", mantenimiento.id_vehiculo)
             vehiculo = db.query(Vehiculo).filter(Vehiculo.id_vehiculo == vehiculo_id).first()
-            estado_mantenimiento = db.query(EstadoVehiculo).filter(EstadoVehiculo.nombre == "Mantenimiento").first()
+            estado_mantenimiento = catalogo_vehiculos.estado_por_nombre(db, "Mantenimiento")
             if not estado_mantenimiento:
                 raise DomainNotFound("No existe el estado 'Mantenimiento' en la tabla estado_vehiculo")
             vehiculo.id_estado = estado_mantenimiento.id_estado
             db.add(vehiculo)
+        else:
+            # Una fecha_fin ya pasada puede quedar detrás de la marca de agua del job nocturno
+            db.flush()
+            _liberar_vehiculos(db, hoy, Mantenimiento.id_mantenimiento == mantenimiento.id_mantenimiento)
 
+        db.flush()
+        ocupacion.registrar_mantenimientos(db, mantenimiento)
         db.commit()
+        cache_reportes.invalidar("mantenimientos")
         db.refresh(mantenimiento)
         return mantenimiento
     except (DomainNotFound, BusinessRuleError):
@@ -185,33 +214,60 @@ def update_mantenimiento(db: Session, id_mantenimiento: int, mantenimiento_in) -
         raise
 
 
-def actualizar_vehiculos_disponibles_por_mantenimientos(db: Session):
-    """
-    Actualiza el estado de los vehículos a 'Disponible' si su mantenimiento finalizó (fecha_fin <= hoy)
-    y el vehículo sigue en estado 'Mantenimiento'.
+def _liberar_vehiculos(db: Session, hoy: date, *filtros_mantenimiento) -> int:
+    """Pasa a 'Disponible' los vehículos en 'Mantenimiento' con un mantenimiento finalizado
+    (fecha_fin <= hoy, más `filtros_mantenimiento`) y ningún otro mantenimiento abierto.
+
+    Es un único UPDATE ... WHERE EXISTS / NOT EXISTS. Retorna la cantidad de vehículos actualizados.
     """
-    hoy = date.today()
-    estado_disponible = db.query(EstadoVehiculo).filter(EstadoVehiculo.nombre == "Disponible").first()
-    estado_mantenimiento = db.query(EstadoVehiculo).filter(EstadoVehiculo.nombre == "Mantenimiento").first()
+    estado_disponible = catalogo_vehiculos.estado_por_nombre(db, "Disponible")
+    estado_mantenimiento = catalogo_vehiculos.estado_por_nombre(db, "Mantenimiento")
     if not estado_disponible or not estado_mantenimiento:
         raise DomainNotFound("No existe el estado 'Disponible' o 'Mantenimiento' en la tabla estado_vehiculo")
 
-    # Buscar mantenimientos finalizados (fecha_fin <= hoy) y su vehículo sigue en estado 'Mantenimiento'
-    mantenimientos_finalizados = db.query(Mantenimiento).filter(
-        Mantenimiento.fecha_fin != None,
-        Mantenimiento.fecha_fin <= hoy
-    ).all()
+    finalizado = exists().where(
+        Mantenimiento.id_vehiculo == Vehiculo.id_vehiculo,
+        Mantenimiento.fecha_fin <= hoy,
+        *filtros_mantenimiento,
+    )
+    abierto = exists().where(
+        Mantenimiento.id_vehiculo == Vehiculo.id_vehiculo,
+        or_(Mantenimiento.fecha_fin == None, Mantenimiento.fecha_fin > hoy),
+    )
+    resultado = db.execute(
+        update(Vehiculo)
+        .where(Vehiculo.id_estado == estado_mantenimiento.id_estado, finalizado, ~abierto)
+        .values(id_estado=estado_disponible.id_estado)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount
+
+
+def actualizar_vehiculos_disponibles_por_mantenimientos(db: Session) -> dict:
+    """
+    Actualiza el estado de los vehículos a 'Disponible' si su mantenimiento finalizó (fecha_fin <= hoy),
+    el vehículo sigue en estado 'Mantenimiento' y no tiene otro mantenimiento abierto.
 
-    actualizados = 0
-    for mantenimiento in mantenimientos_finalizados:
-        vehiculo = db.query(Vehiculo).filter(Vehiculo.id_vehiculo == mantenimiento.id_vehiculo).first()
-        if vehiculo and vehiculo.id_estado == estado_mantenimiento.id_estado:
-            vehiculo.id_estado = estado_disponible.id_estado
-            db.add(vehiculo)
-            actualizados += 1
+    Solo mira los mantenimientos que finalizaron desde la corrida anterior (marca de agua
+    persistida en marca_proceso), así el costo depende de los cambios y no de todo el histórico.
+    Los mantenimientos editados con una fecha_fin ya pasada se resuelven en update_mantenimiento.
+    Retorna las estadísticas de la corrida.
+    """
+    inicio = time.perf_counter()
+    hoy = date.today()
+    desde = leer_marca(db, MARCA_MANTENIMIENTOS)
 
+    filtros = [Mantenimiento.fecha_fin > desde] if desde is not None else []
+    actualizados = _liberar_vehiculos(db, hoy, *filtros)
+    guardar_marca(db, MARCA_MANTENIMIENTOS, hoy)
     db.commit()
-    return actualizados
+
+    return {
+        "actualizados": actualizados,
+        "desde": desde,
+        "hasta": hoy,
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 3),
+    }
 
 
 def delete_mantenimiento(db: Session, id_mantenimiento: int):
@@ -230,13 +286,15 @@ def delete_mantenimiento(db: Session, id_mantenimiento: int):
         db.delete(mantenimiento)
 
         if en_curso and vehiculo:
-            estado_disponible = db.query(EstadoVehiculo).filter(EstadoVehiculo.nombre == "Disponible").first()
+            estado_disponible = catalogo_vehiculos.estado_por_nombre(db, "Disponible")
             if not estado_disponible:
                 raise DomainNotFound("No existe el estado 'Disponible' en la tabla estado_vehiculo")
             vehiculo.id_estado = estado_disponible.id_estado
             db.add(vehiculo)
 
+        ocupacion.quitar(db, ocupacion.MANTENIMIENTO, id_mantenimiento)
         db.commit()
+        cache_reportes.invalidar("mantenimientos")
         return True
     except DomainNotFound:
         db.rollback()
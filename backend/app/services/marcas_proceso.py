@@ -0,0 +1,18 @@
+"""Marcas de agua de los jobs incrementales (tabla marca_proceso)."""
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..models import MarcaProceso
+
+
+def leer_marca(db: Session, nombre: str) -> Optional[date]:
+    """Última fecha procesada por el job `nombre`; None si nunca corrió."""
+    marca = db.get(MarcaProceso, nombre)
+    return marca.procesado_hasta if marca else None
+
+
+def guardar_marca(db: Session, nombre: str, procesado_hasta: date) -> None:
+    """Registra la marca en la sesión; se persiste con el commit del job."""
+    db.merge(MarcaProceso(nombre=nombre, procesado_hasta=procesado_hasta, actualizado_en=datetime.now()))
@@ -1,10 +1,14 @@
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import date, datetime
 
 from ..models import MultaDanio, Alquiler
 from .exceptions import DomainNotFound, BusinessRuleError
+from .paginacion import paginar
+from .carga import CARGA_MULTA
+from . import resumen_mensual
+from .cache_reportes import cache_reportes
 from ..schemas.multas_danios import MultaDanioOut
 
 
@@ -16,7 +20,10 @@ def listar_multas_danios(
     monto_hasta: Optional[float] = None,
     fecha_desde: Optional[date] = None,
     fecha_hasta: Optional[date] = None,
-) -> list[MultaDanio]:
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    campos: Optional[List[str]] = None,
+) -> Tuple[list, Optional[str]]:
     """Listar todas las multas y daños con filtros opcionales"""
     query = db.query(MultaDanio)
 
@@ -33,9 +40,10 @@ def listar_multas_danios(
     if fecha_hasta is not None:
         query = query.filter(MultaDanio.fecha_registro <= fecha_hasta)
 
-    query = query.order_by(MultaDanio.fecha_registro.desc())
-
-    return query.all()
+    # Más recientes primero. fecha_registro admite NULL (la edición lo permite) y
+    # no sirve como clave de cursor; el id crece en el orden en que se registran
+    orden = [(MultaDanio.id_multa_danio, True)]
+    return paginar(query, MultaDanio, orden, limit=limit, cursor=cursor, campos=campos, opciones=CARGA_MULTA)
 
 
 def get_multa_danio_by_id(db: Session, id_multa_danio: int) -> MultaDanio:
@@ -53,6 +61,8 @@ def crear_multa_danio(db: Session, multa_danio_in) -> MultaDanio:
     if not alquiler:
         raise HTTPException(status_code=400, detail="Alquiler no encontrado")
     
+    contribucion_anterior = resumen_mensual.contribucion_alquiler(db, alquiler)
+
     # Crear la multa/daño con fecha_registro automática
     data = multa_danio_in.dict()
     data["fecha_registro"] = datetime.now()
@@ -62,8 +72,13 @@ def crear_multa_danio(db: Session, multa_danio_in) -> MultaDanio:
     
     # Actualizar el costo_total del alquiler sumando el monto de la multa
     alquiler.costo_total = float(alquiler.costo_total or 0) + float(multa_danio_in.monto)
-    
+
+    db.flush()
+    resumen_mensual.registrar_cambio(
+        db, contribucion_anterior, resumen_mensual.contribucion_alquiler(db, alquiler)
+    )
     db.commit()
+    cache_reportes.invalidar("multas")
     db.refresh(nueva_multa)
     return nueva_multa
 
@@ -75,7 +90,7 @@ def listar_multas_por_alquiler(db: Session, id_alquiler: int) -> list[MultaDanio
     if not alquiler:
         raise HTTPException(status_code=404, detail="Alquiler no encontrado")
     
-    return db.query(MultaDanio).filter(MultaDanio.id_alquiler == id_alquiler).all()
+    return db.query(MultaDanio).options(*CARGA_MULTA).filter(MultaDanio.id_alquiler == id_alquiler).all()
 
 
 def actualizar_multa_danio(db: Session, id_multa_danio: int, multa_danio_in: dict) -> MultaDanio:
@@ -89,6 +104,7 @@ def actualizar_multa_danio(db: Session, id_multa_danio: int, multa_danio_in: dic
     
     # Obtener el alquiler para actualizar el costo_total
     alquiler = db.query(Alquiler).filter(Alquiler.id_alquiler == multa_danio.id_alquiler).first()
+    afectados = [(alquiler, resumen_mensual.contribucion_alquiler(db, alquiler))]
     
     # Si cambia el monto, actualizar el costo_total del alquiler
     monto_anterior = float(multa_danio.monto)
@@ -100,6 +116,7 @@ def actualizar_multa_danio(db: Session, id_multa_danio: int, multa_danio_in: dic
         nuevo_alquiler = db.query(Alquiler).filter(Alquiler.id_alquiler == data["id_alquiler"]).first()
         if not nuevo_alquiler:
             raise HTTPException(status_code=400, detail="Alquiler no encontrado")
+        afectados.append((nuevo_alquiler, resumen_mensual.contribucion_alquiler(db, nuevo_alquiler)))
         
         # Restar del alquiler anterior y sumar al nuevo
         alquiler.costo_total = float(alquiler.costo_total or 0) - monto_anterior
@@ -111,8 +128,14 @@ def actualizar_multa_danio(db: Session, id_multa_danio: int, multa_danio_in: dic
     
     for field, value in data.items():
         setattr(multa_danio, field, value)
-    
+
+    db.flush()
+    for alquiler_afectado, contribucion_anterior in afectados:
+        resumen_mensual.registrar_cambio(
+            db, contribucion_anterior, resumen_mensual.contribucion_alquiler(db, alquiler_afectado)
+        )
     db.commit()
+    cache_reportes.invalidar("multas")
     db.refresh(multa_danio)
     return multa_danio
 
@@ -129,9 +152,15 @@ def eliminar_multa_danio(db: Session, id_multa_danio: int) -> None:
     
     # Actualizar el costo_total del alquiler restando el monto de la multa
     alquiler = db.query(Alquiler).get(multa_danio.id_alquiler)
+    contribucion_anterior = resumen_mensual.contribucion_alquiler(db, alquiler)
     if alquiler:
         alquiler.costo_total = float(alquiler.costo_total or 0) - float(multa_danio.monto)
     
     db.delete(multa_danio)
+    db.flush()
+    resumen_mensual.registrar_cambio(
+        db, contribucion_anterior, resumen_mensual.contribucion_alquiler(db, alquiler)
+    )
     db.commit()
+    cache_reportes.invalidar("multas")
     return None
@@ -0,0 +1,506 @@
+"""Calendario de ocupación materializado (tabla ocupacion_vehiculo).
+
+Una fila por (vehículo, día, período que lo ocupa): los días de cada alquiler
+no cancelado y de cada mantenimiento. Así, "¿está libre el vehículo entre A y
+B?" o "¿qué vehículos están ocupados el día X?" son búsquedas de rango sobre la
+clave (id_vehiculo, dia) o el índice (dia, id_vehiculo), filtrando los períodos
+que bloquean (mantenimientos y alquileres PENDIENTE, EN_CURSO o CHECKOUT), en
+lugar de comparar los rangos de fechas de todos los alquileres y mantenimientos.
+
+Los mantenimientos sin fecha de fin se materializan hasta un horizonte
+(OCUPACION_HORIZONTE_DIAS desde hoy, guardado como marca de proceso) que el job
+diario extiende; las consultas que pasan el horizonte completan con esos
+mantenimientos desde la tabla base.
+
+Mantenimiento incremental: cada servicio que escribe alquileres o
+mantenimientos llama a `registrar_alquileres` / `registrar_mantenimientos`
+(reemplazan los días del período) o `quitar` dentro de su transacción, y las
+transiciones por conjunto a `registrar_transicion` antes del UPDATE.
+`reconstruir` recalcula la tabla completa y `verificar` la compara contra las
+tablas base (ver reconstruir_ocupacion.py).
+
+ocupacion_vehiculo_mensual agrupa el calendario por (vehículo, año, mes): días
+con algún alquiler y sin mantenimiento, y días en mantenimiento. Cada escritura
+del calendario la recalcula, con una consulta agrupada, en los meses que tocó de
+cada vehículo. `dias_por_vehiculo` (utilización) suma los meses completos de una
+ventana y agrupa desde el calendario solo los días de los extremos.
+"""
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, delete, exists, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.orm import Session
+
+from ..models import Alquiler, Mantenimiento, OcupacionVehiculo, OcupacionVehiculoMensual, Vehiculo
+from .indice_disponibilidad import ESTADOS_ALQUILER_BLOQUEANTES, PeriodoBloqueante
+from .marcas_proceso import guardar_marca, leer_marca
+from .rangos_fecha import mes_siguiente
+
+HORIZONTE_DIAS = int(os.getenv("OCUPACION_HORIZONTE_DIAS", "730"))
+MARCA_HORIZONTE = "ocupacion_horizonte"
+# Fecha de la última reconstrucción con la tabla mensual; sin ella el calendario
+# es anterior y solo tiene los alquileres que bloquean
+MARCA_MENSUAL = "ocupacion_mensual"
+
+ALQUILER = "alquiler"
+MANTENIMIENTO = "mantenimiento"
+
+# Alquileres que no ocupan el vehículo: no tienen filas en el calendario
+ESTADOS_ALQUILER_EXCLUIDOS = ["CANCELADO"]
+
+TAMANIO_LOTE = 5000
+# Vehículos por sentencia al recalcular meses (un OR por vehículo)
+LOTE_VEHICULOS = 200
+
+# (id_vehiculo, dia, origen, id_origen, estado)
+Fila = Tuple[int, date, str, int, Optional[str]]
+# id_vehiculo -> (primer día, último día) tocados por una escritura
+Rangos = Dict[int, Tuple[date, date]]
+
+O = OcupacionVehiculo
+M = OcupacionVehiculoMensual
+
+# Filas que impiden reservar el vehículo ese día
+BLOQUEA = or_(O.origen == MANTENIMIENTO, O.estado.in_(ESTADOS_ALQUILER_BLOQUEANTES))
+
+
+def _dias(inicio: date, fin: date) -> Iterable[date]:
+    for i in range((fin - inicio).days + 1):
+        yield inicio + timedelta(days=i)
+
+
+def _filas_alquiler(id_alquiler, id_vehiculo, fecha_inicio, fecha_fin, estado) -> List[Fila]:
+    if estado in ESTADOS_ALQUILER_EXCLUIDOS:
+        return []
+    return [(id_vehiculo, dia, ALQUILER, id_alquiler, estado) for dia in _dias(fecha_inicio, fecha_fin)]
+
+
+def _filas_mantenimiento(id_mantenimiento, id_vehiculo, fecha_inicio, fecha_fin, tipo, horizonte: date) -> List[Fila]:
+    return [
+        (id_vehiculo, dia, MANTENIMIENTO, id_mantenimiento, tipo)
+        for dia in _dias(fecha_inicio, fecha_fin or horizonte)
+    ]
+
+
+def _insertar(db: Session, filas: List[Fila]) -> None:
+    columnas = ("id_vehiculo", "dia", "origen", "id_origen", "estado")
+    for i in range(0, len(filas), TAMANIO_LOTE):
+        db.execute(insert(O), [dict(zip(columnas, fila)) for fila in filas[i:i + TAMANIO_LOTE]])
+
+
+def horizonte(db: Session) -> date:
+    """Último día materializado de los mantenimientos sin fecha de fin."""
+    return leer_marca(db, MARCA_HORIZONTE) or date.today() + timedelta(days=HORIZONTE_DIAS)
+
+
+def registrar_alquileres(db: Session, *alquileres: Alquiler) -> None:
+    """Reemplaza los días de los alquileres (con id asignado) según su estado y fechas actuales.
+
+    No hace commit: debe llamarse dentro de la transacción de la escritura.
+    """
+    if not alquileres:
+        return
+    _reemplazar(db, ALQUILER, [a.id_alquiler for a in alquileres], [
+        fila
+        for a in alquileres
+        for fila in _filas_alquiler(a.id_alquiler, a.id_vehiculo, a.fecha_inicio, a.fecha_fin, a.estado)
+    ])
+
+
+def registrar_mantenimientos(db: Session, *mantenimientos: Mantenimiento) -> None:
+    """Reemplaza los días de los mantenimientos (con id asignado). No hace commit."""
+    if not mantenimientos:
+        return
+    hasta = horizonte(db)
+    _reemplazar(db, MANTENIMIENTO, [m.id_mantenimiento for m in mantenimientos], [
+        fila
+        for m in mantenimientos
+        for fila in _filas_mantenimiento(m.id_mantenimiento, m.id_vehiculo, m.fecha_inicio, m.fecha_fin, m.tipo, hasta)
+    ])
+
+
+def quitar(db: Session, origen: str, *ids_origen: int) -> None:
+    """Borra los días de alquileres o mantenimientos eliminados. No hace commit."""
+    if ids_origen:
+        _reemplazar(db, origen, list(ids_origen), [])
+
+
+def registrar_transicion(db: Session, estado_nuevo: str, *filtros) -> None:
+    """Lleva al calendario un UPDATE por conjunto de alquileres a `estado_nuevo`.
+
+    Debe llamarse antes del UPDATE, con los mismos filtros, en la misma transacción.
+    Entre estados que ocupan el vehículo solo cambia el estado de las filas.
+    """
+    afectados = O.origen == ALQUILER, O.id_origen.in_(select(Alquiler.id_alquiler).where(*filtros))
+    if estado_nuevo in ESTADOS_ALQUILER_EXCLUIDOS:
+        rangos = _rangos_actuales(db, *afectados)
+        db.execute(delete(O).where(*afectados).execution_options(synchronize_session=False))
+        _recalcular_meses(db, rangos)
+    else:
+        db.execute(update(O).where(*afectados).values(estado=estado_nuevo).execution_options(synchronize_session=False))
+
+
+def _reemplazar(db: Session, origen: str, ids_origen: List[int], filas: List[Fila]) -> None:
+    """Reemplaza los días de los períodos por `filas` y recalcula los meses tocados (antes y después)."""
+    rangos = _rangos_actuales(db, O.origen == origen, O.id_origen.in_(ids_origen))
+    db.execute(delete(O).where(O.origen == origen, O.id_origen.in_(ids_origen)))
+    _insertar(db, filas)
+    for id_vehiculo, dia, *_ in filas:
+        _ampliar(rangos, id_vehiculo, dia, dia)
+    _recalcular_meses(db, rangos)
+
+
+def conflictos(
+    db: Session,
+    id_vehiculo: int,
+    fecha_inicio: date,
+    fecha_fin: date,
+    id_alquiler_excluido: Optional[int] = None,
+) -> List[PeriodoBloqueante]:
+    """Períodos que bloquean al vehículo en [fecha_inicio, fecha_fin].
+
+    Una búsqueda de rango sobre (id_vehiculo, dia); solo si hay conflictos se
+    leen las fechas completas de esos períodos para el mensaje de error.
+    """
+    ids_alquiler: Set[int] = set()
+    ids_mantenimiento: Set[int] = set()
+    filas = db.query(O.origen, O.id_origen).filter(
+        O.id_vehiculo == id_vehiculo,
+        O.dia >= fecha_inicio,
+        O.dia <= fecha_fin,
+        BLOQUEA,
+    ).distinct()
+    for origen, id_origen in filas:
+        if origen == ALQUILER and id_origen != id_alquiler_excluido:
+            ids_alquiler.add(id_origen)
+        elif origen == MANTENIMIENTO:
+            ids_mantenimiento.add(id_origen)
+
+    if fecha_fin > horizonte(db):
+        ids_mantenimiento.update(db.scalars(
+            select(Mantenimiento.id_mantenimiento).where(
+                Mantenimiento.id_vehiculo == id_vehiculo,
+                Mantenimiento.fecha_fin.is_(None),
+                Mantenimiento.fecha_inicio <= fecha_fin,
+            )
+        ))
+    return _periodos(db, ids_alquiler, ids_mantenimiento)
+
+
+def alquileres_solapados(
+    db: Session,
+    id_vehiculo: int,
+    fecha_inicio: date,
+    fecha_fin: Optional[date],
+    estados: Iterable[str],
+) -> Set[int]:
+    """Ids de los alquileres del vehículo en `estados` con algún día en [fecha_inicio, fecha_fin].
+
+    `fecha_fin` None es un período abierto (p. ej. mantenimiento sin fin).
+    """
+    estados = list(estados)
+    hasta = fecha_fin or horizonte(db)
+    ids = set(db.scalars(
+        select(O.id_origen).where(
+            O.id_vehiculo == id_vehiculo,
+            O.dia >= fecha_inicio,
+            O.dia <= hasta,
+            O.origen == ALQUILER,
+            O.estado.in_(estados),
+        ).distinct()
+    ))
+    if fecha_fin is None:
+        ids.update(db.scalars(
+            select(Alquiler.id_alquiler).where(
+                Alquiler.id_vehiculo == id_vehiculo,
+                Alquiler.estado.in_(estados),
+                Alquiler.fecha_fin > hasta,
+            )
+        ))
+    return ids
+
+
+def vehiculo_ocupado(db: Session, fecha_inicio: date, fecha_fin: date):
+    """Condición SQL correlacionada con `vehiculo`: tiene algún día ocupado en el rango."""
+    condicion = exists().where(
+        O.id_vehiculo == Vehiculo.id_vehiculo,
+        O.dia >= fecha_inicio,
+        O.dia <= fecha_fin,
+        BLOQUEA,
+    )
+    if fecha_fin > horizonte(db):
+        condicion = or_(condicion, exists().where(
+            Mantenimiento.id_vehiculo == Vehiculo.id_vehiculo,
+            Mantenimiento.fecha_fin.is_(None),
+            Mantenimiento.fecha_inicio <= fecha_fin,
+        ))
+    return condicion
+
+
+def extender_horizonte(db: Session) -> int:
+    """Materializa los mantenimientos sin fecha de fin hasta hoy + HORIZONTE_DIAS (job diario).
+
+    Retorna la cantidad de filas agregadas.
+    """
+    anterior = horizonte(db)
+    nuevo = date.today() + timedelta(days=HORIZONTE_DIAS)
+    if nuevo <= anterior:
+        return 0
+    abiertos = db.query(
+        Mantenimiento.id_mantenimiento, Mantenimiento.id_vehiculo, Mantenimiento.fecha_inicio, Mantenimiento.tipo
+    ).filter(Mantenimiento.fecha_fin.is_(None), Mantenimiento.fecha_inicio <= nuevo)
+    filas = [
+        (m.id_vehiculo, dia, MANTENIMIENTO, m.id_mantenimiento, m.tipo)
+        for m in abiertos
+        for dia in _dias(max(m.fecha_inicio, anterior + timedelta(days=1)), nuevo)
+    ]
+    _insertar(db, filas)
+    rangos: Rangos = {}
+    for id_vehiculo, dia, *_ in filas:
+        _ampliar(rangos, id_vehiculo, dia, dia)
+    _recalcular_meses(db, rangos)
+    guardar_marca(db, MARCA_HORIZONTE, nuevo)
+    db.commit()
+    return len(filas)
+
+
+def inicializar(db: Session) -> Optional[int]:
+    """Construye el calendario si nunca se construyó o si es anterior a la tabla mensual."""
+    if leer_marca(db, MARCA_HORIZONTE) is not None and leer_marca(db, MARCA_MENSUAL) is not None:
+        return None
+    return reconstruir(db)
+
+
+def reconstruir(db: Session) -> int:
+    """Recalcula todo el calendario y la tabla mensual desde alquiler/mantenimiento.
+
+    Retorna la cantidad de filas del calendario.
+    """
+    hasta = date.today() + timedelta(days=HORIZONTE_DIAS)
+    filas = _esperadas(db, hasta)
+    db.execute(delete(O))
+    _insertar(db, filas)
+    db.execute(delete(M))
+    db.execute(insert(M).from_select(_COLUMNAS_MENSUAL, _dias_agrupados(_por_dia(), por_mes=True)))
+    guardar_marca(db, MARCA_HORIZONTE, hasta)
+    guardar_marca(db, MARCA_MENSUAL, date.today())
+    db.commit()
+    return len(filas)
+
+
+def dias_por_vehiculo(db: Session, inicio: date, fin: date, ids_vehiculo=None) -> List[Tuple[int, int, int]]:
+    """Filas (id_vehiculo, días alquilados sin mantenimiento, días en mantenimiento) en [inicio, fin).
+
+    Un vehículo puede aparecer en varias filas (meses, extremos, después del
+    horizonte): sus días son la suma. `ids_vehiculo` (subconsulta de ids) limita
+    los vehículos. Los meses se leen de la tabla mensual y los extremos se
+    agrupan desde el calendario (ver `_partir`). Después del horizonte, los
+    vehículos con un mantenimiento sin fecha de fin están en mantenimiento todos
+    los días: se suman esos días y se descuenta lo que el calendario ya contó.
+    """
+    # Por la conexión (Core): las filas son tuplas de enteros, sin el procesamiento del ORM
+    conexion = db.connection()
+    meses, tramos = _partir(inicio, fin)
+    filas: List[Tuple[int, int, int]] = []
+    if meses:
+        desde, hasta = meses
+        q = select(M.id_vehiculo, func.sum(M.dias_alquilado), func.sum(M.dias_mantenimiento)).where(
+            _INDICE_MES >= _indice_mes(desde), _INDICE_MES < _indice_mes(hasta),
+        )
+        if ids_vehiculo is not None:
+            q = q.where(M.id_vehiculo.in_(ids_vehiculo))
+        filas.extend(conexion.execute(q.group_by(M.id_vehiculo)).all())
+    if tramos:
+        del_vehiculo = [O.id_vehiculo.in_(ids_vehiculo)] if ids_vehiculo is not None else []
+        filas.extend(conexion.execute(_dias_agrupados(*(
+            _por_dia(O.dia >= desde, O.dia < hasta, *del_vehiculo, signo=signo) for desde, hasta, signo in tramos
+        ))).all())
+
+    limite = horizonte(db) + timedelta(days=1)
+    if fin > limite:
+        abiertos = select(Mantenimiento.id_vehiculo, func.min(Mantenimiento.fecha_inicio)).where(
+            Mantenimiento.fecha_fin.is_(None), Mantenimiento.fecha_inicio < fin,
+        )
+        if ids_vehiculo is not None:
+            abiertos = abiertos.where(Mantenimiento.id_vehiculo.in_(ids_vehiculo))
+        rangos: Rangos = {
+            id_vehiculo: (max(inicio, limite, desde), fin)
+            for id_vehiculo, desde in db.execute(abiertos.group_by(Mantenimiento.id_vehiculo))
+        }
+        filas.extend((id_vehiculo, 0, (hasta - desde).days) for id_vehiculo, (desde, hasta) in rangos.items())
+        for condicion in _por_vehiculo(rangos, lambda v, desde, hasta: and_(
+            O.id_vehiculo == v, O.dia >= desde, O.dia < hasta,
+        )):
+            filas.extend(conexion.execute(_dias_agrupados(_por_dia(condicion, signo=-1))).all())
+    return filas
+
+
+def _partir(inicio: date, fin: date) -> Tuple[Optional[Tuple[date, date]], List[Tuple[date, date, int]]]:
+    """Meses [desde, hasta) a leer de la tabla mensual y tramos del calendario (inicio, fin, ±1).
+
+    Como `partir_en_meses`, pero un mes del extremo que la ventana cubre en más
+    de la mitad se lee completo de la tabla mensual y se restan los días que
+    quedan afuera: así el calendario se agrupa a lo sumo medio mes por extremo.
+    """
+    primero = inicio.replace(day=1)
+    ultimo = (fin - timedelta(days=1)).replace(day=1)
+    desde, hasta = primero, mes_siguiente(ultimo)
+    tramos: List[Tuple[date, date, int]] = []
+    if primero == ultimo:
+        if 2 * (fin - inicio).days <= (hasta - desde).days:
+            return None, [(inicio, fin, 1)]
+        afuera = [(primero, inicio), (fin, hasta)]
+    else:
+        afuera = []
+        for mes, a, b in ((primero, primero, inicio), (ultimo, fin, mes_siguiente(ultimo))):
+            if 2 * (b - a).days <= (mes_siguiente(mes) - mes).days:
+                afuera.append((a, b))
+            elif mes == primero:
+                desde = mes_siguiente(primero)
+                tramos.append((inicio, desde, 1))
+            else:
+                hasta = ultimo
+                tramos.append((ultimo, fin, 1))
+    tramos.extend((a, b, -1) for a, b in afuera if a < b)
+    return (desde, hasta) if desde < hasta else None, tramos
+
+
+def verificar(db: Session, muestra: int = 20) -> dict:
+    """Compara el calendario con lo que resulta de las tablas base, sin modificar nada.
+
+    Cuenta además los meses de la tabla mensual que no coinciden con el calendario.
+    """
+    esperadas = set(_esperadas(db, horizonte(db)))
+    actuales = {tuple(fila) for fila in db.query(O.id_vehiculo, O.dia, O.origen, O.id_origen, O.estado)}
+    faltantes = sorted(esperadas - actuales)
+    sobrantes = sorted(actuales - esperadas)
+    meses_esperados = {tuple(map(int, fila)) for fila in db.execute(_dias_agrupados(_por_dia(), por_mes=True))}
+    meses_actuales = {
+        tuple(fila) for fila in db.query(M.id_vehiculo, M.anio, M.mes, M.dias_alquilado, M.dias_mantenimiento)
+    }
+    return {
+        "filas": len(actuales),
+        "faltantes": len(faltantes),
+        "sobrantes": len(sobrantes),
+        "meses_distintos": len(meses_esperados ^ meses_actuales),
+        "muestra_faltantes": faltantes[:muestra],
+        "muestra_sobrantes": sobrantes[:muestra],
+    }
+
+
+def _esperadas(db: Session, hasta: date) -> List[Fila]:
+    filas: List[Fila] = []
+    alquileres = db.query(
+        Alquiler.id_alquiler, Alquiler.id_vehiculo, Alquiler.fecha_inicio, Alquiler.fecha_fin, Alquiler.estado
+    ).filter(Alquiler.estado.not_in(ESTADOS_ALQUILER_EXCLUIDOS))
+    for a in alquileres.yield_per(TAMANIO_LOTE):
+        filas.extend(_filas_alquiler(*a))
+    mantenimientos = db.query(
+        Mantenimiento.id_mantenimiento, Mantenimiento.id_vehiculo, Mantenimiento.fecha_inicio,
+        Mantenimiento.fecha_fin, Mantenimiento.tipo,
+    )
+    for m in mantenimientos.yield_per(TAMANIO_LOTE):
+        filas.extend(_filas_mantenimiento(*m, hasta))
+    return filas
+
+
+def _periodos(db: Session, ids_alquiler: Set[int], ids_mantenimiento: Set[int]) -> List[PeriodoBloqueante]:
+    periodos: List[PeriodoBloqueante] = []
+    if ids_alquiler:
+        periodos.extend(
+            PeriodoBloqueante(ALQUILER, a.id_alquiler, a.fecha_inicio, a.fecha_fin, a.estado)
+            for a in db.query(
+                Alquiler.id_alquiler, Alquiler.fecha_inicio, Alquiler.fecha_fin, Alquiler.estado
+            ).filter(Alquiler.id_alquiler.in_(ids_alquiler))
+        )
+    if ids_mantenimiento:
+        periodos.extend(
+            PeriodoBloqueante(MANTENIMIENTO, m.id_mantenimiento, m.fecha_inicio, m.fecha_fin, m.tipo)
+            for m in db.query(
+                Mantenimiento.id_mantenimiento, Mantenimiento.fecha_inicio, Mantenimiento.fecha_fin, Mantenimiento.tipo
+            ).filter(Mantenimiento.id_mantenimiento.in_(ids_mantenimiento))
+        )
+    return sorted(periodos, key=lambda p: (p.fecha_inicio, p.id))
+
+
+_INDICE_MES = M.anio * 12 + M.mes - 1
+_COLUMNAS_MENSUAL = ["id_vehiculo", "anio", "mes", "dias_alquilado", "dias_mantenimiento"]
+
+
+def _indice_mes(fecha: date) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _por_dia(*filtros, signo: int = 1):
+    """SELECT del calendario agrupado por (vehículo, día): si hubo alquiler y si hubo mantenimiento.
+
+    Así los períodos superpuestos no cuentan dos veces el mismo día. `signo`
+    (1 o -1) es el peso de esos días en `_dias_agrupados`.
+    """
+    return (
+        select(
+            O.id_vehiculo,
+            O.dia,
+            literal(signo).label("signo"),
+            func.max(case((O.origen == ALQUILER, 1), else_=0)).label("alquilado"),
+            func.max(case((O.origen == MANTENIMIENTO, 1), else_=0)).label("mantenimiento"),
+        )
+        .where(*filtros)
+        .group_by(O.id_vehiculo, O.dia)
+    )
+
+
+def _dias_agrupados(*por_dia, por_mes: bool = False):
+    """SELECT de días alquilados sin mantenimiento y días en mantenimiento sobre uno o más `_por_dia`.
+
+    Por vehículo, o por (vehículo, año, mes) con `por_mes`. Varios `_por_dia`
+    (rangos de días disjuntos) van con UNION ALL: en SQLite cada uno usa el
+    índice por día por separado, más rápido que un OR de rangos.
+    """
+    dias = (por_dia[0] if len(por_dia) == 1 else union_all(*por_dia)).subquery()
+    claves = [dias.c.id_vehiculo]
+    if por_mes:
+        claves += [func.extract("year", dias.c.dia), func.extract("month", dias.c.dia)]
+    return select(
+        *claves,
+        func.sum(dias.c.signo * dias.c.alquilado * (1 - dias.c.mantenimiento)),
+        func.sum(dias.c.signo * dias.c.mantenimiento),
+    ).group_by(*claves)
+
+
+def _rangos_actuales(db: Session, *filtros) -> Rangos:
+    """Primer y último día en el calendario, por vehículo, de las filas que cumplen `filtros`."""
+    return {
+        id_vehiculo: (desde, hasta)
+        for id_vehiculo, desde, hasta in db.execute(
+            select(O.id_vehiculo, func.min(O.dia), func.max(O.dia)).where(*filtros).group_by(O.id_vehiculo)
+        )
+    }
+
+
+def _ampliar(rangos: Rangos, id_vehiculo: int, desde: date, hasta: date) -> None:
+    if id_vehiculo in rangos:
+        actual = rangos[id_vehiculo]
+        desde, hasta = min(actual[0], desde), max(actual[1], hasta)
+    rangos[id_vehiculo] = (desde, hasta)
+
+
+def _por_vehiculo(rangos: Rangos, condicion) -> Iterator:
+    """OR de `condicion(id_vehiculo, desde, hasta)` por vehículo, en lotes de LOTE_VEHICULOS."""
+    items = list(rangos.items())
+    for i in range(0, len(items), LOTE_VEHICULOS):
+        yield or_(*(condicion(v, desde, hasta) for v, (desde, hasta) in items[i:i + LOTE_VEHICULOS]))
+
+
+def _recalcular_meses(db: Session, rangos: Rangos) -> None:
+    """Recalcula la tabla mensual en los meses de `rangos` de cada vehículo. No hace commit."""
+    rangos = {v: (desde.replace(day=1), mes_siguiente(hasta)) for v, (desde, hasta) in rangos.items()}
+    for condicion in _por_vehiculo(rangos, lambda v, desde, hasta: and_(
+        M.id_vehiculo == v, _INDICE_MES >= _indice_mes(desde), _INDICE_MES < _indice_mes(hasta),
+    )):
+        db.execute(delete(M).where(condicion).execution_options(synchronize_session=False))
+    for condicion in _por_vehiculo(rangos, lambda v, desde, hasta: and_(
+        O.id_vehiculo == v, O.dia >= desde, O.dia < hasta,
+    )):
+        db.execute(insert(M).from_select(_COLUMNAS_MENSUAL, _dias_agrupados(_por_dia(condicion), por_mes=True)))
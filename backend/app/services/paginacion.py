@@ -0,0 +1,146 @@
+"""Paginación por cursor (keyset) y proyección de columnas para los listados.
+
+En lugar de OFFSET, cada página continúa a partir de la clave de orden de la
+última fila devuelta (p. ej. `(fecha_inicio, id_alquiler)`), por lo que el costo
+de una página no depende de cuántas filas haya antes. El cursor es opaco para el
+cliente: los valores de la clave serializados en JSON y codificados en base64.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from .exceptions import BusinessRuleError
+
+LIMITE_POR_DEFECTO = 50
+
+# (columna, descendente)
+Orden = Sequence[Tuple[Any, bool]]
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    datos = []
+    for valor in valores:
+        if isinstance(valor, (date, datetime)):
+            valor = valor.isoformat()
+        elif isinstance(valor, Decimal):
+            valor = str(valor)
+        datos.append(valor)
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, orden: Orden) -> List[Any]:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError):
+        raise BusinessRuleError("Cursor de paginación inválido")
+
+    if not isinstance(datos, list) or len(datos) != len(orden):
+        raise BusinessRuleError("Cursor de paginación inválido")
+
+    try:
+        return [_convertir(valor, columna.type.python_type) for valor, (columna, _) in zip(datos, orden)]
+    except (TypeError, ValueError, InvalidOperation):
+        # Base64 y JSON válidos pero con un valor que no es del tipo de la columna
+        raise BusinessRuleError("Cursor de paginación inválido")
+
+
+def _convertir(valor: Any, tipo: type) -> Any:
+    if valor is None:
+        return None
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    if tipo is Decimal:
+        return Decimal(valor)
+    if tipo in (int, str) and (not isinstance(valor, tipo) or isinstance(valor, bool)):
+        raise TypeError(f"{valor!r} no es {tipo.__name__}")
+    return valor
+
+
+def _posterior_a(orden: Orden, valores: Sequence[Any]):
+    """Condición "fila posterior al cursor" para una clave de orden compuesta.
+
+    (k1, k2) > (v1, v2)  ==  k1 > v1 OR (k1 = v1 AND k2 > v2), con el sentido de
+    cada comparación invertido en las columnas descendentes.
+    """
+    condiciones = []
+    for i, (columna, descendente) in enumerate(orden):
+        iguales = [orden[j][0] == valores[j] for j in range(i)]
+        siguiente = columna < valores[i] if descendente else columna > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+def _validar_orden(orden: Orden) -> None:
+    """La clave de orden no admite NULL: `columna < NULL` nunca es verdadero y
+    `_posterior_a` salteaba esas filas al cruzar un borde de página."""
+    anulables = [columna.key for columna, _ in orden if getattr(columna, "nullable", False)]
+    if anulables:
+        raise ValueError(f"Columnas de orden anulables, no sirven como clave de cursor: {', '.join(anulables)}")
+
+
+def validar_campos(modelo, campos: Optional[Sequence[str]]) -> Optional[List[str]]:
+    if not campos:
+        return None
+    columnas = modelo.__table__.columns.keys()
+    desconocidos = [c for c in campos if c not in columnas]
+    if desconocidos:
+        raise BusinessRuleError(f"Campos desconocidos: {', '.join(desconocidos)}")
+    return list(dict.fromkeys(campos))
+
+
+def paginar(
+    query: Query,
+    modelo,
+    orden: Orden,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    campos: Optional[Sequence[str]] = None,
+    opciones: Sequence[Any] = (),
+) -> Tuple[list, Optional[str]]:
+    """Aplica orden, cursor, límite y proyección a una consulta de listado.
+
+    - Sin `limit` ni `cursor` devuelve todas las filas (comportamiento original).
+    - Con `campos` solo se seleccionan esas columnas (más la clave de orden) y
+      cada fila se devuelve como dict, sin construir objetos ORM.
+    - `opciones` (estrategias de carga, ver services/carga.py) se aplican solo
+      cuando se devuelven objetos ORM.
+
+    Retorna (filas, cursor_siguiente); cursor_siguiente es None en la última página.
+    """
+    _validar_orden(orden)
+    campos = validar_campos(modelo, campos)
+    paginado = limit is not None or cursor is not None
+    limit = limit or LIMITE_POR_DEFECTO
+
+    if cursor:
+        query = query.filter(_posterior_a(orden, decodificar_cursor(cursor, orden)))
+
+    columnas_orden = [columna for columna, _ in orden]
+    if campos:
+        claves_orden = [c.key for c in columnas_orden if c.key not in campos]
+        query = query.with_entities(*[getattr(modelo, c) for c in campos + claves_orden])
+    elif opciones:
+        query = query.options(*opciones)
+
+    query = query.order_by(*[c.desc() if desc else c.asc() for c, desc in orden])
+
+    filas = query.limit(limit + 1).all() if paginado else query.all()
+
+    siguiente = None
+    if paginado and len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        siguiente = codificar_cursor([getattr(ultima, c.key) for c in columnas_orden])
+
+    if campos:
+        filas = [{c: getattr(fila, c) for c in campos} for fila in filas]
+    return filas, siguiente
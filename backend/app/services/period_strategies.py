@@ -2,44 +2,37 @@ from abc import ABC, abstractmethod
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models import alquileres as m_alquileres
+from app.services import resumen_mensual
+from app.services.rangos_fecha import rango_desde_filtro
 
 class PeriodAggregationStrategy(ABC):
     @abstractmethod
     def aggregate(self, db: Session, desde: Optional[datetime], hasta: Optional[datetime]) -> List[dict]:
         pass
 
+    @staticmethod
+    def _totales_por_mes(db: Session, desde: Optional[datetime], hasta: Optional[datetime]) -> dict:
+        # Lee del resumen mensual materializado (ver services/resumen_mensual.py)
+        inicio, fin = rango_desde_filtro(desde, hasta)
+        return resumen_mensual.totales_por_mes(db, inicio=inicio, fin=fin)
+
 class MonthAggregationStrategy(PeriodAggregationStrategy):
     def aggregate(self, db: Session, desde: Optional[datetime], hasta: Optional[datetime]) -> List[dict]:
-        date_col = m_alquileres.Alquiler.fecha_inicio
-        year = func.extract('year', date_col).label('anio')
-        month = func.extract('month', date_col).label('mes')
-        q = db.query(year, month, func.count().label('cantidad')).group_by(year, month)
-        if desde:
-            q = q.filter(date_col >= desde)
-        if hasta:
-            q = q.filter(date_col <= hasta)
-        rows = q.order_by(year.asc(), month.asc()).all()
+        totales = self._totales_por_mes(db, desde, hasta)
         return [
-            {"periodo": f"{int(r.anio)}-{int(r.mes):02d}", "cantidad_alquileres": int(r.cantidad)}
-            for r in rows
+            {"periodo": f"{anio}-{mes:02d}", "cantidad_alquileres": cantidad}
+            for (anio, mes), (cantidad, _) in sorted(totales.items())
         ]
 
 class QuarterAggregationStrategy(PeriodAggregationStrategy):
     def aggregate(self, db: Session, desde: Optional[datetime], hasta: Optional[datetime]) -> List[dict]:
-        date_col = m_alquileres.Alquiler.fecha_inicio
-        year = func.extract('year', date_col).label('anio')
-        quarter = func.ceil(func.extract('month', date_col) / 3).label('trimestre')
-        q = db.query(year, quarter, func.count().label('cantidad')).group_by(year, quarter)
-        if desde:
-            q = q.filter(date_col >= desde)
-        if hasta:
-            q = q.filter(date_col <= hasta)
-        rows = q.order_by(year.asc(), quarter.asc()).all()
+        por_trimestre = {}
+        for (anio, mes), (cantidad, _) in self._totales_por_mes(db, desde, hasta).items():
+            clave = (anio, (mes - 1) // 3 + 1)
+            por_trimestre[clave] = por_trimestre.get(clave, 0) + cantidad
         return [
-            {"periodo": f"{int(r.anio)}-Q{int(r.trimestre)}", "cantidad_alquileres": int(r.cantidad)}
-            for r in rows
+            {"periodo": f"{anio}-Q{trimestre}", "cantidad_alquileres": cantidad}
+            for (anio, trimestre), cantidad in sorted(por_trimestre.items())
         ]
 
 def get_period_strategy(periodo: str) -> PeriodAggregationStrategy:
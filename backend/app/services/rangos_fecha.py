@@ -0,0 +1,73 @@
+"""Rangos de fechas semiabiertos [inicio, fin) para filtrar columnas DATE.
+
+Filtrar con `EXTRACT(year FROM col) = anio` o comparar una columna DATE contra
+un DATETIME obliga a evaluar una función por fila y el motor no puede usar el
+índice sobre la columna. Con `col >= inicio AND col < fin` el filtro es un rango
+de índice, y el límite superior exclusivo evita los problemas de "fin de mes" o
+de horas dentro del último día.
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, true
+
+Rango = Tuple[Optional[date], Optional[date]]
+
+
+def rango_anio(anio: int) -> Tuple[date, date]:
+    return date(anio, 1, 1), date(anio + 1, 1, 1)
+
+
+def rango_mes(anio: int, mes: int) -> Tuple[date, date]:
+    return date(anio, mes, 1), mes_siguiente(date(anio, mes, 1))
+
+
+def mes_siguiente(fecha: date) -> date:
+    """Primer día del mes posterior al de `fecha`."""
+    return date(fecha.year + 1, 1, 1) if fecha.month == 12 else date(fecha.year, fecha.month + 1, 1)
+
+
+def partir_en_meses(inicio: Optional[date], fin: Optional[date]) -> Tuple[Optional[Rango], List[Rango]]:
+    """Divide [inicio, fin) en los meses completos que cubre y los tramos de los extremos.
+
+    Retorna (meses completos o None si no cubre ninguno, tramos parciales). Los
+    meses completos se leen de las tablas mensuales; los tramos, de las tablas base.
+    """
+    inicio_completo = inicio if inicio is None or inicio.day == 1 else mes_siguiente(inicio)
+    fin_completo = fin if fin is None or fin.day == 1 else fin.replace(day=1)
+    if inicio_completo and fin_completo and inicio_completo >= fin_completo:
+        return None, [(inicio, fin)]
+
+    tramos: List[Rango] = []
+    if inicio and inicio < inicio_completo:
+        tramos.append((inicio, inicio_completo))
+    if fin and fin_completo < fin:
+        tramos.append((fin_completo, fin))
+    return (inicio_completo, fin_completo), tramos
+
+
+def rango_desde_filtro(desde=None, hasta=None) -> Rango:
+    """Convierte un filtro inclusivo `desde <= col <= hasta` (date o datetime) a [inicio, fin).
+
+    Con datetimes se respeta la comparación original contra una fecha (00:00):
+    un `desde` con hora excluye ese día y un `hasta` con hora lo incluye.
+    """
+    inicio = desde
+    if isinstance(desde, datetime):
+        inicio = desde.date() if desde.time() == datetime.min.time() else desde.date() + timedelta(days=1)
+    fin = hasta
+    if isinstance(hasta, datetime):
+        fin = hasta.date()
+    if fin is not None:
+        fin = fin + timedelta(days=1)
+    return inicio, fin
+
+
+def en_rango(columna, inicio: Optional[date], fin: Optional[date]):
+    """Condición SQL `inicio <= columna < fin` (cada límite es opcional)."""
+    condiciones = []
+    if inicio is not None:
+        condiciones.append(columna >= inicio)
+    if fin is not None:
+        condiciones.append(columna < fin)
+    return and_(true(), *condiciones)
@@ -0,0 +1,256 @@
+"""Ranking de vehículos más alquilados (tabla ranking_vehiculo_mensual y top en memoria).
+
+Cada fila cuenta los alquileres no cancelados de un vehículo con fecha_inicio
+en un (año, mes). Una ventana arbitraria se responde sumando los meses
+completos desde esa tabla y los tramos de los meses de los extremos desde
+`alquiler`, en lugar de agrupar todo el histórico.
+
+Para las ventanas por defecto (histórico y año en curso) `ranking_vehiculos`
+guarda en memoria los contadores por vehículo y el top sale de un heap
+(heapq.nlargest), sin consultar la DB.
+
+Mantenimiento incremental: los servicios que dan de alta, editan, cancelan o
+borran alquileres llaman a `registrar_cambio` / `registrar_altas` dentro de su
+transacción, con la clave del alquiler antes y después (`clave_alquiler`). Las
+diferencias se escriben con un upsert aditivo y quedan pendientes en la sesión:
+se aplican a los contadores en memoria cuando la transacción hace commit y se
+descartan con el rollback. Las escrituras de otros procesos se ven al vencer
+RANKING_VEHICULOS_TTL. `reconstruir` recalcula la tabla completa.
+
+La carga de los contadores desde la DB no retiene el lock: si mientras tanto
+llega un `aplicar`, la carga puede no incluir esa transacción y se descarta y
+se repite (ver `RankingVehiculos.top`).
+"""
+import heapq
+import os
+import time
+from collections import Counter
+from datetime import date
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, or_
+from sqlalchemy.orm import Session
+
+from ..models import Alquiler, RankingVehiculoMensual
+from .rangos_fecha import en_rango, partir_en_meses, rango_anio
+from .upsert import upsert_aditivo
+
+RANKING_VEHICULOS_TTL = float(os.getenv("RANKING_VEHICULOS_TTL", "60"))
+ESTADOS_NO_CONTADOS = ["CANCELADO"]
+# Cargas descartadas por escrituras concurrentes antes de responder sin guardar
+INTENTOS_CARGA = 3
+
+_PENDIENTES = "ranking_vehiculos_pendientes"
+
+# (id_vehiculo, anio, mes)
+Clave = Tuple[int, int, int]
+
+
+def clave_alquiler(alquiler: Alquiler) -> Optional[Clave]:
+    """Bucket al que suma el alquiler; None si no cuenta (cancelado o sin fecha)."""
+    if alquiler is None or alquiler.fecha_inicio is None or alquiler.estado in ESTADOS_NO_CONTADOS:
+        return None
+    return alquiler.id_vehiculo, alquiler.fecha_inicio.year, alquiler.fecha_inicio.month
+
+
+def _contado():
+    """Condición SQL equivalente a `clave_alquiler(...) is not None` (estado NULL cuenta)."""
+    return or_(Alquiler.estado.is_(None), Alquiler.estado.not_in(ESTADOS_NO_CONTADOS))
+
+
+def registrar_cambio(db: Session, antes: Optional[Clave], despues: Optional[Clave]) -> None:
+    """Aplica la diferencia entre dos claves (alta: antes=None, baja o cancelación: despues=None).
+
+    No hace commit: debe llamarse dentro de la transacción de la escritura.
+    """
+    if antes == despues:
+        return
+    deltas: Counter = Counter()
+    if antes:
+        deltas[antes] -= 1
+    if despues:
+        deltas[despues] += 1
+    _registrar(db, deltas)
+
+
+def registrar_altas(db: Session, claves: Iterable[Optional[Clave]]) -> None:
+    """Suma varias altas con un único upsert (alta de alquileres por lote)."""
+    _registrar(db, Counter(c for c in claves if c))
+
+
+def _registrar(db: Session, deltas: Counter) -> None:
+    valores = [
+        {"id_vehiculo": id_vehiculo, "anio": anio, "mes": mes, "cantidad": cantidad}
+        for (id_vehiculo, anio, mes), cantidad in deltas.items()
+        if cantidad
+    ]
+    if not valores:
+        return
+    upsert_aditivo(db, RankingVehiculoMensual.__table__, valores, ["cantidad"])
+    db.info.setdefault(_PENDIENTES, Counter()).update(deltas)
+
+
+@event.listens_for(Session, "after_commit")
+def _confirmar_pendientes(session: Session) -> None:
+    pendientes = session.info.pop(_PENDIENTES, None)
+    if pendientes:
+        ranking_vehiculos.aplicar(pendientes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(session: Session) -> None:
+    session.info.pop(_PENDIENTES, None)
+
+
+def reconstruir(db: Session) -> int:
+    """Recalcula toda la tabla desde `alquiler`. Retorna la cantidad de filas."""
+    anio = func.extract("year", Alquiler.fecha_inicio)
+    mes = func.extract("month", Alquiler.fecha_inicio)
+    filas = [
+        {"id_vehiculo": f.id_vehiculo, "anio": int(f.anio), "mes": int(f.mes), "cantidad": f.cantidad}
+        for f in db.query(
+            Alquiler.id_vehiculo,
+            anio.label("anio"),
+            mes.label("mes"),
+            func.count(Alquiler.id_alquiler).label("cantidad"),
+        )
+        .filter(Alquiler.fecha_inicio.is_not(None), _contado())
+        .group_by(Alquiler.id_vehiculo, anio, mes)
+    ]
+    db.execute(delete(RankingVehiculoMensual))
+    if filas:
+        db.execute(insert(RankingVehiculoMensual), filas)
+    db.commit()
+    ranking_vehiculos.invalidar()
+    return len(filas)
+
+
+def top_vehiculos(db: Session, limit: int, inicio: Optional[date] = None, fin: Optional[date] = None) -> List[Tuple[int, int]]:
+    """(id_vehiculo, cantidad) de los `limit` vehículos con más alquileres con fecha_inicio en [inicio, fin).
+
+    Ordenados por cantidad descendente y, a igual cantidad, por id_vehiculo.
+    """
+    if inicio is None and fin is None:
+        return ranking_vehiculos.top(db, limit)
+    anio_actual = date.today().year
+    if (inicio, fin) == rango_anio(anio_actual):
+        return ranking_vehiculos.top(db, limit, anio=anio_actual)
+
+    conteo: Counter = Counter()
+    meses, tramos = partir_en_meses(inicio, fin)
+    if meses:
+        _sumar_desde_ranking(db, conteo, *meses)
+    for tramo in tramos:
+        _sumar_desde_alquileres(db, conteo, *tramo)
+    return _mayores(conteo, limit)
+
+
+class RankingVehiculos:
+    """Contadores por vehículo de las ventanas por defecto: None (histórico) o un año."""
+
+    def __init__(self, ttl_segundos: float = RANKING_VEHICULOS_TTL):
+        self._ttl = ttl_segundos
+        self._lock = Lock()
+        self._contadores: Dict[Optional[int], Counter] = {}
+        self._cargado_en: Dict[Optional[int], float] = {}
+        # Cambia con cada `aplicar` / `invalidar`: una carga que lo vio cambiar se descarta
+        self._generacion = 0
+
+    def top(self, db: Session, limit: int, anio: Optional[int] = None) -> List[Tuple[int, int]]:
+        with self._lock:
+            conteo = self._contadores.get(anio)
+            if conteo is not None and time.monotonic() - self._cargado_en[anio] < self._ttl:
+                return _mayores(conteo, limit)
+            generacion = self._generacion
+
+        if db.in_transaction():
+            # La foto de esa transacción puede ser anterior a `generacion`: se responde sin guardar
+            conteo = Counter()
+            _sumar_desde_ranking(db, conteo, *_ventana(anio))
+            return _mayores(conteo, limit)
+        for _ in range(INTENTOS_CARGA):
+            conteo = self._cargar(db, anio)
+            with self._lock:
+                if self._generacion == generacion:
+                    self._contadores[anio] = conteo
+                    self._cargado_en[anio] = time.monotonic()
+                    return _mayores(conteo, limit)
+                # Un `aplicar` llegó durante la carga: sumarlo al conteo leído podría
+                # contarlo dos veces y no sumarlo, perderlo
+                generacion = self._generacion
+        return _mayores(conteo, limit)
+
+    def _cargar(self, db: Session, anio: Optional[int]) -> Counter:
+        """Contadores de la ventana, leídos en una transacción de `db` que se cierra al terminar.
+
+        `db` no tiene una transacción abierta: la lectura empieza una nueva,
+        posterior a la generación leída, y el rollback la cierra para que un
+        reintento vea lo confirmado después (con REPEATABLE READ, en la misma
+        transacción se repetiría la misma foto). No usa otra conexión: el request
+        tiene permiso para una sola (ver database.py).
+        """
+        conteo: Counter = Counter()
+        try:
+            _sumar_desde_ranking(db, conteo, *_ventana(anio))
+        finally:
+            db.rollback()
+        return conteo
+
+    def aplicar(self, deltas: Counter) -> None:
+        """Suma a los contadores cargados las diferencias de una transacción confirmada."""
+        with self._lock:
+            self._generacion += 1
+            for (id_vehiculo, anio, _), cantidad in deltas.items():
+                for ventana in (None, anio):
+                    conteo = self._contadores.get(ventana)
+                    if conteo is not None:
+                        conteo[id_vehiculo] += cantidad
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._generacion += 1
+            self._contadores.clear()
+            self._cargado_en.clear()
+
+
+def _mayores(conteo: Counter, limit: int) -> List[Tuple[int, int]]:
+    mayores = heapq.nlargest(
+        limit,
+        ((cantidad, -id_vehiculo) for id_vehiculo, cantidad in conteo.items() if cantidad > 0),
+    )
+    return [(-id_negado, cantidad) for cantidad, id_negado in mayores]
+
+
+def _ventana(anio: Optional[int]) -> Tuple[Optional[date], Optional[date]]:
+    return rango_anio(anio) if anio is not None else (None, None)
+
+
+def _indice_mes(fecha: date) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _sumar_desde_ranking(db: Session, conteo: Counter, inicio: Optional[date], fin: Optional[date]) -> None:
+    """Meses completos en [inicio, fin) (límites opcionales) desde ranking_vehiculo_mensual."""
+    r = RankingVehiculoMensual
+    indice = r.anio * 12 + r.mes - 1
+    q = db.query(r.id_vehiculo, func.sum(r.cantidad).label("cantidad"))
+    if inicio:
+        q = q.filter(indice >= _indice_mes(inicio))
+    if fin:
+        q = q.filter(indice < _indice_mes(fin))
+    for fila in q.group_by(r.id_vehiculo):
+        conteo[fila.id_vehiculo] += int(fila.cantidad)
+
+
+def _sumar_desde_alquileres(db: Session, conteo: Counter, inicio: Optional[date], fin: Optional[date]) -> None:
+    """Alquileres no cancelados con fecha_inicio en [inicio, fin) desde la tabla base."""
+    q = db.query(Alquiler.id_vehiculo, func.count(Alquiler.id_alquiler).label("cantidad")).filter(
+        en_rango(Alquiler.fecha_inicio, inicio, fin),
+        _contado(),
+    )
+    for fila in q.group_by(Alquiler.id_vehiculo):
+        conteo[fila.id_vehiculo] += int(fila.cantidad)
+
+
+ranking_vehiculos = RankingVehiculos()
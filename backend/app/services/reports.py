@@ -1,16 +1,18 @@
 from datetime import datetime
 from typing import List, Optional, Tuple
 
-from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.models import alquileres as m_alquileres
 from app.models import clientes as m_clientes
 from app.models import vehiculos as m_vehiculos
 from app.repositories.alquiler_repository import fetch_alquileres_by_cliente
+from app.services import ranking_vehiculos, resumen_mensual, utilizacion
+from app.services.cache_reportes import cache_reportes
 from app.services.period_strategies import get_period_strategy
+from app.services.rangos_fecha import rango_anio, rango_desde_filtro
 
 
+@cache_reportes.cacheado("alquileres_por_cliente")
 def get_alquileres_por_cliente(
     db: Session,
     client_id: int,
@@ -18,8 +20,11 @@ def get_alquileres_por_cliente(
     size: int = 10,
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
-) -> Tuple[int, List[dict]]:
-    total, rows = fetch_alquileres_by_cliente(db, client_id, page=page, size=size, desde=desde, hasta=hasta)
+    cursor: Optional[str] = None,
+) -> Tuple[int, List[dict], Optional[str]]:
+    total, cliente, rows, siguiente = fetch_alquileres_by_cliente(
+        db, client_id, page=page, size=size, desde=desde, hasta=hasta, cursor=cursor
+    )
     result: List[dict] = []
     for row in rows:
         dias = None
@@ -32,8 +37,8 @@ def get_alquileres_por_cliente(
             {
                 "id_alquiler": row.id_alquiler,
                 "id_cliente": row.id_cliente,
-                "cliente_nombre": row.cliente_nombre,
-                "cliente_apellido": row.cliente_apellido,
+                "cliente_nombre": cliente.nombre,
+                "cliente_apellido": cliente.apellido,
                 "id_vehiculo": row.id_vehiculo,
                 "vehiculo_patente": row.vehiculo_patente,
                 "fecha_inicio": row.fecha_inicio.isoformat() if row.fecha_inicio else None,
@@ -43,48 +48,43 @@ def get_alquileres_por_cliente(
                 "estado": row.estado,
             }
         )
-    return total, result
+    return total, result, siguiente
 
 
+@cache_reportes.cacheado("vehiculos_mas_alquilados")
 def get_vehiculos_mas_alquilados(
     db: Session,
     limit: int = 10,
     desde: Optional[datetime] = None,
     hasta: Optional[datetime] = None,
 ) -> List[dict]:
-    query = (
-        db.query(
-            m_vehiculos.Vehiculo.id_vehiculo,
-            m_vehiculos.Vehiculo.patente,
-            m_vehiculos.Vehiculo.modelo,
-            func.count(m_alquileres.Alquiler.id_alquiler).label("cantidad")
-        )
-        .join(m_alquileres.Alquiler, m_alquileres.Alquiler.id_vehiculo == m_vehiculos.Vehiculo.id_vehiculo)
-        .group_by(
+    # Histórico y año en curso: top en memoria; otras ventanas: meses del ranking + bordes desde alquiler
+    inicio, fin = rango_desde_filtro(desde, hasta)
+    top = ranking_vehiculos.top_vehiculos(db, limit, inicio, fin)
+    if not top:
+        return []
+
+    vehiculos = {
+        v.id_vehiculo: v
+        for v in db.query(
             m_vehiculos.Vehiculo.id_vehiculo,
             m_vehiculos.Vehiculo.patente,
             m_vehiculos.Vehiculo.modelo,
-        )
-        .order_by(func.count(m_alquileres.Alquiler.id_alquiler).desc())
-    )
-
-    if desde:
-        query = query.filter(m_alquileres.Alquiler.fecha_inicio >= desde)
-    if hasta:
-        query = query.filter(m_alquileres.Alquiler.fecha_inicio <= hasta)
-
-    rows = query.limit(limit).all()
+        ).filter(m_vehiculos.Vehiculo.id_vehiculo.in_([id_vehiculo for id_vehiculo, _ in top]))
+    }
     return [
         {
-            "id_vehiculo": r.id_vehiculo,
-            "patente": r.patente,
-            "modelo": r.modelo,
-            "cantidad_alquileres": int(r.cantidad),
+            "id_vehiculo": id_vehiculo,
+            "patente": vehiculos[id_vehiculo].patente,
+            "modelo": vehiculos[id_vehiculo].modelo,
+            "cantidad_alquileres": cantidad,
         }
-        for r in rows
+        for id_vehiculo, cantidad in top
+        if id_vehiculo in vehiculos
     ]
 
 
+@cache_reportes.cacheado("alquileres_por_periodo")
 def get_alquileres_por_periodo(
     db: Session,
     periodo: str = "mes",
@@ -95,23 +95,43 @@ def get_alquileres_por_periodo(
     return strategy.aggregate(db, desde=desde, hasta=hasta)
 
 
+@cache_reportes.cacheado("facturacion_mensual")
 def get_facturacion_mensual(
     db: Session,
     anio: int,
 ) -> List[dict]:
-    # Suma de montos por mes del año indicado usando fecha_inicio
-    date_col = m_alquileres.Alquiler.fecha_inicio
-    q = (
-        db.query(
-            func.extract('month', date_col).label('mes'),
-            func.coalesce(func.sum(m_alquileres.Alquiler.costo_total), 0).label('monto_total')
-        )
-        .filter(func.extract('year', date_col) == anio)
-        .group_by(func.extract('month', date_col))
-        .order_by(func.extract('month', date_col).asc())
-    )
-    rows = q.all()
+    # Suma de montos por mes del año indicado usando fecha_inicio (año completo: sale del resumen mensual)
+    inicio, fin = rango_anio(anio)
+    totales = resumen_mensual.totales_por_mes(db, inicio=inicio, fin=fin)
     return [
-        {"mes": int(r.mes), "monto_total": float(r.monto_total)}
-        for r in rows
+        {"mes": mes, "monto_total": float(monto)}
+        for (_, mes), (_, monto) in sorted(totales.items())
     ]
+
+
+@cache_reportes.cacheado("utilizacion")
+def get_utilizacion(
+    db: Session,
+    desde: datetime,
+    hasta: datetime,
+    id_categoria: Optional[int] = None,
+) -> dict:
+    # Días alquilados / días disponibles (sin mantenimiento) en [desde, hasta], por vehículo y categoría
+    inicio, fin = rango_desde_filtro(desde, hasta)
+    return utilizacion.calcular_utilizacion(db, inicio, fin, id_categoria=id_categoria)
+
+
+def reconstruir_resumen_mensual(db: Session) -> int:
+    filas = resumen_mensual.reconstruir(db)
+    cache_reportes.invalidar()
+    return filas
+
+
+def reconstruir_ranking_vehiculos(db: Session) -> int:
+    filas = ranking_vehiculos.reconstruir(db)
+    cache_reportes.invalidar()
+    return filas
+
+
+def get_metricas_cache() -> dict:
+    return cache_reportes.metricas()
@@ -0,0 +1,282 @@
+"""Resumen mensual materializado de alquileres (tabla resumen_mensual_alquiler).
+
+Cada fila acumula, para un (año, mes de fecha_inicio, categoría, estado), la
+cantidad de alquileres y la suma de costo_base, costo_total y multas. Los
+reportes por período leen de esta tabla en lugar de agrupar con
+EXTRACT(year/month) sobre todo el histórico.
+
+Mantenimiento incremental: cada servicio que escribe alquileres o multas toma
+la contribución del alquiler antes y después del cambio y llama a
+`registrar_cambio` dentro de la misma transacción, que aplica la diferencia con
+un upsert aditivo. `reconstruir` recalcula la tabla completa desde las tablas
+base (backfill, o para corregir escrituras hechas por fuera de los servicios).
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from ..models import Alquiler, MultaDanio, ResumenMensualAlquiler, Vehiculo
+from .rangos_fecha import en_rango, partir_en_meses
+from .upsert import upsert_aditivo
+
+CENTAVOS = Decimal("0.01")
+
+# (anio, mes, id_categoria, estado)
+Clave = Tuple[int, int, int, str]
+
+
+def _monto(valor) -> Decimal:
+    # Los servicios de multas asignan floats a costo_total: normalizar a centavos
+    return Decimal(str(valor or 0)).quantize(CENTAVOS)
+
+
+@dataclass(frozen=True)
+class Contribucion:
+    """Aporte de un alquiler al resumen: su clave y sus montos."""
+    clave: Clave
+    costo_base: Decimal
+    costo_total: Decimal
+    multas: Decimal
+
+
+def contribucion_alquiler(db: Session, alquiler: Alquiler) -> Optional[Contribucion]:
+    """Contribución actual del alquiler según sus atributos y las multas en la DB.
+
+    Para tomar el estado "después" de un cambio hay que hacer `db.flush()` antes,
+    así la suma de multas y la categoría del vehículo reflejan lo pendiente.
+    """
+    if alquiler is None or alquiler.fecha_inicio is None:
+        return None
+    id_categoria = db.query(Vehiculo.id_categoria).filter(
+        Vehiculo.id_vehiculo == alquiler.id_vehiculo
+    ).scalar()
+    if id_categoria is None:
+        return None
+    multas = db.query(func.coalesce(func.sum(MultaDanio.monto), 0)).filter(
+        MultaDanio.id_alquiler == alquiler.id_alquiler
+    ).scalar() if alquiler.id_alquiler is not None else 0
+
+    return contribucion(
+        alquiler.fecha_inicio, id_categoria, alquiler.estado, alquiler.costo_base, alquiler.costo_total, multas
+    )
+
+
+def contribucion(fecha_inicio: date, id_categoria: int, estado, costo_base, costo_total, multas=0) -> Contribucion:
+    """Contribución a partir de valores ya conocidos (sin consultar la DB)."""
+    return Contribucion(
+        clave=(fecha_inicio.year, fecha_inicio.month, id_categoria, estado or ""),
+        costo_base=_monto(costo_base),
+        costo_total=_monto(costo_total),
+        multas=_monto(multas),
+    )
+
+
+def registrar_cambio(
+    db: Session,
+    antes: Optional[Contribucion],
+    despues: Optional[Contribucion],
+) -> None:
+    """Aplica al resumen la diferencia entre dos contribuciones (alta: antes=None, baja: despues=None).
+
+    No hace commit: debe llamarse dentro de la transacción de la escritura.
+    """
+    if antes == despues:
+        return
+    deltas = _Deltas()
+    if antes:
+        deltas.sumar(antes.clave, -1, -antes.costo_base, -antes.costo_total, -antes.multas)
+    if despues:
+        deltas.sumar(despues.clave, 1, despues.costo_base, despues.costo_total, despues.multas)
+    deltas.aplicar(db)
+
+
+def registrar_altas(db: Session, contribuciones: List[Contribucion]) -> None:
+    """Suma al resumen varias altas con un único upsert (alta de alquileres por lote)."""
+    deltas = _Deltas()
+    for c in contribuciones:
+        deltas.sumar(c.clave, 1, c.costo_base, c.costo_total, c.multas)
+    deltas.aplicar(db)
+
+
+def registrar_transicion(db: Session, estado_nuevo: str, *filtros) -> None:
+    """Mueve al `estado_nuevo` los aportes de los alquileres que cumplen `filtros`.
+
+    Para transiciones por conjunto (UPDATE ... WHERE): debe llamarse antes del
+    UPDATE, con los mismos filtros, dentro de la misma transacción.
+    """
+    deltas = _Deltas()
+    for fila in _agrupar(db, *filtros):
+        clave = (int(fila.anio), int(fila.mes), fila.id_categoria, fila.estado or "")
+        montos = (_monto(fila.costo_base), _monto(fila.costo_total), _monto(fila.multas))
+        deltas.sumar(clave, -fila.cantidad, *(-m for m in montos))
+        deltas.sumar(clave[:3] + (estado_nuevo,), fila.cantidad, *montos)
+    deltas.aplicar(db)
+
+
+def registrar_cambio_categoria(db: Session, id_vehiculo: int, id_categoria_nueva: int) -> None:
+    """Mueve los aportes de los alquileres de un vehículo a su nueva categoría.
+
+    Debe llamarse antes de hacer flush del cambio de categoría del vehículo.
+    """
+    deltas = _Deltas()
+    for fila in _agrupar(db, Alquiler.id_vehiculo == id_vehiculo):
+        clave = (int(fila.anio), int(fila.mes), fila.id_categoria, fila.estado or "")
+        montos = (_monto(fila.costo_base), _monto(fila.costo_total), _monto(fila.multas))
+        deltas.sumar(clave, -fila.cantidad, *(-m for m in montos))
+        deltas.sumar((clave[0], clave[1], id_categoria_nueva, clave[3]), fila.cantidad, *montos)
+    deltas.aplicar(db)
+
+
+def reconstruir(db: Session) -> int:
+    """Recalcula todo el resumen desde alquiler/multa_danio. Retorna la cantidad de filas."""
+    deltas = _Deltas()
+    for fila in _agrupar(db):
+        deltas.sumar(
+            (int(fila.anio), int(fila.mes), fila.id_categoria, fila.estado or ""),
+            fila.cantidad,
+            _monto(fila.costo_base),
+            _monto(fila.costo_total),
+            _monto(fila.multas),
+        )
+    db.execute(delete(ResumenMensualAlquiler))
+    deltas.aplicar(db)
+    db.commit()
+    return len(deltas)
+
+
+def totales_por_mes(
+    db: Session,
+    inicio: Optional[date] = None,
+    fin: Optional[date] = None,
+) -> Dict[Tuple[int, int], Tuple[int, Decimal]]:
+    """(cantidad, suma de costo_total) por (año, mes) para fecha_inicio en [inicio, fin).
+
+    Los meses completamente incluidos se leen del resumen; los meses de los
+    extremos que el rango cubre solo en parte se calculan desde `alquiler` con
+    predicados de rango sobre fecha_inicio.
+    """
+    meses, tramos = partir_en_meses(inicio, fin)
+    totales: Dict[Tuple[int, int], Tuple[int, Decimal]] = {}
+    if meses:
+        _sumar_desde_resumen(db, totales, *meses)
+    for tramo in tramos:
+        _sumar_desde_alquileres(db, totales, *tramo)
+    return totales
+
+
+class _Deltas:
+    """Acumula diferencias por clave y las escribe con un único upsert aditivo."""
+
+    def __init__(self):
+        self._filas: Dict[Clave, List] = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+
+    def __len__(self) -> int:
+        return len(self._filas)
+
+    def sumar(self, clave: Clave, cantidad: int, costo_base: Decimal, costo_total: Decimal, multas: Decimal) -> None:
+        fila = self._filas[clave]
+        fila[0] += cantidad
+        fila[1] += costo_base
+        fila[2] += costo_total
+        fila[3] += multas
+
+    def aplicar(self, db: Session) -> None:
+        valores = [
+            {
+                "anio": anio,
+                "mes": mes,
+                "id_categoria": id_categoria,
+                "estado": estado,
+                "cantidad": cantidad,
+                "total_costo_base": base,
+                "total_costo_total": total,
+                "total_multas": multas,
+            }
+            for (anio, mes, id_categoria, estado), (cantidad, base, total, multas) in self._filas.items()
+            if cantidad or base or total or multas
+        ]
+        if valores:
+            upsert_aditivo(
+                db,
+                ResumenMensualAlquiler.__table__,
+                valores,
+                ["cantidad", "total_costo_base", "total_costo_total", "total_multas"],
+            )
+
+
+def _agrupar(db: Session, *filtros):
+    """Aportes de los alquileres que cumplen `filtros`, agrupados por clave del resumen."""
+    multas_por_alquiler = (
+        db.query(
+            MultaDanio.id_alquiler.label("id_alquiler"),
+            func.sum(MultaDanio.monto).label("monto"),
+        )
+        .group_by(MultaDanio.id_alquiler)
+        .subquery()
+    )
+    anio = func.extract("year", Alquiler.fecha_inicio).label("anio")
+    mes = func.extract("month", Alquiler.fecha_inicio).label("mes")
+    return (
+        db.query(
+            anio,
+            mes,
+            Vehiculo.id_categoria,
+            Alquiler.estado,
+            func.count(Alquiler.id_alquiler).label("cantidad"),
+            func.coalesce(func.sum(Alquiler.costo_base), 0).label("costo_base"),
+            func.coalesce(func.sum(Alquiler.costo_total), 0).label("costo_total"),
+            func.coalesce(func.sum(multas_por_alquiler.c.monto), 0).label("multas"),
+        )
+        .join(Vehiculo, Vehiculo.id_vehiculo == Alquiler.id_vehiculo)
+        .outerjoin(multas_por_alquiler, multas_por_alquiler.c.id_alquiler == Alquiler.id_alquiler)
+        .filter(*filtros)
+        .group_by(anio, mes, Vehiculo.id_categoria, Alquiler.estado)
+        .all()
+    )
+
+
+def _indice_mes(fecha: date) -> int:
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _acumular(totales: dict, anio: int, mes: int, cantidad: int, monto) -> None:
+    cantidad_previa, monto_previo = totales.get((anio, mes), (0, Decimal(0)))
+    totales[(anio, mes)] = (cantidad_previa + int(cantidad), monto_previo + _monto(monto))
+
+
+def _sumar_desde_resumen(db: Session, totales: dict, inicio: Optional[date], fin: Optional[date]) -> None:
+    """Meses completos en [inicio, fin) (límites opcionales) desde el resumen."""
+    r = ResumenMensualAlquiler
+    indice = r.anio * 12 + r.mes - 1
+    q = db.query(
+        r.anio,
+        r.mes,
+        func.sum(r.cantidad).label("cantidad"),
+        func.sum(r.total_costo_total).label("monto"),
+    )
+    if inicio:
+        q = q.filter(indice >= _indice_mes(inicio))
+    if fin:
+        q = q.filter(indice < _indice_mes(fin))
+    for fila in q.group_by(r.anio, r.mes).having(func.sum(r.cantidad) > 0):
+        _acumular(totales, fila.anio, fila.mes, fila.cantidad, fila.monto)
+
+
+def _sumar_desde_alquileres(db: Session, totales: dict, inicio: Optional[date], fin: Optional[date]) -> None:
+    """Alquileres con fecha_inicio en [inicio, fin) desde la tabla base."""
+    fecha = Alquiler.fecha_inicio
+    anio = func.extract("year", fecha).label("anio")
+    mes = func.extract("month", fecha).label("mes")
+    q = db.query(
+        anio,
+        mes,
+        func.count(Alquiler.id_alquiler).label("cantidad"),
+        func.coalesce(func.sum(Alquiler.costo_total), 0).label("monto"),
+    ).filter(en_rango(fecha, inicio, fin))
+    for fila in q.group_by(anio, mes):
+        _acumular(totales, int(fila.anio), int(fila.mes), fila.cantidad, fila.monto)
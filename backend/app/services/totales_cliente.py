@@ -0,0 +1,75 @@
+"""Cache en proceso de la cantidad de alquileres por cliente (reporte por cliente).
+
+El total del reporte paginado no cambia entre páginas: se cuenta una vez por
+(cliente, rango de fecha_inicio) sobre el índice (id_cliente, fecha_inicio,
+id_alquiler) y se guarda acá. Cada cliente tiene su contador de generación: los
+servicios que dan de alta, editan o borran alquileres llaman a
+`totales_cliente.invalidar(id_cliente, ...)` luego del commit, y solo se
+descartan los totales de esos clientes (a diferencia de `cache_reportes`, que
+invalida el dominio "alquileres" completo). Las escrituras de otros procesos se
+ven al vencer TOTALES_CLIENTE_TTL.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+
+from .rangos_fecha import rango_desde_filtro
+
+TOTALES_CLIENTE_TTL = float(os.getenv("TOTALES_CLIENTE_TTL", "300"))
+TOTALES_CLIENTE_MAX_ENTRADAS = int(os.getenv("TOTALES_CLIENTE_MAX_ENTRADAS", "4096"))
+
+
+class TotalesCliente:
+    def __init__(self, ttl_segundos: float = TOTALES_CLIENTE_TTL, max_entradas: int = TOTALES_CLIENTE_MAX_ENTRADAS):
+        self._ttl = ttl_segundos
+        self._max = max_entradas
+        self._lock = Lock()
+        # (id_cliente, generación, inicio, fin) -> (vence, total)
+        self._entradas: "OrderedDict[tuple, Tuple[float, int]]" = OrderedDict()
+        self._generaciones: Dict[int, int] = {}
+        self._generacion_global = 0
+
+    def obtener_o_contar(
+        self,
+        id_cliente: int,
+        desde: Optional[datetime],
+        hasta: Optional[datetime],
+        contar: Callable[[], int],
+    ) -> int:
+        inicio, fin = rango_desde_filtro(desde, hasta)
+        with self._lock:
+            clave = (id_cliente, self._generacion(id_cliente), inicio, fin)
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] > time.monotonic():
+                self._entradas.move_to_end(clave)
+                return entrada[1]
+
+        total = contar()
+        with self._lock:
+            # Si hubo una invalidación mientras se contaba, la clave ya no es alcanzable
+            self._entradas[clave] = (time.monotonic() + self._ttl, total)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max:
+                self._entradas.popitem(last=False)
+        return total
+
+    def invalidar(self, *ids_cliente: Optional[int]) -> None:
+        """Descarta los totales de los clientes indicados (sin argumentos: de todos)."""
+        with self._lock:
+            if not ids_cliente:
+                self._generacion_global += 1
+                self._generaciones.clear()
+                self._entradas.clear()
+                return
+            for id_cliente in set(ids_cliente):
+                if id_cliente is not None:
+                    self._generaciones[id_cliente] = self._generaciones.get(id_cliente, 0) + 1
+
+    def _generacion(self, id_cliente: int) -> Tuple[int, int]:
+        return self._generacion_global, self._generaciones.get(id_cliente, 0)
+
+
+totales_cliente = TotalesCliente()
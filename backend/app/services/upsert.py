@@ -0,0 +1,27 @@
+"""Upsert aditivo para las tablas derivadas (resumen mensual, ranking de vehículos)."""
+from typing import List, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+
+def upsert_aditivo(db: Session, tabla: Table, valores: List[dict], sumables: Sequence[str]) -> None:
+    """INSERT de `valores`; si la clave primaria ya existe, suma las columnas `sumables`."""
+    dialecto = db.get_bind().dialect.name
+
+    if dialecto == "mysql":
+        stmt = mysql_insert(tabla).values(valores)
+        stmt = stmt.on_duplicate_key_update(
+            {c: tabla.c[c] + stmt.inserted[c] for c in sumables}
+        )
+    elif dialecto == "sqlite":
+        stmt = sqlite_insert(tabla).values(valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in tabla.primary_key.columns],
+            set_={c: tabla.c[c] + stmt.excluded[c] for c in sumables},
+        )
+    else:
+        raise NotImplementedError(f"Upsert de {tabla.name} no soportado para {dialecto}")
+    db.execute(stmt)
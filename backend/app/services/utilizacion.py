@@ -0,0 +1,122 @@
+"""Utilización de la flota: días alquilados / días disponibles en una ventana.
+
+Por vehículo, en la ventana [inicio, fin):
+- días en mantenimiento: unión de los días de sus mantenimientos (los abiertos
+  llegan hasta el final de la ventana). No cuentan como disponibles.
+- días alquilados: unión de los días de sus alquileres no cancelados, fuera de
+  los días en mantenimiento.
+- utilización = días alquilados / (días de la ventana - días en mantenimiento).
+
+Los días salen del calendario de ocupación ya agrupados por vehículo
+(`ocupacion.dias_por_vehiculo`): los meses completos de la ventana desde la
+tabla mensual y los extremos con una consulta agrupada sobre el calendario, así
+que la DB devuelve unas pocas filas por vehículo en lugar de los intervalos de
+cada alquiler. Las sumas por vehículo y por categoría se hacen con NumPy.
+"""
+from datetime import date
+from itertools import chain
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Vehiculo
+from . import ocupacion
+from .catalogos import catalogo_vehiculos
+
+
+def calcular_utilizacion(db: Session, inicio: date, fin: date, id_categoria: Optional[int] = None) -> dict:
+    """Utilización por vehículo, por categoría y total en [inicio, fin)."""
+    dias_ventana = (fin - inicio).days
+
+    vehiculos = select(Vehiculo.id_vehiculo, Vehiculo.patente, Vehiculo.id_categoria).order_by(Vehiculo.id_vehiculo)
+    if id_categoria is not None:
+        vehiculos = vehiculos.where(Vehiculo.id_categoria == id_categoria)
+    vehiculos = db.connection().execute(vehiculos).all()
+    ids = np.fromiter((v.id_vehiculo for v in vehiculos), dtype=np.int64, count=len(vehiculos))
+
+    del_categoria = None
+    if id_categoria is not None:
+        del_categoria = select(Vehiculo.id_vehiculo).where(Vehiculo.id_categoria == id_categoria)
+    dias_alquilados, dias_mantenimiento = _sumar_por_vehiculo(
+        ids, ocupacion.dias_por_vehiculo(db, inicio, fin, del_categoria)
+    )
+    dias_disponibles = dias_ventana - dias_mantenimiento
+
+    categorias = np.fromiter((v.id_categoria or 0 for v in vehiculos), dtype=np.int64, count=len(vehiculos))
+    ids_categoria, posicion = np.unique(categorias, return_inverse=True)
+    sumas = [
+        np.bincount(posicion, weights=dias, minlength=len(ids_categoria)).tolist()
+        for dias in (dias_alquilados, dias_mantenimiento, dias_disponibles)
+    ]
+    cantidades = np.bincount(posicion, minlength=len(ids_categoria)).tolist()
+    por_categoria = []
+    for i, id_cat in enumerate(ids_categoria.tolist()):
+        categoria = catalogo_vehiculos.categoria(db, id_cat) if id_cat else None
+        por_categoria.append(_item(
+            {
+                "id_categoria": id_cat or None,
+                "categoria": categoria.nombre if categoria else None,
+                "vehiculos": cantidades[i],
+            },
+            *(suma[i] for suma in sumas),
+        ))
+
+    # Una fila por vehículo: el dict se arma en línea (miles de filas por respuesta)
+    por_vehiculo = [
+        {
+            "id_vehiculo": id_vehiculo,
+            "patente": patente,
+            "id_categoria": id_cat,
+            "dias_alquilados": alquilados,
+            "dias_mantenimiento": mantenimiento,
+            "dias_disponibles": disponibles,
+            "utilizacion": round(alquilados / disponibles, 4) if disponibles else None,
+        }
+        for (id_vehiculo, patente, id_cat), alquilados, mantenimiento, disponibles in zip(
+            vehiculos, dias_alquilados.tolist(), dias_mantenimiento.tolist(), dias_disponibles.tolist()
+        )
+    ]
+
+    return {
+        "dias_ventana": dias_ventana,
+        "total": _item(
+            {"vehiculos": len(vehiculos)},
+            dias_alquilados.sum(), dias_mantenimiento.sum(), dias_disponibles.sum(),
+        ),
+        "por_categoria": por_categoria,
+        "por_vehiculo": por_vehiculo,
+    }
+
+
+def _sumar_por_vehiculo(ids: np.ndarray, filas) -> Tuple[np.ndarray, np.ndarray]:
+    """(días alquilados, días en mantenimiento) alineados con `ids` (ordenado).
+
+    `filas` son (id_vehiculo, días alquilados, días en mantenimiento); las de un
+    mismo vehículo se suman.
+    """
+    if not filas or not len(ids):
+        return np.zeros(len(ids), dtype=np.int64), np.zeros(len(ids), dtype=np.int64)
+
+    columnas = np.fromiter(chain.from_iterable(filas), dtype=np.int64, count=3 * len(filas))
+    id_vehiculo, alquilados, mantenimiento = columnas.reshape(-1, 3).T
+    fila = np.searchsorted(ids, id_vehiculo)
+    validos = fila < len(ids)
+    validos[validos] &= ids[fila[validos]] == id_vehiculo[validos]
+    fila = fila[validos]
+    return tuple(
+        np.bincount(fila, weights=dias[validos], minlength=len(ids)).astype(np.int64)
+        for dias in (alquilados, mantenimiento)
+    )
+
+
+def _item(base: dict, alquilados, mantenimiento, disponibles) -> dict:
+    alquilados, mantenimiento, disponibles = int(alquilados), int(mantenimiento), int(disponibles)
+    base.update(
+        dias_alquilados=alquilados,
+        dias_mantenimiento=mantenimiento,
+        dias_disponibles=disponibles,
+        utilizacion=round(alquilados / disponibles, 4) if disponibles else None,
+    )
+    return base
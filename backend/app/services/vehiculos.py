@@ -1,10 +1,16 @@
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import or_, exists, func, select
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple
 from datetime import date
 
 from ..models import Vehiculo, Alquiler, Mantenimiento
 from .exceptions import DomainNotFound, BusinessRuleError
+from . import ocupacion
+from .paginacion import paginar
+from .busqueda_texto import buscar_por_texto
+from .carga import CARGA_ALQUILER, CARGA_MANTENIMIENTO, CARGA_VEHICULO
+from . import resumen_mensual
+from .cache_reportes import cache_reportes
 from ..schemas.vehiculos import VehiculoDisponibilidadOut, VehiculoOut
 from ..schemas.vehiculos_disponibilidad import VehiculoDisponibilidadDetalleOut
 
@@ -22,7 +28,12 @@ def listar_vehiculos(
     km_hasta: Optional[int] = None,
     fecha_ultimo_mantenimiento_desde: Optional[date] = None,
     fecha_ultimo_mantenimiento_hasta: Optional[date] = None,
-) -> List[Vehiculo]:
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    campos: Optional[List[str]] = None,
+    q: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """Filtros por campo: substring. `q`: texto libre ordenado por relevancia (índice FULLTEXT/FTS5)."""
     query = db.query(Vehiculo)
 
     if patente:
@@ -58,7 +69,55 @@ def listar_vehiculos(
             )
         )
 
-    return query.all()
+    if q:
+        return buscar_por_texto(query, Vehiculo, q, limit=limit, cursor=cursor, campos=campos, opciones=CARGA_VEHICULO)
+    return paginar(
+        query, Vehiculo, [(Vehiculo.id_vehiculo, False)],
+        limit=limit, cursor=cursor, campos=campos, opciones=CARGA_VEHICULO,
+    )
+
+
+def buscar_vehiculos_libres(
+    db: Session,
+    id_categoria: int,
+    fecha_inicio: date,
+    fecha_fin: date,
+    marca: Optional[str] = None,
+    modelo: Optional[str] = None,
+    anio: Optional[int] = None,
+    page: int = 1,
+    size: int = 20,
+) -> Tuple[int, List[Vehiculo]]:
+    """Vehículos de la categoría sin alquileres bloqueantes ni mantenimientos en el período.
+
+    Usa el mismo calendario de ocupación que `validar_disponibilidad_vehiculo`,
+    como anti-join (NOT EXISTS) sobre (id_vehiculo, dia) en una única consulta paginada.
+    Retorna el total de vehículos libres y la página pedida.
+    """
+    if fecha_fin < fecha_inicio:
+        raise BusinessRuleError("La fecha fin no puede ser menor a la fecha inicio")
+
+    query = db.query(Vehiculo).filter(
+        Vehiculo.id_categoria == id_categoria,
+        ~ocupacion.vehiculo_ocupado(db, fecha_inicio, fecha_fin),
+    )
+
+    if marca:
+        query = query.filter(Vehiculo.marca.ilike(f"%{marca}%"))
+    if modelo:
+        query = query.filter(Vehiculo.modelo.ilike(f"%{modelo}%"))
+    if anio is not None:
+        query = query.filter(Vehiculo.anio == anio)
+
+    total = query.count()
+    vehiculos = (
+        query.options(joinedload(Vehiculo.categoria), joinedload(Vehiculo.estado))
+        .order_by(Vehiculo.id_vehiculo)
+        .offset((page - 1) * size)
+        .limit(size)
+        .all()
+    )
+    return total, vehiculos
 
 
 def obtener_vehiculo(db: Session, vehiculo_id: int) -> Vehiculo:
@@ -73,10 +132,15 @@ def actualizar_vehiculo(db: Session, vehiculo_id: int, data: dict) -> Vehiculo:
     if not vehiculo:
         raise DomainNotFound("Vehículo no encontrado")
 
+    if data.get("id_categoria") is not None and data["id_categoria"] != vehiculo.id_categoria:
+        # Los alquileres del vehículo pasan a contar para la nueva categoría
+        resumen_mensual.registrar_cambio_categoria(db, vehiculo_id, data["id_categoria"])
+
     for field, value in data.items():
         setattr(vehiculo, field, value)
 
     db.commit()
+    cache_reportes.invalidar("vehiculos")
     db.refresh(vehiculo)
     return vehiculo
 
@@ -90,6 +154,7 @@ def crear_vehiculo(db: Session, vehiculo_in) -> Vehiculo:
     vehiculo = Vehiculo(**vehiculo_in.model_dump())
     db.add(vehiculo)
     db.commit()
+    cache_reportes.invalidar("vehiculos")
     db.refresh(vehiculo)
     return vehiculo
 
@@ -113,48 +178,63 @@ def eliminar_vehiculo(db: Session, vehiculo_id: int) -> None:
 
     db.delete(vehiculo)
     db.commit()
+    cache_reportes.invalidar("vehiculos")
 
 
 def obtener_vehiculos_con_disponibilidad(db: Session) -> List[VehiculoDisponibilidadOut]:
-    vehiculos = db.query(Vehiculo).all()
+    """Calcula la disponibilidad de toda la flota en una sola consulta.
+
+    Cada indicador de ocupación es una subconsulta correlacionada sobre el
+    vehículo, en lugar de consultar mantenimientos y alquileres por separado
+    para cada uno. Precedencia: mantenimiento activo hoy, luego alquiler
+    EN_CURSO/CHECKOUT y por último reserva PENDIENTE.
+    """
     hoy = date.today()
-    
+
+    mantenimiento_activo = exists().where(
+        Mantenimiento.id_vehiculo == Vehiculo.id_vehiculo,
+        Mantenimiento.fecha_inicio <= hoy,
+        ((Mantenimiento.fecha_fin.is_(None)) | (Mantenimiento.fecha_fin >= hoy))
+    )
+    estado_alquiler_ocupado = (
+        select(func.min(Alquiler.estado))
+        .where(
+            Alquiler.id_vehiculo == Vehiculo.id_vehiculo,
+            Alquiler.estado.in_(["EN_CURSO", "CHECKOUT"])
+        )
+        .scalar_subquery()
+    )
+    reservado = exists().where(
+        Alquiler.id_vehiculo == Vehiculo.id_vehiculo,
+        Alquiler.estado == "PENDIENTE"
+    )
+
+    filas = (
+        db.query(
+            Vehiculo,
+            mantenimiento_activo.label("en_mantenimiento"),
+            estado_alquiler_ocupado.label("estado_alquiler"),
+            reservado.label("reservado"),
+        )
+        .options(joinedload(Vehiculo.categoria), joinedload(Vehiculo.estado))
+        .all()
+    )
+
     resultado: List[VehiculoDisponibilidadOut] = []
-    
-    for vehiculo in vehiculos:
+
+    for vehiculo, en_mantenimiento, estado_alquiler, esta_reservado in filas:
         estado_disponibilidad = "Disponible"
         ocupacion_detalle = None
 
-        # 1. Verificar si está en mantenimiento hoy (tiene prioridad)
-        mantenimiento_activo = db.query(Mantenimiento).filter(
-            Mantenimiento.id_vehiculo == vehiculo.id_vehiculo,
-            Mantenimiento.fecha_inicio <= hoy,
-            ((Mantenimiento.fecha_fin.is_(None)) | (Mantenimiento.fecha_fin >= hoy))
-        ).first()
-        
-        if mantenimiento_activo:
+        if en_mantenimiento:
             estado_disponibilidad = "En Mantenimiento"
             ocupacion_detalle = "MANTENIMIENTO"
-        else:
-            # 2. Verificar si está ocupado hoy por un alquiler EN_CURSO o CHECKOUT
-            alquiler_ocupado = db.query(Alquiler).filter(
-                Alquiler.id_vehiculo == vehiculo.id_vehiculo,
-                Alquiler.estado.in_(["EN_CURSO", "CHECKOUT"])
-            ).first()
-
-            if alquiler_ocupado:
-                estado_disponibilidad = "Ocupado"
-                ocupacion_detalle = alquiler_ocupado.estado
-            else:
-                # 3. Verificar si está reservado (PENDIENTE)
-                reserva = db.query(Alquiler).filter(
-                    Alquiler.id_vehiculo == vehiculo.id_vehiculo,
-                    Alquiler.estado == "PENDIENTE"
-                ).first()
-                
-                if reserva:
-                    estado_disponibilidad = "Ocupado"
-                    ocupacion_detalle = "RESERVADO"
+        elif estado_alquiler:
+            estado_disponibilidad = "Ocupado"
+            ocupacion_detalle = estado_alquiler
+        elif esta_reservado:
+            estado_disponibilidad = "Ocupado"
+            ocupacion_detalle = "RESERVADO"
 
         resultado.append(
             VehiculoDisponibilidadOut(
@@ -163,21 +243,24 @@ def obtener_vehiculos_con_disponibilidad(db: Session) -> List[VehiculoDisponibil
                 ocupacion_detalle=ocupacion_detalle
             )
         )
-    
+
     return resultado
 
 def obtener_disponibilidad(db: Session, vehiculo_id: int) -> VehiculoDisponibilidadDetalleOut:
-    vehiculo = obtener_vehiculo(db, vehiculo_id)
+    vehiculo = db.query(Vehiculo).options(*CARGA_VEHICULO).filter(Vehiculo.id_vehiculo == vehiculo_id).first()
+    if not vehiculo:
+        raise DomainNotFound("Vehículo no encontrado")
     hoy = date.today()
 
-    # Filtrar alquileres activos o futuros (no finalizados ni cancelados)
-    alquileres = db.query(Alquiler).filter(
+    # Filtrar alquileres activos o futuros (no finalizados ni cancelados).
+    # El vehículo de cada alquiler ya está en la sesión: no se vuelve a cargar.
+    alquileres = db.query(Alquiler).options(*CARGA_ALQUILER).filter(
         Alquiler.id_vehiculo == vehiculo_id,
         Alquiler.estado.in_(["PENDIENTE", "EN_CURSO", "CHECKOUT"])
     ).all()
     
     # Filtrar mantenimientos activos o futuros (sin fecha_fin o fecha_fin >= hoy)
-    mantenimientos = db.query(Mantenimiento).filter(
+    mantenimientos = db.query(Mantenimiento).options(*CARGA_MANTENIMIENTO).filter(
         Mantenimiento.id_vehiculo == vehiculo_id,
         or_(
             Mantenimiento.fecha_fin.is_(None),
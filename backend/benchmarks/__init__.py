@@ -0,0 +1,6 @@
+"""Benchmarks standalone de los caminos críticos.
+
+Cada módulo se ejecuta con `python -m benchmarks.<nombre>` desde backend/ y
+trabaja sobre una base propia (SQLite temporal o BENCH_DATABASE_URL), nunca
+sobre la configurada en app.database.
+"""
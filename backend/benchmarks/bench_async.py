@@ -0,0 +1,126 @@
+"""Benchmark de carga: requests/s de los endpoints calientes en modo sync vs. DB_ASYNC.
+
+Levanta la API con uvicorn en un subproceso por modo (ver servidor.py) y le
+aplica durante `--segundos` una mezcla de lecturas de los endpoints que tienen
+versión async (listado de alquileres, vehículos libres, alquileres por cliente)
+con N clientes concurrentes. Reporta requests/s, latencias p50/p99 y errores.
+
+    cd backend && python -m benchmarks.bench_async [--concurrencias 50 200 1000] [--segundos 10]
+
+Con BENCH_DATABASE_URL=mysql+pymysql://... el modo async usa aiomysql sobre la
+misma base; por defecto, SQLite (pysqlite / aiosqlite).
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from .datos import crear_base, poblar
+
+# Un puerto por modo: el servidor anterior puede tardar en liberar el suyo
+PUERTOS = {False: 8765, True: 8766}
+
+
+def url_async(url_sync: str) -> str:
+    return url_sync.replace("sqlite://", "sqlite+aiosqlite://", 1).replace("mysql+pymysql://", "mysql+aiomysql://", 1)
+
+
+def rutas(rnd: random.Random, clientes: int):
+    """Rutas de la mezcla, elegidas al azar en cada request para no responder siempre desde cache."""
+    inicio = date.today() + timedelta(days=rnd.randint(0, 90))
+    return rnd.choice([
+        "/alquileres/?limit=20",
+        f"/reports/alquileres-por-cliente?client_id={rnd.randint(1, clientes)}&size=10",
+        f"/vehiculos/libres?id_categoria={rnd.randint(1, 5)}"
+        f"&fecha_inicio={inicio}&fecha_fin={inicio + timedelta(days=rnd.randint(1, 10))}&limit=20",
+    ])
+
+
+def levantar_servidor(url_db: str, asincrono: bool, puerto: int) -> subprocess.Popen:
+    entorno = dict(os.environ, BENCH_SERVIDOR_DB=url_db, DB_ASYNC="true" if asincrono else "false")
+    if asincrono:
+        entorno["DB_ASYNC_URL"] = url_async(url_db)
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.servidor", "--puerto", str(puerto)],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            if httpx.get(f"http://127.0.0.1:{puerto}/", timeout=1).status_code == 200:
+                return proceso
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    proceso.kill()
+    raise SystemExit("El servidor no respondió")
+
+
+async def cargar(puerto: int, concurrencia: int, segundos: float, clientes: int) -> dict:
+    latencias, errores = [], 0
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{puerto}", limits=limites, timeout=60) as http:
+        fin = time.monotonic() + segundos
+
+        async def cliente(semilla: int):
+            nonlocal errores
+            rnd = random.Random(semilla)
+            while time.monotonic() < fin:
+                inicio = time.perf_counter()
+                try:
+                    respuesta = await http.get(rutas(rnd, clientes))
+                    if respuesta.status_code != 200:
+                        errores += 1
+                except httpx.HTTPError:
+                    errores += 1
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+        comienzo = time.monotonic()
+        await asyncio.gather(*(cliente(i) for i in range(concurrencia)))
+        duracion = time.monotonic() - comienzo
+
+    latencias.sort()
+    return {
+        "rps": len(latencias) / duracion,
+        "p50": statistics.median(latencias) if latencias else 0,
+        "p99": latencias[int(len(latencias) * 0.99) - 1] if latencias else 0,
+        "errores": errores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--vehiculos", type=int, default=500)
+    args = parser.parse_args()
+
+    clientes = 500
+    engine, SessionLocal = crear_base("async")
+    poblar(SessionLocal, vehiculos=args.vehiculos, clientes=clientes)
+    url_db = engine.url.render_as_string(hide_password=False)
+    engine.dispose()
+
+    print(f"{'modo':>6} {'clientes':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'errores':>8}")
+    for asincrono in (False, True):
+        servidor = levantar_servidor(url_db, asincrono, PUERTOS[asincrono])
+        try:
+            for concurrencia in args.concurrencias:
+                r = asyncio.run(cargar(PUERTOS[asincrono], concurrencia, args.segundos, clientes))
+                print(
+                    f"{'async' if asincrono else 'sync':>6} {concurrencia:>9} {r['rps']:>8.1f} "
+                    f"{r['p50']:>8.1f} {r['p99']:>9.1f} {r['errores']:>8}"
+                )
+        finally:
+            servidor.terminate()
+            servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark de obtener_vehiculos_con_disponibilidad: consulta única vs. bucle por vehículo.
+
+El bucle es la implementación anterior (hasta tres consultas por vehículo),
+reproducida acá para comparar. Verifica además que ambas den el mismo estado
+para cada vehículo.
+
+    cd backend && python -m benchmarks.bench_disponibilidad_flota [--tamanios 100 1000 10000]
+"""
+import argparse
+from datetime import date
+
+from app.models import Alquiler, Mantenimiento, Vehiculo
+from app.services.vehiculos import obtener_vehiculos_con_disponibilidad
+
+from .datos import contar_consultas, crear_base, medir, poblar
+
+
+def disponibilidad_por_vehiculo(db):
+    """Implementación anterior: hasta tres consultas por vehículo."""
+    hoy = date.today()
+    resultado = []
+    for vehiculo in db.query(Vehiculo).all():
+        estado, detalle = "Disponible", None
+        mantenimiento_activo = db.query(Mantenimiento).filter(
+            Mantenimiento.id_vehiculo == vehiculo.id_vehiculo,
+            Mantenimiento.fecha_inicio <= hoy,
+            ((Mantenimiento.fecha_fin.is_(None)) | (Mantenimiento.fecha_fin >= hoy))
+        ).first()
+        if mantenimiento_activo:
+            estado, detalle = "En Mantenimiento", "MANTENIMIENTO"
+        else:
+            alquiler_ocupado = db.query(Alquiler).filter(
+                Alquiler.id_vehiculo == vehiculo.id_vehiculo,
+                Alquiler.estado.in_(["EN_CURSO", "CHECKOUT"])
+            ).first()
+            if alquiler_ocupado:
+                estado, detalle = "Ocupado", alquiler_ocupado.estado
+            elif db.query(Alquiler).filter(
+                Alquiler.id_vehiculo == vehiculo.id_vehiculo,
+                Alquiler.estado == "PENDIENTE"
+            ).first():
+                estado, detalle = "Ocupado", "RESERVADO"
+        resultado.append((vehiculo.id_vehiculo, estado, detalle))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanios", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'vehículos':>10} {'bucle ms':>10} {'consultas':>10} {'única ms':>10} {'consultas':>10} {'mejora':>8}")
+    for tamanio in args.tamanios:
+        engine, SessionLocal = crear_base(f"disponibilidad_{tamanio}")
+        poblar(SessionLocal, vehiculos=tamanio)
+        db = SessionLocal()
+        try:
+            nueva = [(v.vehiculo.id_vehiculo, v.estado_disponibilidad, v.ocupacion_detalle)
+                     for v in obtener_vehiculos_con_disponibilidad(db)]
+            if sorted(nueva) != sorted(disponibilidad_por_vehiculo(db)):
+                raise SystemExit(f"Resultados distintos con {tamanio} vehículos")
+
+            def bucle():
+                db.expunge_all()
+                return disponibilidad_por_vehiculo(db)
+
+            def unica():
+                db.expunge_all()
+                return obtener_vehiculos_con_disponibilidad(db)
+
+            with contar_consultas(engine) as consultas_bucle:
+                bucle()
+            with contar_consultas(engine) as consultas_unica:
+                unica()
+            ms_bucle = medir(bucle, args.repeticiones)
+            ms_unica = medir(unica, args.repeticiones)
+        finally:
+            db.close()
+            engine.dispose()
+        print(
+            f"{tamanio:>10} {ms_bucle:>10.1f} {consultas_bucle[0]:>10} "
+            f"{ms_unica:>10.1f} {consultas_unica[0]:>10} {ms_bucle / ms_unica:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
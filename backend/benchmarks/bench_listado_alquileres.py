@@ -0,0 +1,70 @@
+"""Benchmark de GET /alquileres/ con listados grandes: filas por segundo.
+
+Compara, para una página de `--filas` alquileres serializada a JSON como lo
+hace el endpoint:
+- la implementación anterior: consulta sin estrategias de carga, con
+  cliente/vehículo/empleados cargados en forma lazy al serializar `AlquilerOut`;
+- la vista completa actual (CARGA_ALQUILER);
+- la vista resumen (`AlquilerResumenOut` con model_construct).
+
+    cd backend && python -m benchmarks.bench_listado_alquileres [--filas 10000]
+"""
+import argparse
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.models import Alquiler
+from app.schemas.alquileres import AlquilerOut, AlquilerResumenOut
+from app.services.alquileres import listar_alquileres
+
+from .datos import contar_consultas, crear_base, medir, poblar
+
+_LISTA_COMPLETA = TypeAdapter(List[AlquilerOut])
+_LISTA_RESUMEN = TypeAdapter(List[AlquilerResumenOut])
+
+
+def listado_anterior(db, filas: int) -> bytes:
+    """Implementación anterior: sin opciones de carga, una consulta por relación y fila."""
+    alquileres = (
+        db.query(Alquiler).order_by(Alquiler.fecha_inicio.desc(), Alquiler.id_alquiler.desc()).limit(filas).all()
+    )
+    return _LISTA_COMPLETA.dump_json(_LISTA_COMPLETA.validate_python(alquileres, from_attributes=True))
+
+
+def listado_completo(db, filas: int) -> bytes:
+    alquileres, _ = listar_alquileres(db, limit=filas)
+    return _LISTA_COMPLETA.dump_json(_LISTA_COMPLETA.validate_python(alquileres, from_attributes=True))
+
+
+def listado_resumen(db, filas: int) -> bytes:
+    alquileres, _ = listar_alquileres(db, limit=filas, vista="resumen")
+    return _LISTA_RESUMEN.dump_json(alquileres)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=10000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    engine, SessionLocal = crear_base("listado_alquileres")
+    poblar(SessionLocal, vehiculos=args.filas // 4 + 1, alquileres_por_vehiculo=4, clientes=2000)
+
+    print(f"{'variante':>10} {'filas':>7} {'ms':>9} {'filas/s':>9} {'consultas':>10}")
+    for nombre, funcion in (
+        ("anterior", listado_anterior), ("completa", listado_completo), ("resumen", listado_resumen),
+    ):
+        def correr():
+            # Sesión nueva en cada corrida: el identity map no debe ahorrar las cargas lazy
+            with SessionLocal() as db:
+                return funcion(db, args.filas)
+
+        with contar_consultas(engine) as consultas:
+            correr()
+        ms = medir(correr, args.repeticiones)
+        print(f"{nombre:>10} {args.filas:>7} {ms:>9.1f} {args.filas / ms * 1000:>9.0f} {consultas[0]:>10}")
+
+
+if __name__ == "__main__":
+    main()
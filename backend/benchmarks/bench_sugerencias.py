@@ -0,0 +1,100 @@
+"""Benchmark de /clientes/suggest: latencia del índice en memoria (indice_clientes).
+
+Puebla la tabla cliente con nombres sintéticos (nombres comunes y apellidos
+armados con sílabas, para tener un vocabulario grande), carga el índice desde la
+DB y mide `sugerir` sobre una mezcla de consultas como las del autocompletado:
+prefijos que se van alargando, dos palabras, DNI y errores de tipeo.
+
+    cd backend && python -m benchmarks.bench_sugerencias [--clientes 1000000] [--consultas 5000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import insert
+
+from app.models import Cliente
+from app.services.indice_clientes import IndiceClientes
+
+from .datos import crear_base
+
+NOMBRES = [
+    "Juan", "María", "José", "Ana", "Carlos", "Laura", "Luis", "Sofía", "Jorge", "Lucía",
+    "Pedro", "Marta", "Miguel", "Paula", "Diego", "Valentina", "Martín", "Camila", "Pablo", "Julieta",
+    "Andrés", "Florencia", "Fernando", "Agustina", "Ricardo", "Micaela", "Gustavo", "Carolina", "Sergio", "Natalia",
+]
+SILABAS = ["ba", "be", "ca", "co", "da", "de", "fe", "ga", "go", "la", "le", "lo", "ma", "me", "mo", "na",
+           "ne", "pe", "ra", "re", "ri", "ro", "sa", "se", "ta", "te", "to", "va", "vi", "za", "rez", "nez"]
+
+
+def apellido(rnd: random.Random) -> str:
+    return "".join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 4))).capitalize()
+
+
+def poblar_clientes(SessionLocal, cantidad: int, semilla: int = 7) -> list:
+    rnd = random.Random(semilla)
+    filas = []
+    with SessionLocal() as db:
+        for inicio in range(1, cantidad + 1, 10000):
+            lote = [
+                {
+                    "id_cliente": i,
+                    "nombre": rnd.choice(NOMBRES) if rnd.random() < 0.8 else apellido(rnd),
+                    "apellido": apellido(rnd),
+                    "dni": f"{20000000 + i}",
+                }
+                for i in range(inicio, min(inicio + 10000, cantidad + 1))
+            ]
+            db.execute(insert(Cliente), lote)
+            filas.extend(lote[::50])
+        db.commit()
+    return filas
+
+
+def consultas(rnd: random.Random, muestras: list, cantidad: int) -> list:
+    resultado = []
+    while len(resultado) < cantidad:
+        fila = rnd.choice(muestras)
+        tipo = rnd.random()
+        if tipo < 0.5:
+            # Tecleo del apellido: cada prefijo es un request
+            resultado.extend(fila["apellido"][:n] for n in range(1, len(fila["apellido"]) + 1))
+        elif tipo < 0.7:
+            resultado.append(f"{fila['nombre']} {fila['apellido'][:rnd.randint(1, 4)]}")
+        elif tipo < 0.8:
+            resultado.append(fila["dni"][:rnd.randint(3, 8)])
+        else:
+            palabra = fila["apellido"]
+            posicion = rnd.randrange(len(palabra))
+            resultado.append(palabra[:posicion] + rnd.choice("aeioux") + palabra[posicion + 1:])
+    return resultado[:cantidad]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=1_000_000)
+    parser.add_argument("--consultas", type=int, default=5000)
+    args = parser.parse_args()
+
+    _, SessionLocal = crear_base("sugerencias")
+    muestras = poblar_clientes(SessionLocal, args.clientes)
+    indice = IndiceClientes()
+    with SessionLocal() as db:
+        inicio = time.perf_counter()
+        indice.cargar(db)
+        print(f"carga del índice: {time.perf_counter() - inicio:.1f} s ({args.clientes} clientes)")
+
+        latencias = []
+        for consulta in consultas(random.Random(1), muestras, args.consultas):
+            inicio = time.perf_counter()
+            indice.sugerir(db, consulta, 10)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    latencias.sort()
+    print(f"p50 {statistics.median(latencias):.2f} ms  p99 {latencias[int(len(latencias) * 0.99) - 1]:.2f} ms  "
+          f"máx {latencias[-1]:.2f} ms  ({len(latencias)} consultas)")
+
+
+if __name__ == "__main__":
+    main()
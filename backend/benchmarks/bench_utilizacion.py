@@ -0,0 +1,63 @@
+"""Benchmark de GET /reports/utilizacion: flota grande y ventanas de varios años.
+
+Mide `calcular_utilizacion` más la serialización de la respuesta como la hace
+el endpoint (UtilizacionResponse a JSON), sin la caché de reportes, para:
+- tres años con extremos parciales (meses completos de la tabla mensual y los
+  extremos agrupados desde el calendario);
+- tres años en meses completos (solo la tabla mensual);
+- un mes parcial (solo el calendario);
+- una ventana que pasa el horizonte del calendario.
+
+    cd backend && python -m benchmarks.bench_utilizacion [--vehiculos 5000] [--anios 3] [--alquileres 130]
+"""
+import argparse
+from datetime import date, timedelta
+
+from app.schemas.reports import UtilizacionResponse
+from app.services import ocupacion
+from app.services.utilizacion import calcular_utilizacion
+
+from .datos import contar_consultas, crear_base, medir, poblar
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehiculos", type=int, default=5000)
+    parser.add_argument("--anios", type=int, default=3)
+    parser.add_argument("--alquileres", type=int, default=130, help="alquileres por vehículo")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, SessionLocal = crear_base("utilizacion")
+    hasta = date.today() + timedelta(days=60)
+    datos = poblar(
+        SessionLocal, vehiculos=args.vehiculos, alquileres_por_vehiculo=args.alquileres, clientes=2000,
+        anios=args.anios, hasta=hasta,
+    )
+    print(f"{datos['vehiculos']} vehículos, {datos['alquileres']} alquileres, {datos['mantenimientos']} mantenimientos")
+
+    desde = hasta - timedelta(days=365 * args.anios)
+    ventanas = {
+        f"{args.anios} años": (desde, hasta),
+        f"{args.anios} años, meses": (desde.replace(day=1), hasta.replace(day=1)),
+        "1 mes": (hasta - timedelta(days=31), hasta),
+        "horizonte": (date.today(), date.today() + timedelta(days=ocupacion.HORIZONTE_DIAS + 60)),
+    }
+
+    print(f"{'ventana':>16} {'días':>6} {'ms':>8} {'consultas':>10}")
+    for nombre, (inicio, fin) in ventanas.items():
+        def correr():
+            with SessionLocal() as db:
+                resultado = calcular_utilizacion(db, inicio, fin)
+                return UtilizacionResponse(
+                    desde=str(inicio), hasta=str(fin), id_categoria=None, **resultado,
+                ).model_dump_json()
+
+        with contar_consultas(engine) as consultas:
+            correr()
+        ms = medir(correr, args.repeticiones)
+        print(f"{nombre:>16} {(fin - inicio).days:>6} {ms:>8.1f} {consultas[0]:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Base de datos y datos sintéticos para los benchmarks.
+
+Por defecto cada benchmark trabaja sobre un archivo SQLite temporal; con
+BENCH_DATABASE_URL (p. ej. mysql+pymysql://...) corre contra otra base, que se
+vacía y se vuelve a poblar. Los datos se insertan con Core en lotes, sin pasar
+por los servicios, y los derivados (resumen mensual, ocupación, ranking) se
+reconstruyen al final como hace el seed.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Callable, List, Optional
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import (
+    Alquiler,
+    CategoriaVehiculo,
+    Cliente,
+    Empleado,
+    EstadoVehiculo,
+    Mantenimiento,
+    MultaDanio,
+    Vehiculo,
+)
+from app.services import ocupacion, ranking_vehiculos, resumen_mensual
+
+LOTE = 5000
+ESTADOS_VEHICULO = ["Disponible", "Ocupado", "Mantenimiento", "Fuera de servicio"]
+
+
+def crear_base(nombre: str, url: Optional[str] = None):
+    """(engine, SessionLocal) sobre una base vacía con todas las tablas."""
+    url = url or os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        ruta = os.path.join(tempfile.gettempdir(), f"bench_{nombre}.db")
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        url = f"sqlite:///{ruta}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def poblar(
+    SessionLocal,
+    vehiculos: int,
+    alquileres_por_vehiculo: int = 4,
+    clientes: int = 500,
+    anios: int = 1,
+    hasta: Optional[date] = None,
+    semilla: int = 42,
+) -> dict:
+    """Flota de `vehiculos` con alquileres y mantenimientos repartidos en los últimos `anios`.
+
+    Los alquileres de un mismo vehículo no se solapan entre sí; los estados
+    siguen las fechas respecto de hoy (FINALIZADO, EN_CURSO, PENDIENTE, con
+    algunos CANCELADO).
+    """
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    hasta = hasta or hoy + timedelta(days=60)
+    desde = hasta - timedelta(days=365 * anios)
+    dias = (hasta - desde).days
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(EstadoVehiculo), [{"id_estado": i, "nombre": n} for i, n in enumerate(ESTADOS_VEHICULO, 1)])
+        db.execute(insert(CategoriaVehiculo), [
+            {"id_categoria": i, "nombre": f"Categoría {i}", "tarifa_diaria": Decimal(30 + 10 * i)} for i in range(1, 6)
+        ])
+        db.execute(insert(Empleado), [
+            {"id_empleado": i, "nombre": f"Empleado{i}", "apellido": "Bench", "dni": f"E{i}", "legajo": f"L{i}"}
+            for i in range(1, 11)
+        ])
+        _insertar(db, Cliente, (
+            {
+                "id_cliente": i, "nombre": f"Nombre{i}", "apellido": f"Apellido{i % 997}",
+                "dni": f"{30000000 + i}", "email": f"cliente{i}@example.com",
+            }
+            for i in range(1, clientes + 1)
+        ))
+        _insertar(db, Vehiculo, (
+            {
+                "id_vehiculo": i, "patente": f"BN{i:06d}", "marca": f"Marca{i % 13}", "modelo": f"Modelo{i % 41}",
+                "anio": 2015 + i % 10, "id_categoria": 1 + i % 5, "id_estado": 1, "km_actual": 10000 + i,
+            }
+            for i in range(1, vehiculos + 1)
+        ))
+
+        alquileres: List[dict] = []
+        mantenimientos: List[dict] = []
+        for id_vehiculo in range(1, vehiculos + 1):
+            # Puntos de corte ordenados: alquileres consecutivos sin solaparse
+            cortes = sorted(rnd.sample(range(dias), min(dias, alquileres_por_vehiculo * 2)))
+            for inicio, fin in zip(cortes[::2], cortes[1::2]):
+                fecha_inicio = desde + timedelta(days=inicio)
+                fecha_fin = desde + timedelta(days=min(fin, inicio + 14))
+                if fecha_fin < hoy:
+                    estado = "FINALIZADO"
+                elif fecha_inicio <= hoy:
+                    estado = "EN_CURSO"
+                else:
+                    estado = "PENDIENTE"
+                if rnd.random() < 0.05:
+                    estado = "CANCELADO"
+                costo = Decimal(rnd.randint(50, 900))
+                alquileres.append({
+                    "id_cliente": rnd.randint(1, clientes), "id_vehiculo": id_vehiculo, "id_empleado": rnd.randint(1, 10),
+                    "fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "costo_base": costo, "costo_total": costo,
+                    "estado": estado,
+                })
+            if rnd.random() < 0.1:
+                inicio = desde + timedelta(days=rnd.randrange(dias))
+                mantenimientos.append({
+                    "id_vehiculo": id_vehiculo, "fecha_inicio": inicio,
+                    "fecha_fin": None if rnd.random() < 0.1 else inicio + timedelta(days=rnd.randint(1, 7)),
+                    "tipo": "preventivo", "costo": Decimal(100), "id_empleado": 1,
+                })
+        _insertar(db, Alquiler, alquileres)
+        _insertar(db, Mantenimiento, mantenimientos)
+        _insertar(db, MultaDanio, (
+            {"id_alquiler": i, "tipo": "multa", "monto": Decimal(50), "fecha_registro": datetime.now()}
+            for i in range(1, len(alquileres) + 1, 20)
+        ))
+        db.commit()
+
+        resumen_mensual.reconstruir(db)
+        ocupacion.reconstruir(db)
+        ranking_vehiculos.reconstruir(db)
+        return {"vehiculos": vehiculos, "alquileres": len(alquileres), "mantenimientos": len(mantenimientos)}
+    finally:
+        db.close()
+
+
+def _insertar(db, modelo, filas) -> None:
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == LOTE:
+            db.execute(insert(modelo), lote)
+            lote = []
+    if lote:
+        db.execute(insert(modelo), lote)
+
+
+@contextmanager
+def contar_consultas(engine):
+    """Cuenta las sentencias que ejecuta `engine` dentro del bloque: `with ... as c: ...; c[0]`."""
+    contador = [0]
+
+    def _contar(*_):
+        contador[0] += 1
+
+    event.listen(engine, "before_cursor_execute", _contar)
+    try:
+        yield contador
+    finally:
+        event.remove(engine, "before_cursor_execute", _contar)
+
+
+def medir(funcion: Callable[[], object], repeticiones: int = 5) -> float:
+    """Mediana en milisegundos de `repeticiones` ejecuciones (después de una de calentamiento)."""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
@@ -0,0 +1,31 @@
+"""Levanta la API con uvicorn sobre la base de un benchmark.
+
+    BENCH_SERVIDOR_DB=sqlite:////tmp/bench_x.db python -m benchmarks.servidor --puerto 8765
+
+El engine sync se reemplaza antes de importar app.main (como en los tests). El
+modo async se elige igual que en producción, con DB_ASYNC y DB_ASYNC_URL.
+"""
+import argparse
+import os
+
+import uvicorn
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Database, crear_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puerto", type=int, default=8765)
+    args = parser.parse_args()
+
+    Database.engine = crear_engine(os.environ["BENCH_SERVIDOR_DB"], Database.config_pool)
+    Database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=Database.engine)
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.puerto, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
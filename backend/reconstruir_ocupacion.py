@@ -0,0 +1,40 @@
+"""
+Script para reconstruir o verificar el calendario de ocupación de vehículos
+Ejecutar desde la raíz del proyecto backend:
+    python reconstruir_ocupacion.py             # recalcula la tabla completa
+    python reconstruir_ocupacion.py --verificar # solo compara contra alquileres y mantenimientos
+"""
+import sys
+import os
+
+# Agregar el directorio actual al path para poder importar los módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base, Database
+from app import models  # noqa: F401  (registra los modelos en Base.metadata)
+from app.services.ocupacion import reconstruir, verificar
+
+
+def main():
+    Base.metadata.create_all(bind=Database.engine)
+    db = Database.SessionLocal()
+    try:
+        if "--verificar" in sys.argv[1:]:
+            resultado = verificar(db)
+            print(
+                f"Calendario de ocupación: {resultado['filas']} filas, "
+                f"{resultado['faltantes']} faltantes, {resultado['sobrantes']} sobrantes"
+            )
+            for fila in resultado["muestra_faltantes"]:
+                print(f"  faltante: {fila}")
+            for fila in resultado["muestra_sobrantes"]:
+                print(f"  sobrante: {fila}")
+            sys.exit(1 if resultado["faltantes"] or resultado["sobrantes"] else 0)
+        filas = reconstruir(db)
+        print(f"Calendario de ocupación reconstruido: {filas} filas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Script para reconstruir (backfill) el ranking mensual de vehículos más alquilados
+Ejecutar desde la raíz del proyecto backend:
+    python reconstruir_ranking_vehiculos.py
+"""
+import sys
+import os
+
+# Agregar el directorio actual al path para poder importar los módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base, Database
+from app import models  # noqa: F401  (registra los modelos en Base.metadata)
+from app.services.ranking_vehiculos import reconstruir
+
+
+def main():
+    Base.metadata.create_all(bind=Database.engine)
+    db = Database.SessionLocal()
+    try:
+        filas = reconstruir(db)
+        print(f"Ranking de vehículos reconstruido: {filas} filas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
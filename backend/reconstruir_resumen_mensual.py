@@ -0,0 +1,28 @@
+"""
+Script para reconstruir (backfill) el resumen mensual de alquileres
+Ejecutar desde la raíz del proyecto backend:
+    python reconstruir_resumen_mensual.py
+"""
+import sys
+import os
+
+# Agregar el directorio actual al path para poder importar los módulos
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import Base, Database
+from app import models  # noqa: F401  (registra los modelos en Base.metadata)
+from app.services.resumen_mensual import reconstruir
+
+
+def main():
+    Base.metadata.create_all(bind=Database.engine)
+    db = Database.SessionLocal()
+    try:
+        filas = reconstruir(db)
+        print(f"Resumen mensual reconstruido: {filas} filas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Fixtures compartidas: la app completa sobre una base de prueba.
+
+Por defecto un archivo SQLite temporal; TEST_DATABASE_URL permite correr la
+suite contra MySQL (la base indicada se vacía y se vuelve a poblar con el seed).
+El engine se reemplaza antes de importar app.main, como en un despliegue con
+otra DB_URL.
+"""
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import ConfiguracionPool, Database, crear_engine
+
+TEST_DATABASE_URL = os.getenv(
+    "TEST_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='dao_tests_'), 'test.db')}",
+)
+ES_SQLITE = TEST_DATABASE_URL.startswith("sqlite")
+
+Database.engine = crear_engine(TEST_DATABASE_URL, ConfiguracionPool(pool_size=10, max_overflow=20, pool_timeout=30))
+Database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=Database.engine)
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient con el startup ejecutado (tablas, índices, catálogos)."""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def seed(client):
+    """Datos del seed extendido, recargados para cada test."""
+    respuesta = client.post("/seed/?mode=extended")
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()["datos_cargados"]
+
+
+@pytest.fixture
+def db(client):
+    sesion = Database.SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.database import Database
+from app.models import Alquiler
+
+
+def _alquiler(id_vehiculo, mes, costo_base):
+    return {
+        "id_cliente": 1, "id_vehiculo": id_vehiculo, "id_empleado": 1,
+        "fecha_inicio": f"2031-{mes:02d}-01", "fecha_fin": f"2031-{mes:02d}-05", "costo_base": costo_base,
+    }
+
+
+def test_lote_con_mas_decimales_que_la_columna(client, seed, db):
+    lote = [_alquiler(11, 3, "100.123"), _alquiler(11, 4, "100.12"), _alquiler(12, 3, "99.999")]
+
+    respuesta = client.post("/alquileres/lote", json={"alquileres": lote, "modo": "todo_o_nada"})
+
+    assert respuesta.status_code == 201, respuesta.text
+    resultados = respuesta.json()["resultados"]
+    assert all(r["ok"] for r in resultados)
+    for enviado, resultado in zip(lote, resultados):
+        alquiler = db.get(Alquiler, resultado["id_alquiler"])
+        assert (alquiler.id_vehiculo, alquiler.fecha_inicio.isoformat()) == (enviado["id_vehiculo"], enviado["fecha_inicio"])
+        assert abs(alquiler.costo_base - Decimal(enviado["costo_base"])) < Decimal("0.01")
+
+
+def test_lote_asigna_cada_id_a_su_fila(client, seed, db):
+    # Filas que difieren solo en el vehículo y la fecha: el id devuelto debe ser el de esa fila
+    lote = [_alquiler(13 + i % 3, 1 + i // 3, "150") for i in range(9)]
+
+    respuesta = client.post("/alquileres/lote", json={"alquileres": lote, "modo": "parcial"})
+
+    assert respuesta.status_code == 201, respuesta.text
+    for enviado, resultado in zip(lote, respuesta.json()["resultados"]):
+        alquiler = db.get(Alquiler, resultado["id_alquiler"])
+        assert (alquiler.id_vehiculo, alquiler.fecha_inicio.isoformat()) == (enviado["id_vehiculo"], enviado["fecha_inicio"])
+
+
+def test_lote_inserta_en_un_solo_statement(client, seed, db):
+    lote = [_alquiler(17 + i % 2, 6 + i // 2, "120") for i in range(6)]
+    inserts = []
+
+    def _registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO ALQUILER "):
+            inserts.append(statement)
+
+    event.listen(Database.engine, "before_cursor_execute", _registrar)
+    try:
+        respuesta = client.post("/alquileres/lote", json={"alquileres": lote, "modo": "todo_o_nada"})
+    finally:
+        event.remove(Database.engine, "before_cursor_execute", _registrar)
+
+    assert respuesta.status_code == 201, respuesta.text
+    assert len(inserts) == 1
+    ids = [r["id_alquiler"] for r in respuesta.json()["resultados"]]
+    for enviado, id_alquiler in zip(lote, ids):
+        alquiler = db.get(Alquiler, id_alquiler)
+        assert (alquiler.id_vehiculo, alquiler.fecha_inicio.isoformat()) == (enviado["id_vehiculo"], enviado["fecha_inicio"])
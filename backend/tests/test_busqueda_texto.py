@@ -0,0 +1,39 @@
+"""Listados: filtros por campo por substring y `q` por el índice de texto."""
+import pytest
+
+
+@pytest.fixture
+def cliente_gonzalez(client, seed):
+    respuesta = client.post("/clientes/", json={
+        "nombre": "Mariela", "apellido": "Fernández González", "dni": "77777777",
+        "email": "mariela.gonzalez@example.com", "telefono": "1155550000", "direccion": "Av. Siempreviva 742",
+    })
+    assert respuesta.status_code in (200, 201), respuesta.text
+    return respuesta.json()["id_cliente"]
+
+
+@pytest.mark.parametrize("filtro", [
+    {"apellido": "gonzál"},
+    {"apellido": "Fernández"},
+    {"email": "gonzalez@"},
+    {"dni": "7777"},
+    {"direccion": "siempreviva"},
+])
+def test_filtros_por_campo_buscan_substring(client, cliente_gonzalez, filtro):
+    ids = [c["id_cliente"] for c in client.get("/clientes/", params={**filtro, "limit": 500}).json()]
+
+    assert cliente_gonzalez in ids
+
+
+def test_filtros_de_vehiculos_buscan_substring(client, seed):
+    vehiculo = client.get("/vehiculos/", params={"limit": 1}).json()[0]
+
+    ids = [v["id_vehiculo"] for v in client.get("/vehiculos/", params={"modelo": vehiculo["modelo"][1:], "limit": 500}).json()]
+
+    assert vehiculo["id_vehiculo"] in ids
+
+
+def test_q_usa_el_indice_de_texto(client, cliente_gonzalez):
+    resultado = client.get("/clientes/", params={"q": "mariela gonz"}).json()
+
+    assert [c["id_cliente"] for c in resultado][:1] == [cliente_gonzalez]
@@ -0,0 +1,114 @@
+"""Cache de reportes: después de escribir por la API, la lectura siguiente está al día.
+
+Cada escritura invalida los dominios de los que dependen los reportes; la
+lectura que sigue es un fallo (recalcula) y la siguiente un acierto.
+"""
+ID_VEHICULO = 21
+ID_VEHICULO_MANTENIMIENTO = 40
+ANIO = 2034
+
+
+def _metricas(client, reporte):
+    metricas = client.get("/reports/cache/metricas").json()["reportes"][reporte]
+    return metricas["aciertos"], metricas["fallos"]
+
+
+def _leer(client, url, params, reporte):
+    """Lee el reporte y devuelve (cuerpo, fue_acierto)."""
+    aciertos, fallos = _metricas(client, reporte)
+    respuesta = client.get(url, params=params)
+    assert respuesta.status_code == 200, respuesta.text
+    despues = _metricas(client, reporte)
+    assert despues in ((aciertos + 1, fallos), (aciertos, fallos + 1))
+    return respuesta.json(), despues[0] == aciertos + 1
+
+
+def _alquilar(client, id_cliente, mes, id_vehiculo=ID_VEHICULO):
+    respuesta = client.post("/alquileres/", json={
+        "id_cliente": id_cliente, "id_vehiculo": id_vehiculo, "id_empleado": 1,
+        "fecha_inicio": f"{ANIO}-{mes:02d}-01", "fecha_fin": f"{ANIO}-{mes:02d}-05", "costo_base": 100,
+    })
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()["id_alquiler"]
+
+
+def _por_mes(cuerpo):
+    return {item["periodo"]: item["cantidad_alquileres"] for item in cuerpo["items"]}
+
+
+def _facturado(cuerpo, mes):
+    return next((item["monto_total"] for item in cuerpo["items"] if item["mes"] == mes), 0)
+
+
+def test_alta_de_alquiler_refresca_el_reporte_por_periodo(client, seed):
+    url, reporte = "/reports/alquileres-por-periodo", "alquileres_por_periodo"
+    params = {"desde": f"{ANIO}-01-01", "hasta": f"{ANIO}-12-31"}
+    antes, _ = _leer(client, url, params, reporte)
+    cuerpo, acierto = _leer(client, url, params, reporte)
+    assert acierto and cuerpo == antes
+
+    _alquilar(client, 1, 3)
+
+    cuerpo, acierto = _leer(client, url, params, reporte)
+    assert not acierto
+    assert _por_mes(cuerpo).get(f"{ANIO}-03", 0) == _por_mes(antes).get(f"{ANIO}-03", 0) + 1
+    assert _leer(client, url, params, reporte) == (cuerpo, True)
+
+
+def test_alta_de_multa_refresca_la_facturacion(client, seed):
+    url, params, reporte = "/reports/facturacion-mensual", {"anio": ANIO}, "facturacion_mensual"
+    id_alquiler = _alquilar(client, 1, 4)
+    antes, _ = _leer(client, url, params, reporte)
+    assert _leer(client, url, params, reporte) == (antes, True)
+
+    respuesta = client.post("/multas-danios/", json={
+        "id_alquiler": id_alquiler, "tipo": "multa", "monto": 35, "fecha_registro": f"{ANIO}-04-05T10:00:00",
+    })
+    assert respuesta.status_code == 201, respuesta.text
+
+    cuerpo, acierto = _leer(client, url, params, reporte)
+    assert not acierto
+    assert _facturado(cuerpo, 4) == _facturado(antes, 4) + 35
+
+
+def test_alta_de_mantenimiento_refresca_la_utilizacion(client, seed):
+    url, reporte = "/reports/utilizacion", "utilizacion"
+    params = {"desde": f"{ANIO}-06-01", "hasta": f"{ANIO}-06-30"}
+
+    def dias_mantenimiento(cuerpo):
+        por_vehiculo = {v["id_vehiculo"]: v for v in cuerpo["por_vehiculo"]}
+        return por_vehiculo[ID_VEHICULO_MANTENIMIENTO]["dias_mantenimiento"]
+
+    antes, _ = _leer(client, url, params, reporte)
+    assert _leer(client, url, params, reporte) == (antes, True)
+
+    respuesta = client.post("/mantenimientos/", json={
+        "id_vehiculo": ID_VEHICULO_MANTENIMIENTO, "fecha_inicio": f"{ANIO}-06-10", "fecha_fin": f"{ANIO}-06-14",
+        "tipo": "correctivo", "id_empleado": 1,
+    })
+    assert respuesta.status_code == 201, respuesta.text
+
+    cuerpo, acierto = _leer(client, url, params, reporte)
+    assert not acierto
+    assert dias_mantenimiento(cuerpo) == dias_mantenimiento(antes) + 5
+
+
+def test_escrituras_de_alquileres_refrescan_el_total_por_cliente(client, seed):
+    url, reporte = "/reports/alquileres-por-cliente", "alquileres_por_cliente"
+    params = {"desde": f"{ANIO}-07-01", "hasta": f"{ANIO}-12-31", "size": 1}
+
+    def totales():
+        return tuple(
+            _leer(client, url, {**params, "client_id": id_cliente}, reporte)[0]["total"] for id_cliente in (2, 3)
+        )
+
+    antes = totales()
+    id_alquiler = _alquilar(client, 2, 8, id_vehiculo=39)
+    assert totales() == (antes[0] + 1, antes[1])
+
+    respuesta = client.put(f"/alquileres/{id_alquiler}", json={"id_cliente": 3})
+    assert respuesta.status_code == 200, respuesta.text
+    assert totales() == (antes[0], antes[1] + 1)
+
+    assert client.delete(f"/alquileres/{id_alquiler}").status_code == 204
+    assert totales() == antes
@@ -0,0 +1,106 @@
+"""Contador de consultas por request: Server-Timing, /debug/requests, N+1 y presupuestos."""
+import logging
+import re
+
+import pytest
+from fastapi import Depends
+from sqlalchemy import event, text
+
+from app.database import Database, get_db
+from app.main import app
+from app.metricas import consultas
+from app.metricas.consultas import huella, presupuesto_consultas
+
+_SERVER_TIMING = re.compile(r'db;dur=[\d.]+;desc="(\d+) consultas", total;dur=[\d.]+')
+
+
+def consultas_informadas(respuesta) -> int:
+    coincidencia = _SERVER_TIMING.fullmatch(respuesta.headers["server-timing"])
+    assert coincidencia, respuesta.headers["server-timing"]
+    return int(coincidencia.group(1))
+
+
+@pytest.fixture(scope="module")
+def rutas_de_prueba(client):
+    """Endpoints que hacen `n` consultas iguales con presupuesto 2."""
+    def n_consultas(n: int, db=Depends(get_db)):
+        for _ in range(n):
+            db.execute(text("SELECT 1")).all()
+        return {"n": n}
+
+    app.add_api_route("/_pruebas/consultas", n_consultas, methods=["GET"],
+                      dependencies=[Depends(presupuesto_consultas(2))])
+    yield "/_pruebas/consultas"
+    app.router.routes[:] = [r for r in app.router.routes if getattr(r, "path", None) != "/_pruebas/consultas"]
+
+
+def test_server_timing_cuenta_las_consultas_del_request(client, seed):
+    ejecutadas = []
+    escuchar = lambda *args: ejecutadas.append(1)  # noqa: E731
+    event.listen(Database.engine, "after_cursor_execute", escuchar)
+    try:
+        respuesta = client.get("/alquileres/?limit=20")
+    finally:
+        event.remove(Database.engine, "after_cursor_execute", escuchar)
+
+    assert respuesta.status_code == 200
+    assert consultas_informadas(respuesta) == len(ejecutadas) > 0
+
+
+def test_debug_requests_registra_consultas_y_repetidas(client, rutas_de_prueba):
+    client.get(rutas_de_prueba, params={"n": 6})
+
+    ultimo = client.get("/debug/requests", params={"limit": 5}).json()
+    registro = next(r for r in ultimo if r["ruta"] == rutas_de_prueba)
+    assert registro["consultas"] == 6
+    assert registro["presupuesto"] == 2
+    assert registro["repetidas"] == [{"huella": "SELECT ?", "veces": 6}]
+
+    solo_repetidas = client.get("/debug/requests", params={"solo_repetidas": True}).json()
+    assert all(r["repetidas"] for r in solo_repetidas)
+
+
+def test_presupuesto_excedido_se_informa(client, rutas_de_prueba, caplog):
+    with caplog.at_level(logging.WARNING, logger="app.metricas.consultas"):
+        respuesta = client.get(rutas_de_prueba, params={"n": 3})
+
+    assert respuesta.status_code == 200
+    assert consultas_informadas(respuesta) == 3
+    assert any("excedió su presupuesto de consultas (3/2)" in m for m in caplog.messages)
+
+
+def test_modo_estricto_falla_al_exceder_el_presupuesto(client, rutas_de_prueba, monkeypatch):
+    monkeypatch.setattr(consultas, "ESTRICTO", True)
+
+    assert client.get(rutas_de_prueba, params={"n": 2}).status_code == 200
+    with pytest.raises(consultas.PresupuestoConsultasExcedido, match="3 consultas, presupuesto 2"):
+        client.get(rutas_de_prueba, params={"n": 3})
+
+
+# Endpoints con presupuesto declarado: en modo estricto deben respetarlo con los datos del seed
+ENDPOINTS_CON_PRESUPUESTO = [
+    "/vehiculos/disponibilidad",
+    "/vehiculos/libres?id_categoria=1&fecha_inicio=2031-01-01&fecha_fin=2031-01-10",
+    "/reports/alquileres-por-cliente?client_id=3&size=5",
+    "/reports/vehiculos-mas-alquilados?limit=5&desde=2024-03-15&hasta=2024-09-10",
+    "/reports/alquileres-por-periodo?periodo=mes&desde=2024-01-10&hasta=2024-11-20",
+    "/reports/facturacion-mensual?anio=2024",
+    "/reports/utilizacion?desde=2024-01-01&hasta=2024-06-30",
+]
+
+
+@pytest.mark.parametrize("url", ENDPOINTS_CON_PRESUPUESTO)
+def test_endpoints_respetan_su_presupuesto(client, seed, url, monkeypatch):
+    monkeypatch.setattr(consultas, "ESTRICTO", True)
+
+    respuesta = client.get(url)
+
+    assert respuesta.status_code == 200, respuesta.text
+    registro = next(r for r in client.get("/debug/requests", params={"limit": 5}).json() if r["ruta"] == url.split("?")[0])
+    assert registro["presupuesto"] is not None
+    assert registro["consultas"] <= registro["presupuesto"]
+
+
+def test_huella_normaliza_literales_y_listas():
+    assert huella("SELECT * FROM t WHERE id IN (?, ?, ?) AND x = 'a''b'  AND y = 10") == \
+        "SELECT * FROM t WHERE id IN (?) AND x = ? AND y = ?"
@@ -0,0 +1,39 @@
+"""Índice de /clientes/suggest: búsquedas de varias palabras y recarga por TTL."""
+from sqlalchemy import insert
+
+from app.models import Cliente
+from app.services.indice_clientes import IndiceClientes
+
+
+def _insertar_directo(db, **cliente):
+    """Alta sin pasar por el servicio, como la haría otro proceso."""
+    db.execute(insert(Cliente).values(**cliente))
+    db.commit()
+
+
+def _ids(sugerencias):
+    return {s["id_cliente"] for s in sugerencias}
+
+
+def test_varias_palabras_son_prefijos_de_palabras_del_cliente(seed, db):
+    _insertar_directo(db, id_cliente=9001, nombre="Agustina", apellido="Ferreyra", dni="90000001")
+    _insertar_directo(db, id_cliente=9002, nombre="Agustina", apellido="Benítez", dni="90000002")
+    _insertar_directo(db, id_cliente=9003, nombre="Ferrán", apellido="Agusti", dni="90000003")
+    indice = IndiceClientes()
+
+    assert _ids(indice.sugerir(db, "agustina fe", 10)) >= {9001}
+    assert not _ids(indice.sugerir(db, "agustina fe", 10)) & {9002}
+    assert _ids(indice.sugerir(db, "fe agus", 10)) >= {9001, 9003}
+    assert _ids(indice.sugerir(db, "Agustina Benitez", 10)) == {9002}
+    assert [s["id_cliente"] for s in indice.sugerir(db, "9000000", 3)] == [9001, 9002, 9003]
+
+
+def test_las_altas_de_otro_proceso_se_ven_al_vencer_el_ttl(seed, db):
+    indice = IndiceClientes(ttl_segundos=3600)
+    indice.sugerir(db, "Zarathustra", 5)  # carga el índice
+
+    _insertar_directo(db, id_cliente=9100, nombre="Zarathustra", apellido="Quiroga", dni="91000000")
+    assert 9100 not in _ids(indice.sugerir(db, "Zarathustra", 5))
+
+    indice._ttl = 0
+    assert 9100 in _ids(indice.sugerir(db, "Zarathustra", 5))
@@ -0,0 +1,60 @@
+import base64
+import json
+
+import pytest
+from sqlalchemy import update
+
+from app.models import MultaDanio
+from app.routers.paginacion import CABECERA_CURSOR
+from app.services.paginacion import paginar
+
+
+def recorrer(client, url, limit, clave):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        respuesta = client.get(url, params=params)
+        assert respuesta.status_code == 200, respuesta.text
+        ids += [fila[clave] for fila in respuesta.json()]
+        cursor = respuesta.headers.get(CABECERA_CURSOR)
+        if not cursor:
+            return ids
+
+
+def test_multas_con_fecha_registro_nula_no_se_saltean(client, seed, db):
+    ids_nulos = [m.id_multa_danio for m in db.query(MultaDanio).limit(3)]
+    db.execute(update(MultaDanio).where(MultaDanio.id_multa_danio.in_(ids_nulos)).values(fecha_registro=None))
+    db.commit()
+
+    ids = recorrer(client, "/multas-danios/", 2, "id_multa_danio")
+
+    assert len(ids) == seed["multas_danios"]
+    assert ids == sorted(ids, reverse=True)
+    assert set(ids_nulos) <= set(ids)
+
+
+@pytest.mark.parametrize("url,clave", [
+    ("/alquileres/", "id_alquiler"),
+    ("/clientes/", "id_cliente"),
+    ("/mantenimientos/", "id_mantenimiento"),
+])
+def test_paginas_por_cursor_igual_al_listado_completo(client, seed, url, clave):
+    completo = [fila[clave] for fila in client.get(url).json()]
+
+    assert recorrer(client, url, 7, clave) == completo
+
+
+def test_paginar_rechaza_columnas_de_orden_anulables(db):
+    with pytest.raises(ValueError, match="fecha_registro"):
+        paginar(db.query(MultaDanio), MultaDanio, [(MultaDanio.fecha_registro, True)], limit=10)
+
+
+@pytest.mark.parametrize("valores", [["notadate", 1], [1, 1], ["2024-01-01", "x"], ["2024-01-01", [1]]])
+def test_cursor_con_valores_de_otro_tipo_es_un_400(client, seed, valores):
+    cursor = base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+    for url, params in (("/alquileres/", {"limit": 5}), ("/reports/alquileres-por-cliente", {"client_id": 1})):
+        respuesta = client.get(url, params={**params, "cursor": cursor})
+        assert respuesta.status_code == 400, (url, respuesta.text)
@@ -0,0 +1,124 @@
+"""Regresión de planes: las consultas de reportes y validaciones no recorren tablas completas.
+
+Se capturan los SELECT que ejecuta cada operación y se pide el plan de cada uno
+(EXPLAIN QUERY PLAN en SQLite, EXPLAIN en MySQL). Falla si alguno lee
+completa una de las tablas grandes sin índice: "SCAN <tabla>" en SQLite,
+type=ALL en MySQL. Un recorrido completo de un índice de cobertura (reportes sin
+rango de fechas) no cuenta como escaneo de la tabla.
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.database import Database
+
+# Tablas que crecen con el uso; los catálogos y la flota se leen completos a propósito
+TABLAS_VIGILADAS = {"alquiler", "multa_danio", "mantenimiento", "ocupacion_vehiculo", "ocupacion_vehiculo_mensual"}
+
+_ESCANEO_SQLITE = re.compile(r"^SCAN (\w+)$")
+
+
+@contextmanager
+def capturar_selects():
+    sentencias = []
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            sentencias.append((statement, parameters))
+
+    event.listen(Database.engine, "before_cursor_execute", _capturar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(Database.engine, "before_cursor_execute", _capturar)
+
+
+def _tabla(nombre: str) -> str:
+    # Alias generados por SQLAlchemy: alquiler_1 -> alquiler
+    return re.sub(r"_\d+$", "", nombre)
+
+
+def escaneos_completos(sentencia, parametros):
+    """Tablas vigiladas que el plan de `sentencia` recorre completas."""
+    with Database.engine.connect() as conexion:
+        if conexion.dialect.name == "sqlite":
+            plan = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + sentencia, parametros).all()
+            escaneadas = [m.group(1) for fila in plan if (m := _ESCANEO_SQLITE.match(fila[-1]))]
+        else:
+            plan = conexion.exec_driver_sql("EXPLAIN " + sentencia, parametros).mappings().all()
+            escaneadas = [fila["table"] for fila in plan if fila["type"] == "ALL" and fila["table"]]
+    return [t for t in escaneadas if _tabla(t) in TABLAS_VIGILADAS]
+
+
+def verificar_planes(sentencias):
+    assert sentencias, "la operación no ejecutó consultas"
+    problemas = []
+    for sentencia, parametros in sentencias:
+        tablas = escaneos_completos(sentencia, parametros)
+        if tablas:
+            problemas.append(f"{', '.join(tablas)}:\n{sentencia}")
+    assert not problemas, "Escaneo completo de tabla en:\n\n" + "\n\n".join(problemas)
+
+
+REPORTES = [
+    "/reports/alquileres-por-cliente?client_id=3&size=5",
+    "/reports/alquileres-por-cliente?client_id=3&size=5&desde=2024-01-01&hasta=2024-12-31",
+    "/reports/vehiculos-mas-alquilados?limit=5",
+    "/reports/vehiculos-mas-alquilados?limit=5&desde=2024-03-15&hasta=2024-09-10",
+    "/reports/alquileres-por-periodo?periodo=mes&desde=2024-01-10&hasta=2024-11-20",
+    "/reports/alquileres-por-periodo?periodo=trimestre",
+    "/reports/facturacion-mensual?anio=2024",
+    "/reports/utilizacion?desde=2024-01-01&hasta=2024-06-30",
+    "/vehiculos/disponibilidad",
+    "/vehiculos/libres?id_categoria=1&fecha_inicio=2031-01-01&fecha_fin=2031-01-10",
+]
+
+
+@pytest.mark.parametrize("url", REPORTES)
+def test_reportes_sin_escaneo_completo(client, seed, url):
+    with capturar_selects() as sentencias:
+        respuesta = client.get(url)
+    assert respuesta.status_code == 200, respuesta.text
+    verificar_planes(sentencias)
+
+
+def _alquiler(id_vehiculo, inicio, fin, id_cliente=1):
+    return {
+        "id_cliente": id_cliente, "id_vehiculo": id_vehiculo, "id_empleado": 1,
+        "fecha_inicio": inicio, "fecha_fin": fin, "costo_base": 100, "estado": "PENDIENTE",
+    }
+
+
+def test_validacion_al_crear_alquiler(client, seed):
+    with capturar_selects() as sentencias:
+        respuesta = client.post("/alquileres/", json=_alquiler(7, "2031-04-01", "2031-04-05"))
+    assert respuesta.status_code in (200, 201), respuesta.text
+    verificar_planes(sentencias)
+
+
+def test_validacion_al_editar_alquiler(client, seed):
+    id_alquiler = client.post("/alquileres/", json=_alquiler(7, "2031-04-01", "2031-04-05")).json()["id_alquiler"]
+    with capturar_selects() as sentencias:
+        respuesta = client.put(f"/alquileres/{id_alquiler}", json={"fecha_inicio": "2031-04-02", "fecha_fin": "2031-04-08"})
+    assert respuesta.status_code == 200, respuesta.text
+    verificar_planes(sentencias)
+
+
+def test_validacion_de_lote(client, seed):
+    lote = [_alquiler(8, f"2031-0{m}-10", f"2031-0{m}-12") for m in range(1, 7)]
+    with capturar_selects() as sentencias:
+        respuesta = client.post("/alquileres/lote", json={"alquileres": lote, "modo": "parcial"})
+    assert respuesta.status_code in (200, 201, 207), respuesta.text
+    verificar_planes(sentencias)
+
+
+def test_validacion_al_crear_mantenimiento(client, seed):
+    with capturar_selects() as sentencias:
+        respuesta = client.post("/mantenimientos/", json={
+            "id_vehiculo": 10, "fecha_inicio": "2031-02-01", "fecha_fin": "2031-02-10",
+            "tipo": "preventivo", "id_empleado": 1,
+        })
+    assert respuesta.status_code in (200, 201), respuesta.text
+    verificar_planes(sentencias)
@@ -0,0 +1,49 @@
+"""Top de vehículos en memoria: una escritura confirmada durante la carga no se pierde."""
+from datetime import date
+
+from sqlalchemy import select
+
+from app.database import Database
+from app.schemas.alquileres import AlquilerCreate
+from app.services import alquileres as alquiler_service
+from app.services import ranking_vehiculos as ranking
+from app.services.ranking_vehiculos import RankingVehiculos, ranking_vehiculos
+
+ID_VEHICULO = 10
+TODOS = 1000
+
+
+def test_un_alta_confirmada_durante_la_carga_queda_en_el_top(client, seed, db, monkeypatch):
+    antes = dict(RankingVehiculos().top(db, TODOS)).get(ID_VEHICULO, 0)
+    original = ranking._sumar_desde_ranking
+    cargas = []
+
+    def sumar_con_alta_concurrente(sesion, conteo, inicio, fin):
+        original(sesion, conteo, inicio, fin)
+        cargas.append(dict(conteo).get(ID_VEHICULO, 0))
+        if len(cargas) == 1:
+            # Otro request confirma un alta después de la lectura y antes de guardar los contadores
+            with Database.SessionLocal() as otra:
+                alquiler_service.create_alquiler(otra, AlquilerCreate(
+                    id_cliente=1, id_vehiculo=ID_VEHICULO, id_empleado=1,
+                    fecha_inicio=date(2031, 5, 1), fecha_fin=date(2031, 5, 4), costo_base=100,
+                ))
+
+    monkeypatch.setattr(ranking, "_sumar_desde_ranking", sumar_con_alta_concurrente)
+    ranking_vehiculos.invalidar()
+
+    top = dict(ranking_vehiculos.top(db, TODOS))
+
+    assert cargas == [antes, antes + 1]
+    assert top[ID_VEHICULO] == antes + 1
+    # Los contadores guardados son los de la segunda carga
+    assert dict(ranking_vehiculos.top(db, TODOS))[ID_VEHICULO] == antes + 1
+    assert len(cargas) == 2
+
+
+def test_con_una_transaccion_abierta_el_top_no_se_guarda(client, seed, db):
+    ranking_local = RankingVehiculos()
+    db.execute(select(1))
+
+    assert ranking_local.top(db, TODOS)
+    assert ranking_local._contadores == {}
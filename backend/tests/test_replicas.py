@@ -0,0 +1,172 @@
+"""Ruteo de lecturas: round-robin, caída y atraso de réplicas, lectura de las propias escrituras.
+
+Las réplicas son otros archivos SQLite con las mismas tablas; se distinguen del
+primario por sus datos.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import replicas as m_replicas
+from app.database import Base, Database, sesion_lectura
+from app.models import Empleado
+from app.replicas import COOKIE_ESCRITURA, EnrutadorLecturas, Replica
+
+
+def _base_sqlite(ruta, empleados=0):
+    engine = create_engine(f"sqlite:///{ruta}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for i in range(empleados):
+            conn.execute(Empleado.__table__.insert().values(nombre=f"R{i}", apellido="Replica"))
+    return engine
+
+
+@pytest.fixture
+def replicas(tmp_path):
+    return [Replica(f"replica{i}", _base_sqlite(tmp_path / f"replica{i}.db"), max_lag_segundos=5) for i in (1, 2)]
+
+
+@pytest.fixture
+def replica_caida(tmp_path):
+    # El directorio no existe: cada conexión falla
+    return Replica("caida", create_engine(f"sqlite:///{tmp_path / 'no_existe' / 'x.db'}"), max_lag_segundos=5)
+
+
+def _engine_de(sesion):
+    try:
+        return sesion.get_bind()
+    finally:
+        sesion.close()
+
+
+def test_round_robin_entre_replicas(db, replicas):
+    enrutador = EnrutadorLecturas(lambda: Database.SessionLocal(), replicas, 5)
+
+    engines = [_engine_de(enrutador.sesion()) for _ in range(4)]
+
+    assert engines == [replicas[0].engine, replicas[1].engine] * 2
+
+
+def test_forzar_primario(db, replicas):
+    enrutador = EnrutadorLecturas(lambda: Database.SessionLocal(), replicas, 5)
+
+    assert _engine_de(enrutador.sesion(forzar_primario=True)) is Database.engine
+
+
+def test_replica_caida_se_saltea(db, replicas, replica_caida):
+    enrutador = EnrutadorLecturas(lambda: Database.SessionLocal(), [replica_caida, replicas[0]], 5)
+
+    engines = {_engine_de(enrutador.sesion()) for _ in range(4)}
+
+    assert engines == {replicas[0].engine}
+    assert [r["disponible"] for r in enrutador.estado()] == [False, True]
+
+
+def test_sin_replicas_sanas_lee_del_primario(db, replica_caida):
+    enrutador = EnrutadorLecturas(lambda: Database.SessionLocal(), [replica_caida], 5)
+
+    assert _engine_de(enrutador.sesion()) is Database.engine
+
+
+def test_replica_atrasada_no_se_usa_hasta_ponerse_al_dia(db, replicas, monkeypatch):
+    monkeypatch.setattr(m_replicas, "INTERVALO_CHEQUEO", 0)
+    lag = {"valor": 30.0}
+    monkeypatch.setattr(replicas[0], "_medir_lag", lambda: lag["valor"])
+    enrutador = EnrutadorLecturas(lambda: Database.SessionLocal(), replicas[:1], 5)
+
+    assert _engine_de(enrutador.sesion()) is Database.engine
+
+    lag["valor"] = 1.0
+    assert _engine_de(enrutador.sesion()) is replicas[0].engine
+
+
+def test_replica_que_vuelve_se_usa_luego_del_intervalo(db, tmp_path, monkeypatch):
+    ruta = tmp_path / "intermitente" / "r.db"
+    replica = Replica("intermitente", create_engine(f"sqlite:///{ruta}"), max_lag_segundos=5)
+    enrutador = EnrutadorLecturas(lambda: Database.SessionLocal(), [replica], 5)
+    assert _engine_de(enrutador.sesion()) is Database.engine
+
+    os.makedirs(ruta.parent)
+    # Dentro del intervalo se usa el último chequeo
+    assert _engine_de(enrutador.sesion()) is Database.engine
+    monkeypatch.setattr(m_replicas, "INTERVALO_CHEQUEO", 0)
+    assert _engine_de(enrutador.sesion()) is replica.engine
+
+
+def test_medir_el_atraso_no_frena_el_event_loop(db, replicas, monkeypatch):
+    def medir_lento():
+        # Una réplica que tarda en aceptar la conexión
+        time.sleep(0.3)
+        return 0.0
+
+    monkeypatch.setattr(replicas[0], "_medir_lag", medir_lento)
+    monkeypatch.setattr(Database, "lecturas", EnrutadorLecturas(lambda: Database.SessionLocal(), replicas[:1], 5))
+
+    async def medir_ticks():
+        ticks = 0
+        tarea = asyncio.ensure_future(sesion_lectura())
+        while not tarea.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks, tarea.result()
+
+    ticks, sesion = asyncio.run(medir_ticks())
+
+    assert _engine_de(sesion) is replicas[0].engine
+    assert ticks >= 10
+
+
+@pytest.fixture
+def app_con_replica(client, seed, tmp_path):
+    """La app leyendo de una réplica con 3 empleados (el primario tiene los del seed)."""
+    replica = Replica("replica", _base_sqlite(tmp_path / "replica.db", empleados=3), max_lag_segundos=5)
+    original = Database.lecturas
+    Database.lecturas = EnrutadorLecturas(lambda: Database.SessionLocal(), [replica], 5)
+    client.cookies.clear()
+    try:
+        yield client
+    finally:
+        Database.lecturas = original
+        client.cookies.clear()
+
+
+def test_endpoints_de_lectura_usan_la_replica(app_con_replica, seed):
+    assert len(app_con_replica.get("/empleados/").json()) == 3
+
+
+def test_lectura_propia_luego_de_escribir(app_con_replica, seed):
+    respuesta = app_con_replica.post("/empleados/", json={
+        "nombre": "Nuevo", "apellido": "Empleado", "dni": "99999999", "legajo": "L-999",
+    })
+    assert respuesta.status_code in (200, 201), respuesta.text
+    assert COOKIE_ESCRITURA in respuesta.cookies
+
+    # Con la cookie: primario, que ya tiene el alta
+    assert len(app_con_replica.get("/empleados/").json()) == seed["empleados"] + 1
+
+    # Otro cliente (sin cookie ni id) sigue leyendo de la réplica
+    app_con_replica.cookies.clear()
+    assert len(app_con_replica.get("/empleados/", headers={"X-Client-Id": "otro"}).json()) == 3
+
+
+def test_lectura_propia_por_client_id_sin_cookies(app_con_replica, seed):
+    respuesta = app_con_replica.post("/empleados/", headers={"X-Client-Id": "c1"}, json={
+        "nombre": "Nuevo", "apellido": "Empleado", "dni": "88888888", "legajo": "L-888",
+    })
+    assert respuesta.status_code in (200, 201), respuesta.text
+    app_con_replica.cookies.clear()
+
+    assert len(app_con_replica.get("/empleados/", headers={"X-Client-Id": "c1"}).json()) == seed["empleados"] + 1
+    assert len(app_con_replica.get("/empleados/", headers={"X-Client-Id": "c2"}).json()) == 3
+
+
+def test_exportacion_lee_de_la_replica(app_con_replica, seed):
+    respuesta = app_con_replica.get("/alquileres/exportar?formato=ndjson")
+
+    assert respuesta.status_code == 200
+    # La réplica de la prueba no tiene alquileres; el primario sí
+    assert respuesta.text == ""
@@ -0,0 +1,226 @@
+"""Reservas concurrentes: sin alquileres solapados por vehículo y sin esperas entre vehículos distintos.
+
+Cada hilo usa su propia sesión y llama a los servicios (alta, edición y lote),
+como lo harían requests simultáneos. `reservas_vehiculos.bloquear` se envuelve
+para registrar quién está dentro de la sección crítica de cada vehículo; la
+pausa dentro de ella hace visibles los solapamientos. En SQLite la exclusión
+la da el lock del proceso; con TEST_DATABASE_URL apuntando a MySQL se ejercita
+además el SELECT ... FOR UPDATE.
+"""
+import asyncio
+import gc
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.util import await_only
+
+from app.database import Database
+from app.models import Alquiler
+from app.schemas.alquileres import AlquilerCreate, AlquilerUpdate
+from app.services import alquileres as alquiler_service
+from app.services import asincronos
+from app.services.exceptions import BusinessRuleError
+from app.services.indice_disponibilidad import ESTADOS_ALQUILER_BLOQUEANTES, reservas_vehiculos
+
+PAUSA = 0.05
+VEHICULOS_DISPUTADOS = [21, 22, 23]
+
+
+@pytest.fixture
+def secciones(monkeypatch):
+    """Cuenta, por vehículo y en total, cuántos hilos están a la vez dentro de `bloquear`."""
+    original = reservas_vehiculos.bloquear
+    lock = threading.Lock()
+    activos, maximo = Counter(), Counter()
+
+    @contextmanager
+    def bloquear_observado(id_vehiculo):
+        with original(id_vehiculo):
+            with lock:
+                activos[id_vehiculo] += 1
+                activos["total"] += 1
+                maximo[id_vehiculo] = max(maximo[id_vehiculo], activos[id_vehiculo])
+                maximo["total"] = max(maximo["total"], activos["total"])
+            try:
+                time.sleep(PAUSA)
+                yield
+            finally:
+                with lock:
+                    activos[id_vehiculo] -= 1
+                    activos["total"] -= 1
+
+    monkeypatch.setattr(reservas_vehiculos, "bloquear", bloquear_observado)
+    return maximo
+
+
+def _en_paralelo(tareas):
+    """Corre cada tarea en un hilo con su sesión; retorna (aceptadas, rechazadas, errores inesperados)."""
+    barrera = threading.Barrier(len(tareas))
+    aceptadas, rechazadas, errores = [], [], []
+
+    def correr(tarea):
+        db = Database.SessionLocal()
+        try:
+            barrera.wait()
+            aceptadas.append(tarea(db))
+        except (BusinessRuleError, HTTPException) as e:
+            rechazadas.append(e)
+        except Exception as e:  # pragma: no cover - se informa en el assert
+            errores.append(e)
+        finally:
+            db.close()
+
+    hilos = [threading.Thread(target=correr, args=(t,)) for t in tareas]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return aceptadas, rechazadas, errores
+
+
+def _alta(id_vehiculo, inicio, dias=5):
+    return AlquilerCreate(
+        id_cliente=1, id_vehiculo=id_vehiculo, id_empleado=1,
+        fecha_inicio=inicio, fecha_fin=inicio + timedelta(days=dias), costo_base=100,
+    )
+
+
+def _solapamientos(db, ids_vehiculo, desde):
+    alquileres = db.execute(
+        select(Alquiler.id_vehiculo, Alquiler.id_alquiler, Alquiler.fecha_inicio, Alquiler.fecha_fin)
+        .where(
+            Alquiler.id_vehiculo.in_(ids_vehiculo),
+            Alquiler.estado.in_(ESTADOS_ALQUILER_BLOQUEANTES),
+            Alquiler.fecha_fin >= desde,
+        )
+        .order_by(Alquiler.id_vehiculo, Alquiler.fecha_inicio)
+    ).all()
+    return [
+        (a.id_alquiler, b.id_alquiler)
+        for a, b in zip(alquileres, alquileres[1:])
+        if a.id_vehiculo == b.id_vehiculo and b.fecha_inicio <= a.fecha_fin
+    ]
+
+
+def test_altas_ediciones_y_lotes_concurrentes_no_reservan_dos_veces(client, seed, db, secciones):
+    base = date(2032, 3, 1)
+    # Alquileres en otro vehículo y otro año que las ediciones intentan mover al período disputado
+    a_mover = [alquiler_service.create_alquiler(db, _alta(30 + i, date(2033, 6, 1))).id_alquiler for i in range(3)]
+    secciones.clear()
+
+    tareas = []
+    for i in range(12):
+        id_vehiculo, inicio = VEHICULOS_DISPUTADOS[i % 3], base + timedelta(days=2 * (i // 3))
+        tareas.append(lambda db, v=id_vehiculo, d=inicio: alquiler_service.create_alquiler(db, _alta(v, d)).id_alquiler)
+    for i, id_alquiler in enumerate(a_mover):
+        cambios = AlquilerUpdate(
+            id_vehiculo=VEHICULOS_DISPUTADOS[i], fecha_inicio=base + timedelta(days=1), fecha_fin=base + timedelta(days=4),
+        )
+        tareas.append(lambda db, a=id_alquiler, c=cambios: alquiler_service.update_alquiler(db, a, c).id_alquiler)
+    for i in range(3):
+        lote = [_alta(v, base + timedelta(days=3 + i)) for v in VEHICULOS_DISPUTADOS]
+        tareas.append(lambda db, lote=lote: _lote_o_rechazo(db, lote))
+
+    aceptadas, rechazadas, errores = _en_paralelo(tareas)
+
+    assert errores == []
+    assert aceptadas and rechazadas
+    db.expire_all()
+    assert _solapamientos(db, VEHICULOS_DISPUTADOS, base) == []
+    assert all(secciones[v] == 1 for v in VEHICULOS_DISPUTADOS)
+
+
+def _lote_o_rechazo(db, lote):
+    resultado = alquiler_service.crear_alquileres_lote(db, lote, modo="todo_o_nada")
+    if not resultado["creados"]:
+        raise BusinessRuleError("lote rechazado")
+    return resultado
+
+
+def test_reservas_de_vehiculos_distintos_no_se_esperan(client, seed, secciones):
+    ids_vehiculo = list(range(1, 9))
+    tareas = [
+        lambda db, v=v: alquiler_service.create_alquiler(db, _alta(v, date(2032, 9, 1))).id_alquiler
+        for v in ids_vehiculo
+    ]
+
+    # La basura de los tests anteriores no se junta dentro del tiempo medido
+    gc.collect()
+    inicio = time.perf_counter()
+    aceptadas, rechazadas, errores = _en_paralelo(tareas)
+    duracion = time.perf_counter() - inicio
+
+    assert (len(aceptadas), rechazadas, errores) == (len(ids_vehiculo), [], [])
+    assert secciones["total"] > 1
+    # En serie serían len(ids_vehiculo) pausas como mínimo
+    assert duracion < len(ids_vehiculo) * PAUSA
+
+
+@pytest.mark.skipif(Database.engine.dialect.name != "sqlite", reason="la sesión async de la prueba usa aiosqlite")
+def test_altas_async_y_lote_sync_a_la_vez_no_se_traban(client, seed, monkeypatch):
+    """Modo DB_ASYNC: un alta async espera a la DB con el lock de su vehículo tomado.
+
+    Mientras tanto un lote sync toma el lock de A y espera el de B, y otra alta
+    async pide A. Si esa alta esperara A en el hilo del event loop, la primera no
+    podría terminar y los tres quedarían esperándose.
+    """
+    a, b = VEHICULOS_DISPUTADOS[:2]
+    validar_referencias = alquiler_service.validar_referencias
+
+    def validar_con_demora(db, id_cliente, id_vehiculo, id_empleado):
+        validar_referencias(db, id_cliente, id_vehiculo, id_empleado)
+        if id_vehiculo == b and _en_event_loop():
+            # Una consulta lenta: la tarea cede el loop con el lock de B tomado
+            await_only(asyncio.sleep(PAUSA * 10))
+
+    monkeypatch.setattr(alquiler_service, "validar_referencias", validar_con_demora)
+    engine = create_async_engine(Database.engine.url.set(drivername="sqlite+aiosqlite"))
+    resultados = {}
+
+    async def alta(id_vehiculo, inicio, demora):
+        await asyncio.sleep(demora)
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            return (await asincronos.create_alquiler(db, _alta(id_vehiculo, inicio))).id_alquiler
+
+    async def altas_async():
+        try:
+            resultados["async"] = await asyncio.gather(
+                alta(b, date(2034, 3, 1), 0), alta(a, date(2034, 5, 1), PAUSA * 4),
+            )
+        finally:
+            await engine.dispose()
+
+    def lote_sync():
+        time.sleep(PAUSA * 2)
+        with Database.SessionLocal() as db:
+            resultados["lote"] = alquiler_service.crear_alquileres_lote(
+                db, [_alta(a, date(2034, 1, 1)), _alta(b, date(2034, 1, 1))], modo="todo_o_nada",
+            )
+
+    hilos = [
+        threading.Thread(target=lambda: asyncio.run(altas_async()), daemon=True),
+        threading.Thread(target=lote_sync, daemon=True),
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(timeout=10)
+
+    assert not any(hilo.is_alive() for hilo in hilos)
+    assert len(resultados["async"]) == 2
+    assert resultados["lote"]["creados"] == 2
+
+
+def _en_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
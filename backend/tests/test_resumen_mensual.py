@@ -0,0 +1,61 @@
+from app.models import Alquiler, ResumenMensualAlquiler
+from app.services import resumen_mensual
+
+
+def filas_resumen(db):
+    """Filas no vacías del resumen materializado, como {clave: (cantidad, costo_base, costo_total, multas)}."""
+    db.expire_all()
+    return {
+        (r.anio, r.mes, r.id_categoria, r.estado): (
+            r.cantidad, r.total_costo_base, r.total_costo_total, r.total_multas
+        )
+        for r in db.query(ResumenMensualAlquiler)
+        if r.cantidad
+    }
+
+
+def filas_recalculadas(db):
+    """Lo mismo, agrupando desde las tablas base."""
+    return {
+        (int(f.anio), int(f.mes), f.id_categoria, f.estado or ""): (
+            f.cantidad,
+            resumen_mensual._monto(f.costo_base),
+            resumen_mensual._monto(f.costo_total),
+            resumen_mensual._monto(f.multas),
+        )
+        for f in resumen_mensual._agrupar(db)
+    }
+
+
+def test_mantenimiento_que_cancela_reservas_actualiza_el_resumen(client, seed, db):
+    reservas = []
+    for dia in (10, 20):
+        respuesta = client.post("/alquileres/", json={
+            "id_cliente": 1, "id_vehiculo": 10, "id_empleado": 1,
+            "fecha_inicio": f"2031-03-{dia}", "fecha_fin": f"2031-03-{dia + 3}",
+            "costo_base": 100, "estado": "PENDIENTE",
+        })
+        assert respuesta.status_code in (200, 201), respuesta.text
+        reservas.append(respuesta.json()["id_alquiler"])
+
+    respuesta = client.post("/mantenimientos/", json={
+        "id_vehiculo": 10, "fecha_inicio": "2031-03-01", "fecha_fin": "2031-03-31",
+        "tipo": "preventivo", "id_empleado": 1,
+    })
+    assert respuesta.status_code in (200, 201), respuesta.text
+
+    estados = {a.estado for a in db.query(Alquiler).filter(Alquiler.id_alquiler.in_(reservas))}
+    assert estados == {"CANCELADO"}
+    assert filas_resumen(db) == filas_recalculadas(db)
+
+
+def test_resumen_coincide_con_las_tablas_base_luego_de_escrituras(client, seed, db):
+    respuesta = client.post("/alquileres/", json={
+        "id_cliente": 2, "id_vehiculo": 5, "id_empleado": 1,
+        "fecha_inicio": "2031-05-01", "fecha_fin": "2031-05-04", "costo_base": 250, "estado": "PENDIENTE",
+    })
+    id_alquiler = respuesta.json()["id_alquiler"]
+    client.put(f"/alquileres/{id_alquiler}", json={"fecha_inicio": "2031-06-01", "fecha_fin": "2031-06-03"})
+    client.put(f"/alquileres/{id_alquiler}/cancelar", json={"motivo_cancelacion": "x", "id_empleado_cancelador": 1})
+
+    assert filas_resumen(db) == filas_recalculadas(db)
@@ -0,0 +1,78 @@
+"""Las rutas async (DB_ASYNC) reemplazan a las sync: deben aceptar los mismos parámetros."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import Database, get_async_db
+from app.routers import alquileres, asincronos, reports, vehiculos
+
+ROUTERS_SYNC = (alquileres.router, vehiculos.router, reports.router)
+
+
+def _parametros(dependant, encontrados=None):
+    """Parámetros de query del endpoint y de sus dependencias: {alias: (tipo, default, validaciones, descripción)}."""
+    encontrados = {} if encontrados is None else encontrados
+    for p in dependant.query_params:
+        info = p.field_info
+        encontrados[p.alias] = (info.annotation, info.default, [str(m) for m in info.metadata], info.description)
+    for sub in dependant.dependencies:
+        _parametros(sub, encontrados)
+    return encontrados
+
+
+def _dependencias(ruta):
+    """Dependencias de la ruta; las fábricas como presupuesto_consultas(n) se comparan por su argumento."""
+    return [
+        (d.dependency.__qualname__, [c.cell_contents for c in d.dependency.__closure__ or ()])
+        for d in ruta.dependencies
+    ]
+
+
+def _rutas_sync():
+    return {(r.path, metodo): r for router in ROUTERS_SYNC for r in router.routes for metodo in r.methods}
+
+
+@pytest.mark.parametrize(
+    "ruta",
+    [pytest.param(r, id=f"{metodo} {r.path}") for r in asincronos.router.routes for metodo in r.methods],
+)
+def test_la_ruta_async_tiene_el_contrato_de_la_sync(ruta):
+    (metodo,) = ruta.methods
+    sync = _rutas_sync()[(ruta.path, metodo)]
+
+    assert _parametros(ruta.dependant) == _parametros(sync.dependant)
+    assert _dependencias(ruta) == _dependencias(sync)
+    assert ruta.response_model == sync.response_model
+    assert ruta.status_code == sync.status_code
+
+
+@pytest.fixture
+def cliente_async(client, seed):
+    """App con solo las rutas async, sobre la misma base de pruebas vía aiosqlite."""
+    if Database.engine.dialect.name != "sqlite":
+        pytest.skip("la sesión async de la prueba usa aiosqlite")
+    engine = create_async_engine(Database.engine.url.set(drivername="sqlite+aiosqlite"))
+    sesiones = async_sessionmaker(engine, autoflush=False)
+
+    async def _db():
+        async with sesiones() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(asincronos.router)
+    app.dependency_overrides[get_async_db] = _db
+    with TestClient(app) as cliente:
+        yield cliente
+
+
+def test_listado_async_con_vista_resumen(client, cliente_async):
+    params = {"limit": 5}
+    resumen = cliente_async.get("/alquileres/", params={**params, "vista": "resumen"})
+    sync = client.get("/alquileres/", params={**params, "vista": "resumen"})
+
+    assert resumen.status_code == 200
+    assert len(resumen.json()) == 5
+    assert resumen.json() == sync.json()
+    assert set(resumen.json()[0]) < set(cliente_async.get("/alquileres/", params=params).json()[0])
+    assert cliente_async.get("/alquileres/", params={"vista": "bogus"}).status_code == 422
@@ -0,0 +1,133 @@
+"""/reports/utilizacion contra un cálculo día por día desde las tablas base.
+
+La utilización se lee de la tabla mensual y del calendario de ocupación; acá se
+recalcula con conjuntos de días por vehículo desde alquiler y mantenimiento, en
+ventanas alineadas a meses, con extremos parciales y pasando el horizonte, y
+después de escrituras que la tabla mensual tiene que seguir.
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Alquiler, Mantenimiento, Vehiculo
+from app.services import ocupacion
+from app.services.utilizacion import calcular_utilizacion
+
+
+def _dias(desde, hasta, inicio, fin):
+    """Días de [desde, hasta] dentro de [inicio, fin)."""
+    desde, hasta = max(desde, inicio), min(hasta, fin - timedelta(days=1))
+    return {desde + timedelta(days=i) for i in range((hasta - desde).days + 1)}
+
+
+def _esperado(db, inicio, fin):
+    """{id_vehiculo: (días alquilados, días en mantenimiento)} contando días uno por uno."""
+    alquilados = {v: set() for (v,) in db.query(Vehiculo.id_vehiculo)}
+    en_mantenimiento = {v: set() for v in alquilados}
+    for m in db.query(Mantenimiento):
+        en_mantenimiento[m.id_vehiculo] |= _dias(m.fecha_inicio, m.fecha_fin or fin, inicio, fin)
+    for a in db.query(Alquiler).filter(Alquiler.estado != "CANCELADO"):
+        alquilados[a.id_vehiculo] |= _dias(a.fecha_inicio, a.fecha_fin, inicio, fin)
+    return {v: (len(alquilados[v] - en_mantenimiento[v]), len(en_mantenimiento[v])) for v in alquilados}
+
+
+def _calculado(db, inicio, fin):
+    resultado = calcular_utilizacion(db, inicio, fin)
+    return {v["id_vehiculo"]: (v["dias_alquilados"], v["dias_mantenimiento"]) for v in resultado["por_vehiculo"]}
+
+
+def _ventanas():
+    hoy = date.today()
+    return [
+        (date(2024, 1, 1), date(2024, 7, 1)),
+        (date(2024, 1, 10), date(2024, 11, 21)),
+        (date(2024, 3, 5), date(2024, 3, 20)),
+        (hoy - timedelta(days=400), hoy + timedelta(days=ocupacion.HORIZONTE_DIAS + 90)),
+    ]
+
+
+def _alquilar(client, id_vehiculo, desde, hasta):
+    respuesta = client.post("/alquileres/", json={
+        "id_cliente": 1, "id_vehiculo": id_vehiculo, "id_empleado": 1,
+        "fecha_inicio": str(desde), "fecha_fin": str(hasta), "costo_base": 100,
+    })
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()["id_alquiler"]
+
+
+def _mantener(client, id_vehiculo, desde, hasta=None):
+    respuesta = client.post("/mantenimientos/", json={
+        "id_vehiculo": id_vehiculo, "fecha_inicio": str(desde), "fecha_fin": str(hasta) if hasta else None,
+        "tipo": "correctivo", "id_empleado": 1,
+    })
+    assert respuesta.status_code == 201, respuesta.text
+
+
+@pytest.fixture
+def escrituras(client, seed, db):
+    """Alquiler superpuesto a uno finalizado, cancelaciones, edición y mantenimientos (uno sin fin)."""
+    # Los mantenimientos solo se pueden crear en vehículos sin alquileres en curso o en checkout
+    en_curso = select(Alquiler.id_vehiculo).where(Alquiler.estado.in_(["EN_CURSO", "CHECKOUT"]))
+    libres = [v for (v,) in db.query(Vehiculo.id_vehiculo).filter(Vehiculo.id_vehiculo.not_in(en_curso))]
+    finalizado = next(
+        a for a in db.query(Alquiler).filter(Alquiler.estado == "FINALIZADO", Alquiler.id_vehiculo.in_(libres))
+        if (a.fecha_fin - a.fecha_inicio).days >= 2
+    )
+    otros = [v for v in libres if v != finalizado.id_vehiculo]
+    hoy = date.today()
+
+    # Mantenimiento sobre parte del alquiler finalizado y otro sin fecha de fin
+    _mantener(client, finalizado.id_vehiculo, finalizado.fecha_inicio, finalizado.fecha_inicio + timedelta(days=1))
+    _mantener(client, otros[0], hoy + timedelta(days=500))
+    # Un mantenimiento cancela la reserva que se le superpone
+    _alquilar(client, otros[1], hoy + timedelta(days=200), hoy + timedelta(days=210))
+    _mantener(client, otros[1], hoy + timedelta(days=205), hoy + timedelta(days=206))
+
+    cancelado = _alquilar(client, 4, hoy + timedelta(days=40), hoy + timedelta(days=75))
+    assert client.put(f"/alquileres/{cancelado}/cancelar", json={
+        "motivo_cancelacion": "prueba", "id_empleado_cancelador": 1,
+    }).status_code == 200
+    movido = _alquilar(client, 5, hoy + timedelta(days=100), hoy + timedelta(days=110))
+    assert client.put(f"/alquileres/{movido}", json={
+        "id_vehiculo": 6, "fecha_inicio": str(hoy + timedelta(days=300)), "fecha_fin": str(hoy + timedelta(days=330)),
+    }).status_code == 200
+
+    # Un alquiler finalizado no bloquea: se le puede superponer otro (el día cuenta una vez)
+    _alquilar(client, finalizado.id_vehiculo, finalizado.fecha_inicio + timedelta(days=2), finalizado.fecha_fin)
+    db.expire_all()
+
+
+@pytest.mark.parametrize("ventana", _ventanas())
+def test_utilizacion_cuenta_los_dias_del_seed(client, seed, db, ventana):
+    assert _calculado(db, *ventana) == _esperado(db, *ventana)
+
+
+@pytest.mark.parametrize("ventana", _ventanas())
+def test_utilizacion_sigue_las_escrituras(escrituras, db, ventana):
+    assert _calculado(db, *ventana) == _esperado(db, *ventana)
+
+
+def test_la_tabla_mensual_coincide_con_el_calendario_despues_de_escribir(escrituras, db):
+    resultado = ocupacion.verificar(db)
+
+    assert (resultado["faltantes"], resultado["sobrantes"], resultado["meses_distintos"]) == (0, 0, 0)
+
+
+def test_cambiar_la_categoria_de_un_vehiculo_invalida_el_reporte_cacheado(client, seed, db):
+    vehiculo = db.query(Vehiculo).filter(Vehiculo.id_categoria != 1).first()
+    categoria_original = vehiculo.id_categoria
+    params = {"desde": "2024-01-01", "hasta": "2024-12-31", "id_categoria": 1}
+
+    def ids_en_categoria():
+        respuesta = client.get("/reports/utilizacion", params=params)
+        assert respuesta.status_code == 200, respuesta.text
+        return {v["id_vehiculo"] for v in respuesta.json()["por_vehiculo"]}
+
+    antes = ids_en_categoria()
+    assert client.put(f"/vehiculos/{vehiculo.id_vehiculo}", json={"id_categoria": 1}).status_code == 200
+    try:
+        assert ids_en_categoria() == antes | {vehiculo.id_vehiculo}
+    finally:
+        assert client.put(f"/vehiculos/{vehiculo.id_vehiculo}", json={"id_categoria": categoria_original}).status_code == 200
+    assert ids_en_categoria() == antes